@@ -4,13 +4,22 @@ import os
 import time
 import numpy as np
 from utils.logger import get_logger
+from utils.trace_recorder import TraceRecorder
+from utils.clock import SYSTEM_CLOCK
 
 class CameraAgent:
-    def __init__(self, config_path="config/camera_config.json"):
+    def __init__(self, config_path="config/camera_config.json", tracer=None, clock=None, capture_factory=None):
         self.logger = get_logger(self.__class__.__name__)
         self.config = self._load_config(config_path)
+        self.tracer = tracer or TraceRecorder(enabled=False)
+        self.clock = clock or SYSTEM_CLOCK
+        # Opens a VideoCapture-like source for a device id (synthetic sources in simulations)
+        self.capture_factory = capture_factory or cv2.VideoCapture
         self.cap = None
         self.is_running = False
+        # Resolution change requested by another thread, applied by the capture thread
+        self.pending_resolution = None
+        self.active_resolution = None
 
     def _load_config(self, path):
         try:
@@ -34,6 +43,10 @@ class CameraAgent:
         import threading
         self.latest_frame = None
         self.frame_lock = threading.Lock()
+        # Consumers block on this until a newer frame arrives (see wait_frame)
+        self.frame_cond = threading.Condition(self.frame_lock)
+        self.frame_seq = 0
+        self.frame_time = self.clock.time()
         self.stop_event = threading.Event()
 
         device_id = self.config.get("device_id", 0)
@@ -42,7 +55,7 @@ class CameraAgent:
         # but keep high res for now as user didn't ask to lower it.
         
         self.logger.info(f"Opening camera device {device_id}...")
-        self.cap = cv2.VideoCapture(device_id)
+        self.cap = self.capture_factory(device_id)
 
         if not self.cap.isOpened():
             self.logger.error(f"Failed to open camera device {device_id}")
@@ -51,6 +64,7 @@ class CameraAgent:
         width, height = self.config.get("resolution", [640, 480]) # Default to 640x480 for Speed
         self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.active_resolution = (width, height)
         # self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1) # RPi specific optimization
 
         self.logger.info(f"Camera opened. Requested: {width}x{height}")
@@ -67,11 +81,22 @@ class CameraAgent:
         max_failures = 10
         
         while not self.stop_event.is_set():
+            pending = self.pending_resolution
+            if pending:
+                self.pending_resolution = None
+                self._apply_resolution(pending)
+            read_started = time.perf_counter()
             ret, frame = self.cap.read()
             if ret:
                 consecutive_failures = 0
-                with self.frame_lock:
+                with self.frame_cond:
                     self.latest_frame = frame
+                    self.frame_seq += 1
+                    seq = self.frame_seq
+                    self.frame_time = self.clock.time()
+                    self.frame_cond.notify_all()
+                # The frame sequence number is the trace ID for the downstream stages
+                self.tracer.record("capture", seq, read_started, time.perf_counter())
             else:
                 consecutive_failures += 1
                 self.logger.warning(f"Capture failure ({consecutive_failures}/{max_failures}).")
@@ -79,12 +104,12 @@ class CameraAgent:
                 if consecutive_failures >= max_failures:
                     self.logger.error("Too many capture failures. Attempting camera RECOVERY...")
                     self.cap.release()
-                    time.sleep(2.0)
+                    self.clock.sleep(2.0)
                     
                     device_id = self.config.get("device_id", 0)
-                    self.cap = cv2.VideoCapture(device_id)
+                    self.cap = self.capture_factory(device_id)
                     if self.cap.isOpened():
-                        width, height = self.config.get("resolution", [640, 480])
+                        width, height = self.active_resolution or self.config.get("resolution", [640, 480])
                         self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
                         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
                         self.logger.info("Camera recovery SUCCESSFUL.")
@@ -92,7 +117,7 @@ class CameraAgent:
                     else:
                         self.logger.error("Camera recovery FAILED. Will retry...")
                 
-                time.sleep(0.1)
+                self.clock.sleep(0.1)
 
     def get_frame(self):
         """Returns the latest captured frame without blocking."""
@@ -101,12 +126,50 @@ class CameraAgent:
         with self.frame_lock:
             return self.latest_frame
 
+    def request_resolution(self, resolution=None):
+        """Asks the capture thread to switch resolution (None restores the configured one).
+        A no-op when the capture already runs at that resolution."""
+        target = tuple(resolution or self.config.get("resolution", [640, 480]))
+        if target == self.active_resolution:
+            self.pending_resolution = None  # Cancel a switch that has not happened yet
+            return
+        self.pending_resolution = target
+
+    def _apply_resolution(self, resolution):
+        width, height = resolution
+        self.active_resolution = (width, height)
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.logger.info(f"Capture resolution set to {width}x{height}")
+
+    def wait_frame(self, last_seq=0, timeout=1.0):
+        """
+        Blocks until a frame newer than `last_seq` is captured.
+        Returns (frame, seq, captured_at), or (None, last_seq, None) on timeout or when stopped.
+        """
+        if not self.is_running:
+            return None, last_seq, None
+        with self.frame_cond:
+            ready = self.clock.wait_for(
+                self.frame_cond, lambda: self.frame_seq != last_seq or not self.is_running, timeout)
+            if not ready or not self.is_running or self.latest_frame is None:
+                return None, last_seq, None
+            return self.latest_frame, self.frame_seq, self.frame_time
+
+    def last_frame_time(self):
+        """Wall-clock time of the last captured frame (camera start if none yet)."""
+        return getattr(self, 'frame_time', self.clock.time())
+
     def stop(self):
         """Releases the camera resources."""
         self.logger.info("Stopping camera...")
         self.is_running = False
         if hasattr(self, 'stop_event'):
             self.stop_event.set()
+        if hasattr(self, 'frame_cond'):
+            # Release consumers blocked in wait_frame
+            with self.frame_cond:
+                self.frame_cond.notify_all()
         if hasattr(self, 'capture_thread'):
             self.capture_thread.join(timeout=1.0)
         if self.cap and self.cap.isOpened():
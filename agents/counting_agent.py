@@ -65,5 +65,5 @@ class CountingAgent:
         result["total"] = sum(counts.values())
         result["timestamp"] = datetime.datetime.utcnow().isoformat() + "Z"
         
-        self.logger.debug(f"Count result: {result}")
+        self.logger.debug("Count result: %s", result)
         return result
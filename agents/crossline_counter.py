@@ -3,20 +3,29 @@ Crossline Counter Agent
 Tracks objects crossing a user-defined line for directional counting.
 """
 
-import time
-from google.cloud import firestore
 from utils.logger import get_logger
+from utils.clock import SYSTEM_CLOCK
+
+try:
+    from google.cloud import firestore
+except ImportError:
+    # Allows offline use (benchmarks, replay) with a line passed in directly
+    firestore = None
 
 
 class CrosslineCounter:
-    def __init__(self, binding_manager):
+    def __init__(self, binding_manager, crossline=None, db=None, clock=None):
         self.logger = get_logger(self.__class__.__name__)
         self.binding = binding_manager
-        self.db = firestore.Client()
+        self.clock = clock or SYSTEM_CLOCK
+        # A fixed `crossline` disables Firestore lookups
+        if db is None and crossline is None:
+            db = firestore.Client() if firestore else None
+        self.db = db
         
         # Crossline configuration
-        self.crossline = None
-        self.last_crossline_check = 0
+        self.crossline = crossline
+        self.last_crossline_check = None  # monotonic time of the last load; None: never loaded
         self.crossline_check_interval = 10  # Check for updates every 10 seconds
         
         # Object tracking
@@ -24,7 +33,7 @@ class CrosslineCounter:
         self.crossline_count = 0
         
         # Load initial crossline
-        self._load_crossline()
+        self._check_for_crossline_updates()
         
     def _load_crossline(self):
         """Load crossline configuration from Firestore"""
@@ -45,8 +54,11 @@ class CrosslineCounter:
     
     def _check_for_crossline_updates(self):
         """Periodically check if crossline has been updated"""
-        now = time.time()
-        if now - self.last_crossline_check > self.crossline_check_interval:
+        if self.db is None:
+            return
+        now = self.clock.monotonic()
+        # Monotonic time can be below the interval shortly after boot, so "never loaded" is explicit
+        if self.last_crossline_check is None or now - self.last_crossline_check > self.crossline_check_interval:
             self._load_crossline()
             self.last_crossline_check = now
     
@@ -155,7 +167,7 @@ class CrosslineCounter:
                     # Only count positive direction (as per requirements)
                     if direction == 1:
                         self.crossline_count += 1
-                        self.logger.info(f"Object {obj_id} crossed line! Total count: {self.crossline_count}")
+                        self.logger.debug("Object %s crossed line! Total count: %d", obj_id, self.crossline_count)
             
             # Update tracked position
             self.tracked_objects[obj_id] = {
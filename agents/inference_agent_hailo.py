@@ -5,6 +5,7 @@ import numpy as np
 import cv2
 import traceback
 from utils.logger import get_logger
+from utils.stage_metrics import StageMetrics
 
 # Import Hailo Platform API
 try:
@@ -24,9 +25,12 @@ except ImportError:
     VDevice = None
 
 class InferenceAgent:
-    def __init__(self, config_path="config/detection_config.json"):
+    def __init__(self, config_path="config/detection_config.json", metrics=None, backend=None):
         self.logger = get_logger(self.__class__.__name__)
         self.config = self._load_config(config_path)
+        self.metrics = metrics or StageMetrics(enabled=False)
+        # Object with infer(input) -> raw NMS output, used instead of the Hailo device (simulations)
+        self.backend = backend
         self.target = None
         self.network_group = None
         self.network_group_params = None
@@ -42,7 +46,7 @@ class InferenceAgent:
         self.activation_context = None
         
         # Check for Hailo SDK availability
-        if HEF is None:
+        if HEF is None and backend is None:
             self.logger.error("Hailo SDK not installed or 'hailo_platform' not found.")
             # We don't raise immediately to allow purely structural tests, 
             # but in production this should fail.
@@ -162,7 +166,7 @@ class InferenceAgent:
         }
 
         try:
-            self.logger.info(f"V11_NUCLEAR_PARSER: Input type {type(raw_detections)}")
+            self.logger.debug("V11_NUCLEAR_PARSER: Input type %s", type(raw_detections))
             
             # 1. Handle Dict wrapper
             if isinstance(raw_detections, dict):
@@ -233,6 +237,12 @@ class InferenceAgent:
         Activates the Hailo network and initializes the inference pipeline.
         Must be called before run_inference.
         """
+        if self.backend is not None:
+            self.infer_pipeline = self.backend
+            self.is_running = True
+            self.logger.info("InferenceAgent started with a substitute backend.")
+            return
+
         if self.network_group is None or HEF is None:
             self.logger.error("Cannot start: Hailo device not initialized.")
             return
@@ -268,7 +278,9 @@ class InferenceAgent:
         self.logger.info("Stopping InferenceAgent...")
         self.is_running = False
         
-        if self.infer_pipeline:
+        if self.infer_pipeline is self.backend:
+            self.infer_pipeline = None
+        elif self.infer_pipeline:
             try:
                 self.infer_pipeline.__exit__(None, None, None)
             except Exception as e:
@@ -294,13 +306,16 @@ class InferenceAgent:
 
         try:
             input_shape = self.config.get("input_size", [640, 640])
-            processed_input, orig_w, orig_h = self._preprocess(frame, tuple(input_shape))
+            with self.metrics.time("preprocess"):
+                processed_input, orig_w, orig_h = self._preprocess(frame, tuple(input_shape))
             
             # Use the pre-activated pipeline for inference
-            infer_results = self.infer_pipeline.infer(processed_input)
+            with self.metrics.time("infer"):
+                infer_results = self.infer_pipeline.infer(processed_input)
             
-            detections = self._postprocess(infer_results, (orig_w, orig_h), input_shape)
-            self.logger.debug(f"Inference complete: {len(detections)} objects found")
+            with self.metrics.time("postprocess"):
+                detections = self._postprocess(infer_results, (orig_w, orig_h), input_shape)
+            self.logger.debug("Inference complete: %d objects found", len(detections))
             return detections
 
         except Exception as e:
@@ -9,46 +9,200 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.logger import get_logger
 from utils.hardware_monitor import HardwareMonitor
+from utils.telemetry_sampler import TelemetrySampler
+from utils.pipeline_governor import PipelineGovernor
 from agents.camera_agent import CameraAgent
 from agents.inference_agent_hailo import InferenceAgent
 from agents.counting_agent import CountingAgent
 from agents.transport_agent import TransportAgent
+from agents.trajectory_analyzer import TrajectoryAnalyzer
+from utils.report_scheduler import ReportScheduler
+from utils.frame_broadcaster import FrameBroadcaster
+from utils.detection_feed import DetectionFeed
+from utils.pipeline_state import PipelineState
+from utils.stage_metrics import StageMetrics
+from utils.trace_recorder import TraceRecorder
+from utils.profiler import PipelineProfiler
+from utils.clock import SYSTEM_CLOCK
 
 class Orchestrator:
-    def __init__(self, report_interval=5.0):
+    # Lifecycle states
+    STOPPED = "stopped"
+    STARTING = "starting"
+    RUNNING = "running"
+    DEGRADED = "degraded"
+    STOPPING = "stopping"
+
+    def __init__(self, report_interval=5.0, clock=None, camera=None, inference=None, transport=None):
+        """
+        `clock` drives all scheduling (see utils.clock); `camera`, `inference`
+        and `transport` replace the default agents, e.g. with synthetic sources
+        and a mock inference backend for simulations.
+        """
         self.logger = get_logger(self.__class__.__name__)
         self.report_interval = report_interval
+        self.clock = clock or SYSTEM_CLOCK
         self.running = False
-        self.thread = None
         self.start_time = None
-        self.last_report_time_str = "N/A"
-        self.latest_counts = {}
-        self.fps = 0.0
-        self.last_annotated_frame = None
+        self.lifecycle = self.STOPPED
+        self.lifecycle_cond = threading.Condition()
+        self.lifecycle_worker = None
+        self.inference_thread = None
+        self.display_thread = None
+        self.latest_detections = []
+        self.detections_lock = threading.Lock()
+        # Wakes paced loops immediately on stop
+        self.stop_event = threading.Event()
+        self._last_watchdog_check = 0
+        # Degradation applied by the thermal governor (see _apply_governor)
+        self.preview_paused = False
+        self.annotation_enabled = True
+        self.inference_rate_factor = 1.0
+        # Readers only ever load self.state; writers swap in a new snapshot under _state_lock
+        self.state = PipelineState()
+        self._state_lock = threading.Lock()
+        # Per-stage latency histograms, shared with the agents that own a stage
+        self.metrics = StageMetrics()
+        # Sampled per-frame spans (trace ID = camera frame sequence number)
+        self.tracer = TraceRecorder()
+        # On-demand profiling; idle cost is one checkpoint() per loop iteration
+        self.profiler = PipelineProfiler()
 
         self.logger.info("Initializing Orchestrator and agents...")
         try:
-            self.camera = CameraAgent()
-            self.inference = InferenceAgent()
+            self.camera = camera or CameraAgent(tracer=self.tracer, clock=self.clock)
+            self.inference = inference or InferenceAgent(metrics=self.metrics)
             self.counter = CountingAgent()
-            self.transport = TransportAgent()
+            self.transport = transport or TransportAgent(metrics=self.metrics, clock=self.clock)
             self.hw_monitor = HardwareMonitor()
+            self.trajectory = TrajectoryAnalyzer()
+            preview_cfg = self.camera.config.get("preview", {})
+            self.broadcaster = FrameBroadcaster(
+                ladder=preview_cfg.get("renditions"),
+                default_rendition=preview_cfg.get("default_rendition", "auto")
+            )
+            # "client": stream raw frames and let the dashboard draw boxes from the detection feed
+            self.server_overlay = preview_cfg.get("overlay", "client") == "server"
+            self.detection_feed = DetectionFeed(overlay="server" if self.server_overlay else "client")
+            schedule_cfg = self.transport.config.get("report_schedule", {})
+            self.scheduler = ReportScheduler(
+                report_interval,
+                serial=self.transport.binding.serial_number,
+                phase_spread=schedule_cfg.get("phase_spread", 0.8),
+                late_tolerance=schedule_cfg.get("late_tolerance", 2.0),
+                align=schedule_cfg.get("align", True),
+                clock=self.clock.time
+            )
+            self._register_metrics(self.transport.config.get("metrics", {}))
+            self.tracer.configure(self.transport.config.get("tracing", {}))
+            telemetry_cfg = self.transport.config.get("telemetry", {})
+            # Hardware is sampled off the hot path; reports read the cached series
+            self.telemetry = TelemetrySampler(
+                self.hw_monitor,
+                interval=telemetry_cfg.get("interval", 5.0),
+                history=telemetry_cfg.get("history", 720),
+                hailo_every=telemetry_cfg.get("hailo_every", 1),
+                clock=self.clock.time
+            )
+            self.governor = PipelineGovernor(self.transport.config.get("governor", {}), clock=self.clock.time)
+            self.telemetry.add_listener(self._on_telemetry)
         except Exception as e:
             self.logger.error(f"Failed to initialize agents: {e}")
             raise
 
-    def start_detection(self):
+    def _register_metrics(self, config):
+        """Applies the metrics config and registers queue-depth gauges (sampled only on scrape)."""
+        self.metrics.enabled = config.get("enabled", True)
+        self.metrics.set_labels(serial=self.transport.binding.serial_number or "unbound",
+                                firmware=config.get("firmware_version", "unknown"))
+        self.metrics.register_gauge("fps", lambda: self.state.fps, "Display loop frames per second.")
+        self.metrics.register_gauge(
+            "queue_depth",
+            lambda: {
+                "outbox": self.transport.outbox.count() if self.transport.outbox else 0,
+                "stream_subscribers": self.broadcaster.stats()["subscribers"],
+                "detection_subscribers": self.detection_feed.subscribers
+            },
+            "Pending items or waiting consumers per queue."
+        )
+
+    def _on_telemetry(self, sample):
+        """Feeds each telemetry sample to the governor (sampler thread)."""
+        flags = self.hw_monitor.throttle_flags(sample.get("throttled"))
+        if self.governor.evaluate(sample, flags):
+            self._apply_governor()
+
+    def _apply_governor(self):
+        """Applies the governor's active steps; the loops read these flags every iteration."""
+        steps = self.governor.active_steps()
+        self.preview_paused = "preview" in steps
+        self.annotation_enabled = "annotation" not in steps
+        self.inference_rate_factor = self.governor.inference_rate_factor if "inference_rate" in steps else 1.0
+        self.camera.request_resolution(self.governor.reduced_resolution if "resolution" in steps else None)
+
+    @property
+    def fps(self):
+        return self.state.fps
+
+    def _publish_state(self, **changes):
+        """Publishes a new immutable state snapshot (atomic reference swap)."""
+        with self._state_lock:
+            self.state = self.state.evolve(**changes)
+
+    def _set_lifecycle(self, new_state, **extra):
+        """Transitions the lifecycle state machine and publishes it with the pipeline state."""
+        with self.lifecycle_cond:
+            old_state = self.lifecycle
+            self.lifecycle = new_state
+            # `since` marks when the state was entered, not the last time it was re-asserted
+            since = self.clock.time() if new_state != old_state else self.state.lifecycle.get("since")
+            lifecycle = dict(self.state.lifecycle, state=new_state, since=since, **extra)
+            self._publish_state(lifecycle=lifecycle,
+                                active=new_state in (self.RUNNING, self.DEGRADED))
+            self.lifecycle_cond.notify_all()
+        if old_state != new_state:
+            self.logger.info(f"Pipeline {old_state} -> {new_state}")
+
+    def wait_for(self, states, timeout=None):
+        """Blocks until the lifecycle reaches one of `states`. Returns the state reached, or None on timeout."""
+        if isinstance(states, str):
+            states = (states,)
+        with self.lifecycle_cond:
+            if self.lifecycle_cond.wait_for(lambda: self.lifecycle in states, timeout):
+                return self.lifecycle
+        return None
+
+    def start(self, wait=False, timeout=None):
         """
-        Starts the dual-threaded detection pipeline.
+        Starts the pipeline on orchestrator-owned threads and returns immediately.
+        Returns False if the pipeline is not stopped. With wait=True, blocks until
+        it is running (or failed back to stopped).
         """
-        if self.running:
-            self.logger.warning("Detection pipeline already running.")
-            return
+        with self.lifecycle_cond:
+            if self.lifecycle != self.STOPPED:
+                self.logger.warning(f"Cannot start pipeline while {self.lifecycle}.")
+                return False
+            self._set_lifecycle(self.STARTING, last_error=None)
+            requested_at = time.monotonic()
+            self.lifecycle_worker = threading.Thread(target=self._start_pipeline, args=(requested_at,),
+                                                     name="PipelineStart", daemon=True)
+            self.lifecycle_worker.start()
+        if wait:
+            self.wait_for((self.RUNNING, self.DEGRADED, self.STOPPED), timeout)
+        return True
 
+    def _start_pipeline(self, requested_at):
         self.logger.info("Starting optimized 20 FPS detection pipeline...")
         try:
             self.camera.start()
+            if self.governor.level:
+                # Still hot from the previous run
+                self._apply_governor()
             self.inference.start()
+            self.transport.start()
+            self.telemetry.start()
+            # Picks up report_interval overrides from the API
+            self.scheduler.reset(self.report_interval)
             
             # self.transport.send_activation({
             #     "status": "active",
@@ -56,159 +210,290 @@ class Orchestrator:
             # })
             
             self.running = True
-            self.start_time = time.time()
-            self.latest_detections = []
-            self.detections_lock = threading.Lock()
+            self.stop_event.clear()
+            self.start_time = self.clock.time()
+            self._last_watchdog_check = self.start_time
+            with self.detections_lock:
+                self.latest_detections = []
+            self._publish_state(started_at=self.start_time, health={"inference_thread": True})
             
-            # 1. Start Inference Thread (Background)
-            self.inference_thread = threading.Thread(target=self._inference_loop, daemon=True)
+            # 1. Inference thread
+            self.inference_thread = threading.Thread(target=self._inference_loop, name="Inference", daemon=True)
             self.inference_thread.start()
             
-            # 2. Start Display Loop (Main/Current Thread)
-            # This allows cv2.imshow to run on the main thread if needed
-            self._display_loop()
-            
+            # 2. Display / preview thread (owns all cv2 GUI calls)
+            self.display_thread = threading.Thread(target=self._display_loop, name="Display", daemon=True)
+            self.display_thread.start()
+
+            with self.lifecycle_cond:
+                # stop() may have been called while starting
+                if self.lifecycle == self.STARTING:
+                    self._set_lifecycle(self.RUNNING,
+                                        start_latency_ms=round((time.monotonic() - requested_at) * 1000, 1))
         except Exception as e:
             self.logger.error(f"Failed to start optimized pipeline: {e}")
-            self.stop_detection()
+            self._shutdown_pipeline()
+            with self.lifecycle_cond:
+                if self.lifecycle == self.STARTING:
+                    self._set_lifecycle(self.STOPPED, last_error=str(e))
+
+    def stop(self, wait=False, timeout=None):
+        """
+        Stops the pipeline in the background and returns immediately.
+        Returns False if there is nothing to stop. With wait=True, blocks until stopped.
+        """
+        with self.lifecycle_cond:
+            if self.lifecycle in (self.STOPPED, self.STOPPING):
+                self.logger.warning(f"Cannot stop pipeline while {self.lifecycle}.")
+                return False
+            requested_at = time.monotonic()
+            # A start still in progress is joined by the stop worker before tearing down
+            start_worker = self.lifecycle_worker if self.lifecycle == self.STARTING else None
+            self._set_lifecycle(self.STOPPING)
+            self.lifecycle_worker = threading.Thread(target=self._stop_pipeline, args=(requested_at, start_worker),
+                                                     name="PipelineStop", daemon=True)
+            self.lifecycle_worker.start()
+        if wait:
+            self.wait_for(self.STOPPED, timeout)
+        return True
+
+    def _stop_pipeline(self, requested_at, start_worker=None):
+        if start_worker:
+            start_worker.join()
+        self._shutdown_pipeline()
+        self._set_lifecycle(self.STOPPED, stop_latency_ms=round((time.monotonic() - requested_at) * 1000, 1))
+
+    def _shutdown_pipeline(self):
+        """Stops the pipeline threads and releases resources."""
+        self.logger.info("Stopping detection pipeline...")
+        try:
+            self.running = False
+            self.stop_event.set()
+            self._publish_state(started_at=None)
+            current = threading.current_thread()
+            for thread in (self.inference_thread, self.display_thread):
+                if thread and thread is not current:
+                    thread.join(timeout=1.0)
+            
+            self.telemetry.stop()
+            self.camera.stop()
+            self.inference.stop()
+            self.transport.send_status("inactive")
+            self.transport.stop()
+            self.logger.info("Detection pipeline Stopped.")
+        except Exception as e:
+            self.logger.error(f"Error during shutdown: {e}")
+
+    def start_detection(self):
+        """Starts the pipeline and waits until it is running (see start())."""
+        self.start(wait=True)
+
+    def stop_detection(self):
+        """Stops the pipeline and waits until it is stopped (see stop())."""
+        self.stop(wait=True, timeout=10.0)
+
+    def _pace(self, deadline):
+        """Waits until the monotonic `deadline`; returns False if the pipeline is stopping."""
+        delay = deadline - self.clock.monotonic()
+        if delay > 0:
+            self.clock.wait(self.stop_event, delay)
+        return self.running
 
     def _inference_loop(self):
-        """Background thread for high-speed Hailo inference with FPS throttling."""
+        """Background thread for Hailo inference, woken by new camera frames and paced to target_fps."""
         self.logger.info("Inference thread started.")
         target_fps = self.inference.config.get("target_fps", 10)
         cycle_time = 1.0 / target_fps if target_fps > 0 else 0
+        last_seq = 0
+        next_deadline = self.clock.monotonic()
         
         while self.running:
-            loop_start = time.time()
             try:
-                frame = self.camera.get_frame()
+                self.profiler.checkpoint()
+                # Deadline pacing: one wakeup per cycle, processing time doesn't add drift
+                if not self._pace(next_deadline):
+                    break
+                # Blocks until a frame newer than the last one processed (no polling)
+                previous_seq = last_seq
+                frame, last_seq, captured_at = self.camera.wait_frame(last_seq, timeout=1.0)
                 if frame is None:
-                    time.sleep(0.005)
                     continue
+                # The governor may lower the inference rate while the unit is hot
+                next_deadline = max(next_deadline + cycle_time / self.inference_rate_factor, self.clock.monotonic())
+                self.metrics.observe("capture_age", self.clock.time() - captured_at)
+                self._count_frame_gap("inference", previous_seq, last_seq)
 
                 # Run Inference
-                detections = self.inference.run_inference(frame)
+                with self.tracer.span("inference", last_seq):
+                    detections = self.inference.run_inference(frame)
                 
                 with self.detections_lock:
                     self.latest_detections = detections
                 
                 # Update counts for dashboard
-                counts = self.counter.count_objects(detections)
-                for cls in ["Pedestrians", "Cars", "Buses", "Trucks", "Motorcycles"]:
-                    self.latest_counts[cls] = counts.get(cls, 0)
-                self.latest_counts["total"] = counts.get("total", 0)
+                with self.metrics.time("counting"), self.tracer.span("counting", last_seq):
+                    counts = self.counter.count_objects(detections)
+                current_time = self.clock.time()
+                dashboard_counts = {cls: counts.get(cls, 0) for cls in ["Pedestrians", "Cars", "Buses", "Trucks", "Motorcycles"]}
+                dashboard_counts["total"] = counts.get("total", 0)
+                with self.tracer.span("publish", last_seq, objects=len(detections)):
+                    self._publish_state(counts=dashboard_counts,
+                                        detections={"objects": len(detections), "inference_at": current_time,
+                                                    "latency_ms": round((current_time - captured_at) * 1000, 1)})
+                    self.detection_feed.publish(detections, frame.shape, self.fps, dashboard_counts)
                 
-                # Report at interval
-                current_time = time.time()
-                if not hasattr(self, 'last_report_time'): self.last_report_time = 0
-                if current_time - self.last_report_time >= self.report_interval:
-                    # Collect hardware metrics
-                    hw_metrics = self.hw_monitor.get_all_metrics()
-                    counts['fps'] = round(self.fps, 1)
-                    counts['hardware'] = hw_metrics
-                    threading.Thread(target=self.transport.send_counts, args=(counts,), daemon=True).start()
-                    self.last_report_time_str = time.strftime("%Y-%m-%d %H:%M:%S")
-                    self.last_report_time = current_time
+                # Ground-plane speed / dwell analytics (requires tracked detections)
+                with self.metrics.time("tracking"), self.tracer.span("tracking", last_seq):
+                    self.trajectory.process(detections, current_time, (frame.shape[1], frame.shape[0]))
 
-                # Throttle
-                elapsed = time.time() - loop_start
-                if elapsed < cycle_time:
-                    time.sleep(cycle_time - elapsed)
+                # Report at wall-clock aligned interval boundaries (+ per-device phase)
+                schedule = self.scheduler.poll(current_time)
+                if schedule:
+                    report_started = time.perf_counter()
+                    counts['fps'] = round(self.fps, 1)
+                    # Cached min/max/avg since the last report; never blocks on hardware
+                    counts['hardware'] = self.telemetry.report_summary()
+                    counts.update(schedule)
+                    trajectory_summary = self.trajectory.flush_interval()
+                    if trajectory_summary:
+                        counts['trajectory'] = trajectory_summary
+                    # Persisted to the outbox; the transport's sender worker delivers it
+                    self.transport.enqueue_counts(counts)
+                    self._publish_state(last_report=time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(current_time)))
+                    # Reports are rare and always traced (not tied to a sampled frame)
+                    self.tracer.record("report", None, report_started, time.perf_counter())
 
             except Exception as e:
                 self.logger.error(f"Inference Thread Error: {e}")
-                time.sleep(0.1)
+                self.clock.wait(self.stop_event, 0.1)
+        self.profiler.release()
 
     def _display_loop(self):
-        """Main loop for visualization with FPS throttling."""
+        """Visualization / preview loop, woken by new camera frames and paced to target_fps."""
         self.logger.info("Display loop started.")
         target_fps = self.inference.config.get("target_fps", 10)
         cycle_time = 1.0 / target_fps if target_fps > 0 else 0
         
         frame_count = 0
-        fps_start_time = time.time()
+        fps_start_time = self.clock.time()
+        last_frame = None
+        last_detections = None
+        last_seq = 0
+        next_deadline = self.clock.monotonic()
+        window_open = False
 
         while self.running:
-            now = time.time() # Define 'now' here for the whole cycle
-            loop_start = now
             try:
-                frame = self.camera.get_frame()
+                self.profiler.checkpoint()
+                if not self._pace(next_deadline):
+                    break
+                previous_seq = last_seq
+                frame, last_seq, _ = self.camera.wait_frame(last_seq, timeout=1.0)
+                now = self.clock.time()
+                self._watchdog(now)
                 if frame is None:
-                    time.sleep(0.01)
                     continue
+                self._count_frame_gap("display", previous_seq, last_seq)
+                next_deadline = max(next_deadline + cycle_time, self.clock.monotonic())
 
                 with self.detections_lock:
-                    current_detections = self.latest_detections.copy()
+                    current_detections = self.latest_detections
 
-                # Annotate
-                annotated_img = self._annotate_frame(frame, current_detections)
-            
-                # Encode for web feed
-                ret, buffer = cv2.imencode('.jpg', annotated_img)
-                if ret:
-                    self.last_annotated_frame = buffer.tobytes()
-
-                # Local GUI
-                if self.inference.config.get("visualize_local", True) and os.environ.get("DISPLAY"):
-                    cv2.imshow("Hailo AI Object Detection (Throttled)", annotated_img)
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
-                        self.stop_detection()
-                        break
-
-                # Watchdog: Is the inference thread alive?
-                if not hasattr(self, '_last_watchdog_check'): self._last_watchdog_check = 0
-                if now - self._last_watchdog_check >= 5.0:
-                    if not self.inference_thread.is_alive():
-                        self.logger.error("WATCHDOG: Inference thread died! Attempting restart...")
-                        self.inference_thread = threading.Thread(target=self._inference_loop, daemon=True)
-                        self.inference_thread.start()
-                    self._last_watchdog_check = now
+                # Only annotate/encode when someone is watching and something changed
+                local_display = self.inference.config.get("visualize_local", True) and os.environ.get("DISPLAY")
+                streaming = self.broadcaster.wants_frames() and not self.preview_paused
+                annotate = self.annotation_enabled and (local_display or (streaming and self.server_overlay))
+                changed = frame is not last_frame or (annotate and current_detections is not last_detections)
+                if changed and (local_display or streaming):
+                    last_frame, last_detections = frame, current_detections
+                    annotated_img = frame
+                    if annotate:
+                        with self.metrics.time("annotate"), self.tracer.span("annotate", last_seq):
+                            annotated_img = self._annotate_frame(frame, current_detections)
+
+                    # Encoded once for all web clients
+                    if streaming:
+                        with self.metrics.time("encode"), self.tracer.span("encode", last_seq):
+                            self.broadcaster.publish(annotated_img if self.server_overlay else frame)
+
+                    # Local GUI
+                    if local_display:
+                        cv2.imshow("Hailo AI Object Detection (Throttled)", annotated_img)
+                        window_open = True
+                        if cv2.waitKey(1) & 0xFF == ord('q'):
+                            self.stop()
+                            break
 
                 # FPS Calculation
                 frame_count += 1
                 elapsed_total = now - fps_start_time
                 if elapsed_total >= 1.0:
-                    self.fps = frame_count / elapsed_total
-                    self.latest_counts["fps"] = round(self.fps, 2)
-                    self.latest_counts["last_update"] = time.strftime("%H:%M:%S")
+                    self._publish_state(fps=round(frame_count / elapsed_total, 2),
+                                        last_update=time.strftime("%H:%M:%S", time.localtime(now)))
                     frame_count = 0
                     fps_start_time = now
 
-                # Throttle
-                elapsed_loop = time.time() - loop_start
-                if elapsed_loop < cycle_time:
-                    time.sleep(cycle_time - elapsed_loop)
-
             except Exception as e:
                 self.logger.error(f"Display Loop Error: {e}")
-                time.sleep(0.1)
+                self.clock.wait(self.stop_event, 0.1)
 
-    def stop_detection(self):
-        """
-        Stops the detection pipeline and releases resources.
-        """
-        self.logger.info("Stopping detection pipeline...")
-        try:
-            self.running = False
-            if hasattr(self, 'inference_thread'):
-                self.inference_thread.join(timeout=1.0)
-            
-            self.camera.stop()
-            self.inference.stop()
+        self.profiler.release()
+        # GUI calls must stay on the thread that created the window
+        if window_open:
             cv2.destroyAllWindows()
-            self.transport.send_status("inactive")
-            self.logger.info("Detection pipeline Stopped.")
-        except Exception as e:
-            self.logger.error(f"Error during shutdown: {e}")
+
+    def _count_frame_gap(self, stage, previous_seq, seq):
+        """Counts camera frames a stage never saw (dropped) or saw again (duplicate)."""
+        if not previous_seq:
+            return
+        if seq == previous_seq:
+            self.metrics.inc("frames_duplicate_total", stage=stage)
+        elif seq > previous_seq + 1:
+            self.metrics.inc("frames_dropped_total", seq - previous_seq - 1, stage=stage)
+
+    def _watchdog(self, now):
+        """Restarts a dead inference thread and flags a stalled camera (every 5 s)."""
+        if now - self._last_watchdog_check < 5.0:
+            return
+        self._last_watchdog_check = now
+        stalled = now - self.camera.last_frame_time() > 5.0
+        # Under the lifecycle lock: stop() cannot slip in between the check and a restart
+        with self.lifecycle_cond:
+            if not self.running or self.lifecycle not in (self.RUNNING, self.DEGRADED):
+                return
+            self._check_pipeline(stalled)
+
+    def _check_pipeline(self, stalled):
+        """Watchdog decisions for a running pipeline. Caller holds lifecycle_cond."""
+        if not self.inference_thread.is_alive():
+            self.logger.error("WATCHDOG: Inference thread died! Attempting restart...")
+            restarts = self.state.health.get("watchdog_restarts", 0) + 1
+            self._publish_state(health=dict(self.state.health, inference_thread=False, watchdog_restarts=restarts))
+            self._set_lifecycle(self.DEGRADED, reason="inference thread restarted")
+            self.inference_thread = threading.Thread(target=self._inference_loop, name="Inference", daemon=True)
+            self.inference_thread.start()
+        elif stalled:
+            if self.lifecycle != self.DEGRADED:
+                self.logger.warning("WATCHDOG: No camera frames for 5s.")
+            self._publish_state(health=dict(self.state.health, camera_stalled=True))
+            self._set_lifecycle(self.DEGRADED, reason="camera stalled")
+        elif self.lifecycle == self.DEGRADED:
+            self._publish_state(health=dict(self.state.health, inference_thread=True, camera_stalled=False))
+            self._set_lifecycle(self.RUNNING, reason=None)
+
+    def capture_snapshot(self, quality=85):
+        """Returns the latest camera frame, annotated with the latest detections, as JPEG bytes."""
+        frame = self.camera.get_frame()
+        if frame is None:
+            return None
+        detections = getattr(self, 'latest_detections', [])
+        annotated = self._annotate_frame(frame, detections)
+        ret, buffer = cv2.imencode('.jpg', annotated, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+        return buffer.tobytes() if ret else None
 
     def _annotate_frame(self, frame, detections):
         """Draws bounding boxes and labels on the frame with optimization."""
         try:
-            # We skip heavy JPEG encoding if not needed by the web dashboard,
-            # or we rate-limit it.
-            if not hasattr(self, '_last_encode_time'): self._last_encode_time = 0
-            current_time = time.time()
-            
             # Draw on a copy for the RPi screen
             annotated = frame.copy()
             
@@ -223,13 +508,6 @@ class Orchestrator:
             cv2.putText(annotated, f"FPS: {self.fps:.2f}", (10, 20), 
                         cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
 
-            # Lazy JPEG encoding for web dashboard (~5 FPS enough for web)
-            if current_time - self._last_encode_time >= 0.2:
-                ret, jpeg = cv2.imencode('.jpg', annotated, [int(cv2.IMWRITE_JPEG_QUALITY), 70])
-                if ret:
-                    self.last_annotated_frame = jpeg.tobytes()
-                    self._last_encode_time = current_time
-            
             return annotated
         except Exception as e:
             self.logger.error(f"Failed to annotate frame: {e}")
@@ -241,8 +519,9 @@ if __name__ == "__main__":
         # Report interval 5 seconds is good for production
         orchestrator = Orchestrator(report_interval=5.0)
         
-        # Start detection loop (blocking call for display loop)
-        orchestrator.start_detection()
+        # Pipeline runs on orchestrator-owned threads; block here until it stops
+        orchestrator.start()
+        orchestrator.wait_for(Orchestrator.STOPPED)
         
     except KeyboardInterrupt:
         print("\nStopping Orchestrator...")
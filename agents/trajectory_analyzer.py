@@ -0,0 +1,245 @@
+"""
+Trajectory Analyzer
+Projects tracked objects onto the ground plane through a per-camera homography
+and summarises per-interval speed and zone dwell-time distributions.
+
+Requires tracked detections: every detection needs a stable 'object_id'. The
+Hailo inference path does not assign IDs, so until an object tracker runs
+upstream the analyzer receives no tracks and reports empty histograms.
+
+The homography is calibrated at `calibration_resolution` (default 1920x1080,
+null disables scaling); points are scaled to it first, so a capture
+resolution change (e.g. by the thermal governor) does not distort ground
+positions.
+
+Only histogram bins leave the device; raw trajectories stay local.
+"""
+
+import json
+import time
+import numpy as np
+from utils.logger import get_logger
+
+
+DEFAULT_SPEED_BINS_KMH = [0, 5, 10, 20, 30, 40, 50, 60, 80, 100]
+DEFAULT_DWELL_BINS_S = [0, 5, 10, 30, 60, 120, 300, 600]
+DEFAULT_CALIBRATION_RESOLUTION = [1920, 1080]
+
+
+class KalmanTrack:
+    """Constant-velocity Kalman filter over a ground-plane position (metres)."""
+
+    def __init__(self, position, timestamp, accel_noise=2.0, measurement_noise=0.5):
+        self.state = np.array([position[0], position[1], 0.0, 0.0])
+        self.cov = np.diag([measurement_noise ** 2, measurement_noise ** 2, 25.0, 25.0])
+        self.accel_var = accel_noise ** 2
+        self.R = np.eye(2) * measurement_noise ** 2
+        self.last_seen = timestamp
+        self.updates = 1
+
+    def update(self, position, timestamp):
+        """Predicts forward to `timestamp` and fuses the new measurement."""
+        dt = timestamp - self.last_seen
+        if dt <= 0:
+            return
+        F = np.array([[1, 0, dt, 0],
+                      [0, 1, 0, dt],
+                      [0, 0, 1, 0],
+                      [0, 0, 0, 1]], dtype=float)
+        # White-noise acceleration model
+        dt2, dt3, dt4 = dt * dt, dt ** 3 / 2, dt ** 4 / 4
+        Q = self.accel_var * np.array([[dt4, 0, dt3, 0],
+                                       [0, dt4, 0, dt3],
+                                       [dt3, 0, dt2, 0],
+                                       [0, dt3, 0, dt2]])
+        self.state = F @ self.state
+        self.cov = F @ self.cov @ F.T + Q
+
+        H = np.array([[1, 0, 0, 0], [0, 1, 0, 0]], dtype=float)
+        innovation = np.asarray(position, dtype=float) - H @ self.state
+        S = H @ self.cov @ H.T + self.R
+        K = self.cov @ H.T @ np.linalg.inv(S)
+        self.state = self.state + K @ innovation
+        self.cov = (np.eye(4) - K @ H) @ self.cov
+        self.last_seen = timestamp
+        self.updates += 1
+
+    @property
+    def position(self):
+        return self.state[0], self.state[1]
+
+    @property
+    def speed(self):
+        """Smoothed ground speed in metres per second."""
+        return float(np.hypot(self.state[2], self.state[3]))
+
+
+class TrajectoryAnalyzer:
+    def __init__(self, config_path="config/trajectory_config.json"):
+        self.logger = get_logger(self.__class__.__name__)
+        self.config = self._load_config(config_path)
+
+        homography = self.config.get("homography")
+        self.enabled = bool(self.config.get("enabled", False)) and homography is not None
+        self.homography = np.array(homography, dtype=float).reshape(3, 3) if homography else np.eye(3)
+        # Pixel size the homography was calibrated at; null in the config: points are used as-is
+        calibration = self.config.get("calibration_resolution", DEFAULT_CALIBRATION_RESOLUTION)
+        self.calibration_resolution = tuple(calibration) if calibration else None
+        self._warned_untracked = False
+
+        self.anchor = self.config.get("anchor", "bottom_center")
+        self.zones = [
+            {"name": z["name"], "polygon": np.array(z["polygon"], dtype=float)}
+            for z in self.config.get("zones", [])
+        ]
+        self.speed_bins = self.config.get("speed_bins_kmh", DEFAULT_SPEED_BINS_KMH)
+        self.dwell_bins = self.config.get("dwell_bins_s", DEFAULT_DWELL_BINS_S)
+        self.max_track_age = self.config.get("max_track_age", 2.0)
+        self.min_track_updates = self.config.get("min_track_updates", 3)
+        self.accel_noise = self.config.get("accel_noise", 2.0)
+        self.measurement_noise = self.config.get("measurement_noise", 0.5)
+
+        self.tracks = {}        # {object_id: KalmanTrack}
+        self.zone_entries = {}  # {(object_id, zone_name): entry_timestamp}
+        self._reset_interval()
+
+        if self.enabled:
+            self.logger.info(f"Trajectory analytics enabled with {len(self.zones)} zone(s)")
+
+    def _load_config(self, path):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _reset_interval(self):
+        self.interval_speeds = {}  # {object_id: [speed_mps, ...]}
+        self.interval_dwells = {z["name"]: [] for z in self.zones}
+
+    def image_to_ground(self, x, y, frame_size=None):
+        """
+        Maps an image pixel to ground-plane coordinates (metres).
+        `frame_size` (width, height) is the pixel size of the frame the point
+        comes from; it is rescaled to the calibration resolution first.
+        """
+        if frame_size and self.calibration_resolution:
+            x = x * self.calibration_resolution[0] / frame_size[0]
+            y = y * self.calibration_resolution[1] / frame_size[1]
+        gx, gy, w = self.homography @ np.array([x, y, 1.0])
+        if abs(w) < 1e-9:
+            return None
+        return gx / w, gy / w
+
+    def _anchor_point(self, bbox):
+        x1, y1, x2, y2 = bbox
+        if self.anchor == "center":
+            return (x1 + x2) / 2, (y1 + y2) / 2
+        # Bottom-centre is where the object touches the road
+        return (x1 + x2) / 2, y2
+
+    @staticmethod
+    def _point_in_polygon(point, polygon):
+        """Ray-casting point-in-polygon test."""
+        x, y = point
+        inside = False
+        n = len(polygon)
+        j = n - 1
+        for i in range(n):
+            xi, yi = polygon[i]
+            xj, yj = polygon[j]
+            if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+                inside = not inside
+            j = i
+        return inside
+
+    def process(self, detections, timestamp=None, frame_size=None):
+        """
+        Updates trajectories from one frame of tracked detections.
+
+        Args:
+            detections: List of detection dicts with 'object_id' and 'bbox' (pixels)
+            timestamp: Frame capture time in seconds (defaults to now)
+            frame_size: (width, height) of the frame the bboxes refer to
+        """
+        if not self.enabled:
+            return
+        now = timestamp if timestamp is not None else time.time()
+
+        for det in detections:
+            obj_id = det.get("object_id")
+            bbox = det.get("bbox")
+            if obj_id is None and bbox and not self._warned_untracked:
+                self._warned_untracked = True
+                self.logger.warning("Trajectory analytics enabled but detections carry no object_id; "
+                                    "an object tracker is required upstream")
+            if obj_id is None or not bbox:
+                continue
+
+            ground = self.image_to_ground(*self._anchor_point(bbox), frame_size=frame_size)
+            if ground is None:
+                continue
+
+            track = self.tracks.get(obj_id)
+            if track is None:
+                track = KalmanTrack(ground, now, self.accel_noise, self.measurement_noise)
+                self.tracks[obj_id] = track
+            else:
+                track.update(ground, now)
+                if track.updates >= self.min_track_updates:
+                    self.interval_speeds.setdefault(obj_id, []).append(track.speed)
+
+            self._update_zones(obj_id, track.position, now)
+
+        # Finalise tracks that have not been seen recently
+        for obj_id in [oid for oid, t in self.tracks.items() if now - t.last_seen > self.max_track_age]:
+            last_seen = self.tracks.pop(obj_id).last_seen
+            self._close_zones(obj_id, last_seen)
+
+    def _update_zones(self, obj_id, position, now):
+        for zone in self.zones:
+            key = (obj_id, zone["name"])
+            inside = self._point_in_polygon(position, zone["polygon"])
+            if inside and key not in self.zone_entries:
+                self.zone_entries[key] = now
+            elif not inside and key in self.zone_entries:
+                self.interval_dwells[zone["name"]].append(now - self.zone_entries.pop(key))
+
+    def _close_zones(self, obj_id, exit_time):
+        for zone in self.zones:
+            entry = self.zone_entries.pop((obj_id, zone["name"]), None)
+            if entry is not None:
+                self.interval_dwells[zone["name"]].append(exit_time - entry)
+
+    @staticmethod
+    def _histogram(values, edges):
+        """Buckets values into [edges[i], edges[i+1]); the last bucket is open-ended."""
+        counts = [0] * len(edges)
+        for v in values:
+            idx = int(np.searchsorted(edges, v, side="right")) - 1
+            if idx >= 0:
+                counts[idx] += 1
+        return {"edges": list(edges), "counts": counts, "samples": sum(counts)}
+
+    def flush_interval(self):
+        """Returns this interval's speed and dwell distributions and starts a new interval."""
+        if not self.enabled:
+            return None
+
+        # One sample per object: its mean smoothed speed over the interval
+        speeds_kmh = [float(np.mean(s)) * 3.6 for s in self.interval_speeds.values() if s]
+        summary = {
+            "speed_kmh": self._histogram(speeds_kmh, self.speed_bins),
+            "dwell_s": {
+                name: self._histogram(dwells, self.dwell_bins)
+                for name, dwells in self.interval_dwells.items()
+            }
+        }
+        self._reset_interval()
+        return summary
+
+    def reset(self):
+        """Drops all tracks and pending interval data."""
+        self.tracks = {}
+        self.zone_entries = {}
+        self._reset_interval()
@@ -1,30 +1,78 @@
+import gzip
 import json
-import time
+import random
+import threading
+import zlib
 import requests
 from requests.adapters import HTTPAdapter
 from utils.logger import get_logger
 
-# Robust Retry Import
-try:
-    from urllib3.util.retry import Retry
-except ImportError:
-    try:
-        from requests.packages.urllib3.util.retry import Retry
-    except ImportError:
-        # Emergency fallback for missing dependencies
-        class Retry:
-            def __init__(self, *args, **kwargs): pass
-
 from utils.binding_manager import BindingManager
+from utils import payload_codecs
+from utils import compact_codec
+from utils.report_outbox import ReportOutbox
+from utils.circuit_breaker import CircuitBreaker
+from utils.stage_metrics import StageMetrics
+from utils.clock import SYSTEM_CLOCK
+
+# Seconds the oldest queued report may wait before a partial batch is sent
+DEFAULT_BATCH_MAX_AGE = 60.0
+# Statuses meaning "this backend does not understand batch uploads"
+BATCH_REJECT_STATUSES = (400, 404, 405, 413, 415)
+# Statuses that count against backend health and may be retried
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+# Client errors that are not permanent: timeouts, throttling and auth/binding problems
+TRANSIENT_CLIENT_STATUSES = (401, 403, 408, 429)
+
+def is_permanent_rejection(status_code):
+    """True if resending the same report can never succeed (a 4xx other than the transient ones)."""
+    return 400 <= status_code < 500 and status_code not in TRANSIENT_CLIENT_STATUSES
 
 class TransportAgent:
-    def __init__(self, config_path="config/backend_config.json"):
+    def __init__(self, config_path="config/backend_config.json", metrics=None, clock=None):
         self.logger = get_logger(self.__class__.__name__)
         self.config = self._load_config(config_path)
+        self.metrics = metrics or StageMetrics(enabled=False)
+        self.clock = clock or SYSTEM_CLOCK
         self.binding = BindingManager()
-        self.init_time = time.time()
+        self.init_time = self.clock.time()
         self.session = self._create_session()
 
+        # One breaker shared by counts, activation and status sends
+        breaker_cfg = self.config.get("circuit_breaker", {})
+        self.breaker = CircuitBreaker(
+            failure_threshold=breaker_cfg.get("failure_threshold", 5),
+            recovery_timeout=breaker_cfg.get("recovery_timeout", 15.0),
+            max_recovery_timeout=breaker_cfg.get("max_recovery_timeout", 300.0),
+            probe_jitter=breaker_cfg.get("probe_jitter", 0.3),
+            retry_budget_ratio=breaker_cfg.get("retry_budget_ratio", 0.1),
+            budget_window=breaker_cfg.get("budget_window", 60.0),
+            clock=self.clock.time
+        )
+
+        # Store-and-forward outbox (created by start())
+        self.outbox = None
+        self.sender_thread = None
+        self.sender_running = False
+        self.flush_deadline = 0
+        self.wake_event = threading.Event()
+        # Guards the outbox hand-over between stop() and a sender that outlives its join
+        self.outbox_lock = threading.Lock()
+        self.sender_exited = True
+        self.close_on_exit = False
+
+        # Batch uploads: disabled for a while after the backend rejects one
+        self.batch_disabled_until = 0
+
+        # Codec + auth headers, rebuilt only when the binding changes
+        self.codec = None
+        self._codec_key = None
+        self._auth_header_keys = []
+
+        # Compact binary encoding, switched on once the backend advertises it
+        self.compact_accepted = False
+        self.compact_encoder = None
+
     def _load_config(self, path):
         try:
             with open(path, 'r') as f:
@@ -35,106 +83,403 @@ class TransportAgent:
     def _create_session(self):
         """Creates a session with initial or bound auth."""
         session = requests.Session()
-        retry_strategy = Retry(total=5, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
-        session.mount("https://", HTTPAdapter(max_retries=retry_strategy))
-        session.mount("http://", HTTPAdapter(max_retries=retry_strategy))
+        # No transport-level retries: _send() retries within the breaker's budget
+        session.mount("https://", HTTPAdapter(max_retries=0))
+        session.mount("http://", HTTPAdapter(max_retries=0))
         session.headers.update({"Content-Type": "application/json"})
         return session
 
     def _update_session_auth(self):
-        """Syncs session headers with binding config including custom headers."""
-        if self.binding.is_bound():
-            config = self.binding.config
-            
-            # 1. Clear previous dynamic headers
-            for h in list(self.session.headers.keys()):
-                if h not in ['Content-Type', 'User-Agent']:
-                    self.session.headers.pop(h)
-
-            # 2. Add Standard Auth based on auth_mode
-            token = config.get("auth_token", "")
-            auth_mode = config.get("auth_mode", "bearer").lower()
-            
-            if auth_mode == "apikey":
-                self.session.headers.update({"X-API-Key": token})
-            elif auth_mode == "bearer":
-                self.session.headers.update({"Authorization": f"Bearer {token}"})
-            elif auth_mode == "custom":
-                # Expecting custom_auth_header key
-                header_key = config.get("custom_auth_header", "Authorization")
-                self.session.headers.update({header_key: token})
-
-            # 3. Apply Multi-Backend Custom Headers
-            custom = config.get("custom_headers", {})
-            if isinstance(custom, dict):
-                self.session.headers.update(custom)
+        """Syncs session headers and payload codec with the binding; a no-op unless the binding changed."""
+        key = (id(self.binding), self.binding.version)
+        if key == self._codec_key:
+            return
+        self.codec = payload_codecs.create_codec(self.binding)
+
+        # Replace previously applied auth/custom headers
+        for h in self._auth_header_keys:
+            self.session.headers.pop(h, None)
+        self.session.headers.update(self.codec.headers)
+        self._auth_header_keys = list(self.codec.headers.keys())
+        self._codec_key = key
+
+        # A new binding may point at a different backend: renegotiate encoding
+        self.compact_accepted = False
+        self.compact_encoder = None
+
+    def _send(self, url, **kwargs):
+        """
+        POSTs through the shared circuit breaker, retrying transient failures
+        only while the global retry budget allows it.
+
+        Returns:
+            The last response, or None if the circuit refused the request or no
+            response was received.
+        """
+        timeout = self.config.get("timeout", 10)
+        max_attempts = self.config.get("max_attempts", 2)
+        retry_delay = self.config.get("retry_delay", 1.0)
+        response = None
+
+        for attempt in range(max_attempts):
+            if not self.breaker.allow_request(is_retry=attempt > 0):
+                if attempt == 0:
+                    self.logger.debug(f"Circuit {self.breaker.state}: keeping report buffered locally")
+                break
+            if attempt > 0:
+                self.clock.sleep(retry_delay * random.uniform(0.5, 1.5))
+            try:
+                with self.metrics.time("transport_send"):
+                    response = self.session.post(url, timeout=timeout, **kwargs)
+            except Exception as e:
+                self.metrics.inc("transport_errors_total")
+                self.breaker.record_failure()
+                self.logger.error(f"Post to {url} failed: {e}")
+                response = None
+                continue
+
+            if response.status_code in RETRYABLE_STATUSES:
+                self.breaker.record_failure()
+                continue
+            # Any other answer means the backend is up, even if it rejected this request
+            self.breaker.record_success()
+            break
+        return response
 
     def _post_raw(self, url, data):
-        """Low-level POST with dynamic auth application."""
+        """
+        Low-level POST with dynamic auth application.
+
+        Returns:
+            True on success, False on a transient failure,
+            None if the backend permanently rejected the report.
+        """
         if not self.binding.is_bound():
             self.logger.debug("Unit UNBOUND. Skipping data transmission.")
             return False
 
         self._update_session_auth()
-        timeout = self.config.get("timeout", 10)
+        if self.compact_accepted:
+            return self._post_compact(url, data)
         
+        # Universal POST - works with standard JSON ingestion
+        if self.config.get("fast_json", False) and payload_codecs.orjson is not None:
+            response = self._send(url, data=payload_codecs.dumps(data))
+        else:
+            response = self._send(url, json=data)
+        if response is None:
+            return False
         try:
-            # Universal POST - works with standard JSON ingestion
-            response = self.session.post(url, json=data, timeout=timeout)
             response.raise_for_status()
             self.logger.info(f"Successfully posted to {url}: {response.status_code}")
+            self._negotiate_encoding(response)
             return True
         except Exception as e:
             self.logger.error(f"Post to {url} failed: {e}")
+            return None if is_permanent_rejection(response.status_code) else False
+
+    def _negotiate_encoding(self, response):
+        """Switches to compact binary encoding when enabled and advertised by the backend."""
+        compact_cfg = self.config.get("compact_encoding", {})
+        if self.compact_accepted or not compact_cfg.get("enabled", False):
+            return
+        advertised = response.headers.get(compact_codec.ENCODING_HEADER) or ""
+        if compact_codec.ENCODING_NAME in [e.strip() for e in str(advertised).split(",")]:
+            self.compact_encoder = compact_codec.CompactEncoder(
+                self.binding.serial_number, use_delta=compact_cfg.get("delta", True))
+            self.compact_accepted = True
+            self.logger.info(f"Backend accepts {compact_codec.ENCODING_NAME}; switching to compact payloads")
+
+    def _post_compact(self, url, data, allow_resync=True):
+        """POSTs one report in compact binary encoding, falling back to JSON if the backend refuses it.
+        Returns the same values as _post_raw."""
+        body, seq, counts = self.compact_encoder.encode(data)
+        headers = {"Content-Type": compact_codec.CONTENT_TYPE}
+        response = self._send(url, data=body, headers=headers)
+        if response is None:
             return False
+        try:
+            if response.status_code == 409 and allow_resync:
+                # Backend lost our delta base: resend as a full report
+                self.compact_encoder.reset()
+                return self._post_compact(url, data, allow_resync=False)
+            if response.status_code in (400, 415):
+                self.logger.warning("Backend rejected compact payload; reverting to JSON")
+                self.compact_accepted = False
+                self.compact_encoder = None
+                return self._post_raw(url, data)
+            response.raise_for_status()
+            self.compact_encoder.ack(seq, counts)
+            self.logger.info(f"Successfully posted {len(body)}-byte compact report to {url}")
+            return True
+        except Exception as e:
+            self.logger.error(f"Compact post to {url} failed: {e}")
+            return None if is_permanent_rejection(response.status_code) else False
+
+    def _build_counts_payload(self, counts_data):
+        """Builds the counts payload for the bound backend with the cached codec."""
+        self._update_session_auth()
+        return self.codec.build(counts_data, self.clock.time() - self.init_time)
 
     def send_counts(self, counts_data):
-        """Sends counts to any backend endpoint. Supports Legacy (flat) and Universal (nested) formats."""
+        """Sends counts to any backend endpoint immediately (blocking)."""
         if not self.binding.is_bound(): return False
         
+        url = self.binding.config.get("endpoint")
+        return self._post_raw(url, self._build_counts_payload(counts_data))
+
+    def enqueue_counts(self, counts_data):
+        """
+        Persists a counts report in the outbox and wakes the sender worker.
+        Falls back to a direct send when the outbox has not been started.
+        """
+        if not self.binding.is_bound(): return False
+        if self.outbox is None:
+            return self.send_counts(counts_data)
+
         config = self.binding.config
-        url = config.get("endpoint")
-        format_type = config.get("payload_format", "universal").lower() # DEFAULT TO UNIVERSAL for production
-        
-        if format_type == "legacy":
-            # FLAT SCHEMA: Matches your existing Firebase/React Dashboard exactly
-            payload = {
-                "camera_id": config.get("camera_id"),
-                "site_id": config.get("site_id"),
-                "timestamp": counts_data.get("timestamp"),
-                "counts": counts_data
-            }
-        elif format_type == "aiod05":
-            # AIODCOUNTER05 SCHEMA: Matches Multitenant Site/Camera structure
-            payload = {
-                "tenant_id": config.get("tenant_id"),
-                "site_id": config.get("site_id"),
-                "camera_id": config.get("camera_id"),
-                "serial": self.binding.serial_number,
-                "timestamp": counts_data.get("timestamp"),
-                "data": {
-                    "counts": counts_data,
-                    "event_type": "periodic_report"
-                }
-            }
-        else:
-            # UNIVERSAL/NESTED SCHEMA: Professional scalable production format
-            payload = {
-                "identity": {
-                    "serial": self.binding.serial_number,
-                    "camera_id": config.get("camera_id"),
-                    "site_id": config.get("site_id")
-                },
-                "environment": {
-                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-                    "uptime": time.time() - (getattr(self, 'init_time', time.time()))
-                },
-                "data": {
-                    "type": "object_counts",
-                    "counts": counts_data
-                }
-            }
-        return self._post_raw(url, payload)
+        try:
+            self.outbox.put(config.get("camera_id", "unknown"), config.get("endpoint"),
+                            self._build_counts_payload(counts_data))
+        except Exception as e:
+            self.logger.error(f"Failed to persist report: {e}")
+            return False
+        self.wake_event.set()
+        return True
+
+    def start(self):
+        """Opens the outbox and starts the single sender worker."""
+        if self.sender_running:
+            return
+        if self.sender_thread and self.sender_thread.is_alive():
+            self.logger.warning("Previous sender still exiting; not restarting the outbox yet.")
+            return
+        outbox_cfg = self.config.get("outbox", {})
+        try:
+            self.outbox = ReportOutbox(
+                db_path=outbox_cfg.get("path", "data/outbox.db"),
+                max_bytes=outbox_cfg.get("max_bytes", 50 * 1024 * 1024),
+                max_rows=outbox_cfg.get("max_rows", 100000),
+                clock=self.clock.time,
+                max_dead_letters=outbox_cfg.get("max_dead_letters", 1000)
+            )
+        except Exception as e:
+            self.logger.error(f"Outbox unavailable, falling back to direct sends: {e}")
+            self.outbox = None
+            return
+
+        self.sender_running = True
+        self.sender_exited = False
+        self.close_on_exit = False
+        self.sender_thread = threading.Thread(target=self._sender_loop, daemon=True)
+        self.sender_thread.start()
+        self.logger.info("Transport sender worker started.")
+
+    def stop(self, flush_timeout=None):
+        """Stops the sender, flushing pending reports for up to `flush_timeout` seconds.
+        Anything not delivered stays persisted for the next run."""
+        if not self.sender_running:
+            return
+        if flush_timeout is None:
+            flush_timeout = self.config.get("outbox", {}).get("flush_timeout", 5.0)
+        self.flush_deadline = self.clock.time() + flush_timeout
+        self.sender_running = False
+        self.wake_event.set()
+        if self.sender_thread:
+            # Real seconds: the flush itself is paced by the clock, the join is a safety net
+            self.sender_thread.join(timeout=flush_timeout + self.config.get("timeout", 10))
+        with self.outbox_lock:
+            if not self.sender_exited:
+                # Still inside a send: the sender closes the outbox itself when it exits
+                self.logger.warning("Sender still busy after flush timeout; outbox closes when it exits.")
+                self.close_on_exit = True
+                return
+            self._close_outbox()
+
+    def _close_outbox(self):
+        if self.outbox is None:
+            return
+        pending = self.outbox.count()
+        if pending:
+            self.logger.info(f"{pending} report(s) persisted in outbox for next start.")
+        self.outbox.close()
+        self.outbox = None
+
+    def _sender_loop(self):
+        """Drains the outbox oldest-first, keeping strict per-camera order and a send rate limit."""
+        try:
+            self._drain_until_stopped()
+        finally:
+            with self.outbox_lock:
+                self.sender_exited = True
+                if self.close_on_exit:
+                    self._close_outbox()
+
+    def _drain_until_stopped(self):
+        outbox_cfg = self.config.get("outbox", {})
+        batch_size = outbox_cfg.get("drain_batch", 50)
+        min_gap = 1.0 / outbox_cfg.get("drain_rate", 5.0)
+        max_backoff = outbox_cfg.get("max_backoff", 60.0)
+        backoff = 1.0
+        # Re-check often enough that a partial batch goes out at most 5 s past its max age
+        idle_wait = max(0.5, min(5.0, self.config.get("batch", {}).get("max_age", DEFAULT_BATCH_MAX_AGE)))
+
+        while True:
+            self.wake_event.clear()
+            flushing = not self.sender_running
+            if flushing and self.clock.time() >= self.flush_deadline:
+                break
+
+            try:
+                delivered, failed = self._drain_once(batch_size, min_gap)
+            except Exception as e:
+                # Keep the worker alive; the reports stay persisted for the next round
+                self.logger.error(f"Outbox drain failed: {e}", exc_info=True)
+                delivered, failed = 0, 1
+
+            if flushing and (failed or not delivered):
+                break
+            if failed:
+                # Backend unreachable: wait before retrying the head of the queue
+                self.clock.wait(self.wake_event, backoff)
+                backoff = min(backoff * 2, max_backoff)
+            elif delivered:
+                backoff = 1.0
+                continue  # Keep draining the backlog
+            else:
+                self.clock.wait(self.wake_event, idle_wait)
+
+    def _drain_once(self, batch_size, min_gap):
+        """Sends one round of pending reports. Returns (delivered, failed) counts."""
+        if not self.binding.is_bound():
+            return 0, 0
+        rows = self.outbox.peek(batch_size)
+        if rows and self._batching_active():
+            return self._drain_batch(rows, min_gap)
+        return self._drain_single(rows, min_gap)
+
+    def _drain_single(self, rows, min_gap):
+        """
+        Posts reports one by one, oldest first. A report the backend rejects
+        permanently, or that keeps failing for `max_attempts` tries, is moved
+        to the dead letters so it cannot block its camera's queue.
+        """
+        delivered = 0
+        failed = 0
+        blocked_cameras = set()
+        for row_id, camera_id, url, payload, _ in rows:
+            if camera_id in blocked_cameras:
+                continue
+            sent_at = self.clock.time()
+            result = self._post_raw(url, payload)
+            if result:
+                self.outbox.ack([row_id])
+                delivered += 1
+            elif result is None:
+                self.outbox.dead_letter([row_id], "rejected by backend")
+                self.metrics.inc("transport_dead_letters_total")
+                delivered += 1  # Handled: keep draining this camera
+            elif self._record_failure(row_id):
+                delivered += 1
+            else:
+                # Preserve ordering: nothing newer for this camera goes out first
+                blocked_cameras.add(camera_id)
+                failed += 1
+            self.clock.sleep(min_gap - (self.clock.time() - sent_at))
+        return delivered, failed
+
+    def _record_failure(self, row_id):
+        """
+        Counts a failed attempt for a report. Attempts are only counted while
+        the circuit is closed, so a backend outage never exhausts them.
+        Returns True if the report was moved to the dead letters.
+        """
+        if self.breaker.state != CircuitBreaker.CLOSED:
+            return False
+        max_attempts = self.config.get("outbox", {}).get("max_attempts", 10)
+        if self.outbox.mark_failed(row_id) < max_attempts:
+            return False
+        self.outbox.dead_letter([row_id], f"failed {max_attempts} attempts")
+        self.metrics.inc("transport_dead_letters_total")
+        return True
+
+    def _batching_active(self):
+        return self.config.get("batch", {}).get("enabled", False) and self.clock.time() >= self.batch_disabled_until
+
+    def _drain_batch(self, rows, min_gap):
+        """
+        Uploads the head camera's pending reports as one compressed batch once
+        the batch is full or its oldest report reaches `max_age`.
+        Falls back to single posts if the backend rejects batches.
+        """
+        batch_cfg = self.config.get("batch", {})
+        max_size = batch_cfg.get("max_size", 20)
+        max_age = batch_cfg.get("max_age", DEFAULT_BATCH_MAX_AGE)
+
+        _, head_camera, head_url, _, oldest = rows[0]
+        group = [r for r in rows if r[1] == head_camera and r[2] == head_url][:max_size]
+
+        flushing = not self.sender_running
+        if not flushing and len(group) < max_size and self.clock.time() - oldest < max_age:
+            return 0, 0  # Keep accumulating
+
+        result = self._post_batch(head_url, [r[3] for r in group])
+        if result is None:
+            retry_after = batch_cfg.get("retry_after", 3600)
+            self.batch_disabled_until = self.clock.time() + retry_after
+            self.logger.warning(f"Backend rejected batch upload; using single posts for {retry_after}s")
+            return self._drain_single(rows, min_gap)
+        if result:
+            self.outbox.ack([r[0] for r in group])
+            return len(group), 0
+        if self._record_failure(group[0][0]):
+            return 1, 0
+        return 0, 1
+
+    def _build_batch_envelope(self, payloads):
+        """Wraps unchanged single-report payloads in the codec's array envelope."""
+        self._update_session_auth()
+        return self.codec.batch_envelope(payloads)
+
+    def _encode_body(self, data):
+        """Serialises and compresses a request body. Returns (body, content_encoding)."""
+        body = payload_codecs.dumps(data)
+        compression = self.config.get("batch", {}).get("compression", "gzip").lower()
+        if compression == "gzip":
+            return gzip.compress(body, compresslevel=6), "gzip"
+        if compression == "deflate":
+            return zlib.compress(body, 6), "deflate"
+        return body, None
+
+    def _post_batch(self, url, payloads):
+        """
+        POSTs a batch envelope.
+
+        Returns:
+            True on success, False on a transient failure,
+            None if the backend does not accept batch uploads.
+        """
+        if not self.binding.is_bound():
+            return False
+
+        self._update_session_auth()
+        body, encoding = self._encode_body(self._build_batch_envelope(payloads))
+        headers = {"Content-Type": "application/json"}
+        if encoding:
+            headers["Content-Encoding"] = encoding
+
+        response = self._send(url, data=body, headers=headers)
+        if response is None:
+            return False
+        try:
+            if response.status_code in BATCH_REJECT_STATUSES:
+                return None
+            response.raise_for_status()
+            self.logger.info(f"Posted batch of {len(payloads)} report(s) ({len(body)} bytes) to {url}")
+            return True
+        except Exception as e:
+            self.logger.error(f"Batch post to {url} failed: {e}")
+            return False
 
     def send_activation(self, payload=None):
         """Handshake notification (optional based on backend requirements)."""
@@ -148,6 +493,15 @@ class TransportAgent:
         # We reuse the ingest endpoint for activation signals unless a separate one is bound
         return self._post_raw(url, payload)
 
+    def get_health(self):
+        """Transport health for the status API: breaker state and local buffering."""
+        return {
+            "circuit": self.breaker.snapshot(),
+            "outbox_pending": self.outbox.count() if self.outbox else 0,
+            "outbox_evicted": self.outbox.evicted if self.outbox else 0,
+            "outbox_dead_lettered": self.outbox.dead_lettered if self.outbox else 0
+        }
+
     def send_status(self, status):
         """Periodic status update."""
         return True # Placeholder
@@ -1,8 +1,12 @@
-from flask import Flask, request, jsonify, send_from_directory, Response, make_response
+from flask import Flask, request, jsonify, send_from_directory, Response, make_response, g
 
+import functools
+import hmac
 import time
+import json
 from agents.orchestrator import Orchestrator
 from utils.logger import get_logger
+from utils.status_hub import StatusHub
 
 app = Flask(__name__)
 logger = get_logger("DetectionAPI")
@@ -12,6 +16,7 @@ import threading
 # Global orchestrator instance and lock
 orchestrator = None
 orchestrator_lock = threading.Lock()
+status_hub = None
 
 def get_orchestrator():
     global orchestrator
@@ -24,6 +29,53 @@ def get_orchestrator():
                 return None
     return orchestrator
 
+def collect_status(orch):
+    """Dashboard state, split into sections that are versioned and pushed independently."""
+    # One reference load: the snapshot is immutable, its dict view is built once per version
+    state = orch.state.to_dict()
+    return {
+        "state": {
+            "active": state["active"],
+            "camera_id": orch.transport.binding.config.get("camera_id", "N/A"),
+            "started_at": state["started_at"],
+            "last_count_sent": state["last_report"],
+            "lifecycle": state["lifecycle"]
+        },
+        "counts": state["counts"],
+        "fps": {"fps": state["fps"], "last_update": state["last_update"]},
+        "health": {
+            "pipeline": state["health"],
+            "transport": orch.transport.get_health(),
+            "hardware": orch.telemetry.latest(),
+            "governor": orch.governor.status(),
+            "stream": dict(orch.broadcaster.stats(), overlay=orch.detection_feed.overlay,
+                           detection_subscribers=orch.detection_feed.subscribers)
+        },
+        "binding": orch.transport.binding.get_info()
+    }
+
+def get_status_hub():
+    global status_hub
+    orch = get_orchestrator()
+    if not orch:
+        return None
+    with orchestrator_lock:
+        if status_hub is None:
+            status_hub = StatusHub(lambda: collect_status(orch))
+    return status_hub
+
+def notify_status_change():
+    """Pushes state changed by an API call to dashboards without waiting for the next sample."""
+    if status_hub:
+        status_hub.refresh(force=True)
+
+def versioned_response(hub, version, body):
+    """JSON response carrying the state version as ETag; answers 304 when the client is current."""
+    response = Response(body, mimetype='application/json')
+    response.set_etag(hub.etag(version))
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
 # Add dashboard routes
 @app.route('/')
 @app.route('/dashboard')
@@ -38,7 +90,16 @@ def favicon():
 
 @app.before_request
 def log_request_info():
-    logger.info(f"Request: {request.method} {request.url}")
+    logger.debug("Request: %s %s", request.method, request.url)
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def trace_request(response):
+    # Request handling shares the GIL with the pipeline threads; traced next to the frame spans
+    if orchestrator and "request_started" in g:
+        orchestrator.tracer.record(f"{request.method} {request.path}", None, g.request_started,
+                                   time.perf_counter(), status=response.status_code)
+    return response
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -65,8 +126,18 @@ def start_detection():
         # We could also pass backend_url override to transport agent if needed
         # but for now we stick to requirements.
         
-        orch.start_detection()
-        return jsonify({"status": "success", "message": "Detection started"}), 200
+        # Returns immediately unless the caller asks to wait for the pipeline to come up
+        wait = request.args.get("wait") in ("1", "true") or bool(data.get("wait"))
+        if not orch.start(wait=wait, timeout=15.0):
+            return jsonify({"status": "failure", "error": f"Pipeline is {orch.lifecycle}",
+                            "lifecycle": dict(orch.state.lifecycle)}), 409
+        notify_status_change()
+        lifecycle = dict(orch.state.lifecycle)
+        if not wait:
+            return jsonify({"status": "accepted", "message": "Detection starting", "lifecycle": lifecycle}), 202
+        if lifecycle["state"] == orch.STOPPED:
+            return jsonify({"status": "failure", "error": lifecycle.get("last_error"), "lifecycle": lifecycle}), 500
+        return jsonify({"status": "success", "message": "Detection started", "lifecycle": lifecycle}), 200
     except Exception as e:
         logger.error(f"Error starting detection: {e}")
         return jsonify({"status": "failure", "error": str(e)}), 500
@@ -78,8 +149,15 @@ def stop_detection():
          return jsonify({"error": "Orchestrator not initialized"}), 500
     
     try:
-        orch.stop_detection()
-        return jsonify({"status": "success", "message": "Detection stopped"}), 200
+        wait = request.args.get("wait") in ("1", "true")
+        if not orch.stop(wait=wait, timeout=15.0):
+            return jsonify({"status": "failure", "error": f"Pipeline is {orch.lifecycle}",
+                            "lifecycle": dict(orch.state.lifecycle)}), 409
+        notify_status_change()
+        lifecycle = dict(orch.state.lifecycle)
+        if not wait:
+            return jsonify({"status": "accepted", "message": "Detection stopping", "lifecycle": lifecycle}), 202
+        return jsonify({"status": "success", "message": "Detection stopped", "lifecycle": lifecycle}), 200
     except Exception as e:
         logger.error(f"Error stopping detection: {e}")
         return jsonify({"status": "failure", "error": str(e)}), 500
@@ -92,22 +170,13 @@ def capture_snapshot():
         return jsonify({"error": "Orchestrator not initialized"}), 500
     
     try:
-        import cv2
-        
-        # Get the latest annotated frame
-        frame = orch.last_annotated_frame
+        # Annotated server-side even when the live view draws overlays in the browser
+        frame = orch.capture_snapshot()
         if frame is None:
             return jsonify({"error": "No frame available"}), 404
         
-        # Encode as JPEG with 85% quality
-        encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), 85]
-        success, buffer = cv2.imencode('.jpg', frame, encode_param)
-        
-        if not success:
-            return jsonify({"error": "Failed to encode frame"}), 500
-        
         # Return as binary image
-        response = make_response(buffer.tobytes())
+        response = make_response(frame)
         response.headers['Content-Type'] = 'image/jpeg'
         response.headers['Content-Disposition'] = 'inline; filename=snapshot.jpg'
         return response
@@ -116,31 +185,62 @@ def capture_snapshot():
         logger.error(f"Error capturing snapshot: {e}")
         return jsonify({"error": str(e)}), 500
 
+def render_status(sections):
+    state = sections["state"]
+    uptime = time.time() - state["started_at"] if state["started_at"] else 0
+    return json.dumps({
+        "active": state["active"],
+        "lifecycle": state["lifecycle"],
+        "camera_id": state["camera_id"],
+        "uptime": f"{uptime:.2f}s" if uptime > 0 else "N/A",
+        "started_at": state["started_at"],
+        "last_count_sent": state["last_count_sent"],
+        "latest_counts": dict(sections["counts"], **sections["fps"]),
+        "pipeline": sections["health"]["pipeline"],
+        "transport": sections["health"]["transport"],
+        "stream": sections["health"]["stream"],
+        # Same health section the SSE stream pushes, incl. hardware and governor decisions
+        "health": sections["health"]
+    })
+
 @app.route('/api/detection/status', methods=['GET'])
 def get_status():
-    orch = get_orchestrator()
-    if not orch:
+    hub = get_status_hub()
+    if not hub:
          return jsonify({"status": "error", "message": "Orchestrator not initialized"}), 500
 
-    uptime = 0
-    if orch.running and hasattr(orch, 'start_time'):
-        uptime = time.time() - orch.start_time
-
-    logger.info(f"API_STATUS: Active={orch.running}, LatestCounts={orch.latest_counts}")
-    return jsonify({
-        "active": orch.running,
-        "camera_id": orch.transport.binding.config.get("camera_id", "N/A"),
-        "uptime": f"{uptime:.2f}s" if uptime > 0 else "N/A",
-        "last_count_sent": getattr(orch, 'last_report_time_str', "N/A"),
-        "latest_counts": getattr(orch, 'latest_counts', {})
-    }), 200
+    # Rebuilt only when the state version changes; uptime is frozen at that point,
+    # dashboards derive a live value from started_at
+    version, body = hub.render("status", render_status)
+    return versioned_response(hub, version, body)
 
 @app.route('/api/info', methods=['GET'])
 def get_info():
-    orch = get_orchestrator()
-    if not orch:
+    hub = get_status_hub()
+    if not hub:
         return jsonify({"error": "Orchestrator not ready"}), 503
-    return jsonify(orch.transport.binding.get_info()), 200
+    version, body = hub.render("info", lambda sections: json.dumps(sections["binding"]))
+    return versioned_response(hub, version, body)
+
+@app.route('/api/detection/events')
+def status_events():
+    """
+    Server-Sent Events stream of dashboard state: a snapshot, then only the sections
+    that changed. Reconnecting clients resume via Last-Event-ID (or ?since=<id>).
+    """
+    hub = get_status_hub()
+    if not hub:
+        return jsonify({"error": "Orchestrator not initialized"}), 500
+    since = hub.parse_version(request.headers.get('Last-Event-ID') or request.args.get('since'))
+
+    def generate():
+        for event, event_id, data in hub.events(since=since):
+            yield hub.format_sse(event, event_id, data)
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @app.route('/api/bind', methods=['POST', 'GET', 'DELETE'])
 def handle_bind():
@@ -156,6 +256,7 @@ def handle_bind():
             return jsonify({"error": f"Missing required fields: {required}"}), 400
         
         if orch.transport.binding.bind(data):
+            notify_status_change()
             # Dynamic re-binding: No restart needed, transport checks binding.is_bound()
             return jsonify({
                 "success": True, 
@@ -169,6 +270,7 @@ def handle_bind():
 
     elif request.method == 'DELETE':
         if orch.transport.binding.unbind():
+            notify_status_change()
             return jsonify({
                 "success": True, 
                 "message": "Camera unbound, back to standalone mode"
@@ -199,19 +301,169 @@ def test_connectivity():
             "error": "Failed to reach backend with current configuration"
         }), 502
 
-def generate_frames():
+@app.route('/api/hardware', methods=['GET'])
+def hardware_telemetry():
+    """Buffered hardware telemetry: latest sample, summary and the series of the last ?seconds=N."""
     orch = get_orchestrator()
-    while True:
-        if orch and orch.last_annotated_frame:
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + orch.last_annotated_frame + b'\r\n')
-        time.sleep(0.1) # Limit streaming to ~10 FPS to save bandwidth
+    if not orch:
+        return jsonify({"error": "Orchestrator not initialized"}), 500
+    seconds = request.args.get("seconds", default=300.0, type=float)
+    series = orch.telemetry.series(seconds)
+    return jsonify({
+        "latest": orch.telemetry.latest(),
+        "summary": orch.telemetry.summarise(series),
+        "series": series
+    }), 200
+
+@app.route('/metrics')
+def metrics():
+    """Per-stage latency histograms, frame counters and queue depths in Prometheus text format."""
+    orch = get_orchestrator()
+    if not orch:
+        return Response("# orchestrator not initialized\n", status=503, mimetype='text/plain')
+    return Response(orch.metrics.render_prometheus(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+def require_debug_token(view):
+    """Guards debug endpoints with the debug.token from backend_config.json (disabled while empty)."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        orch = get_orchestrator()
+        if not orch:
+            return jsonify({"error": "Orchestrator not initialized"}), 500
+        expected = orch.transport.config.get("debug", {}).get("token") or ""
+        if not expected:
+            return jsonify({"error": "Debug endpoints disabled (no debug token configured)"}), 403
+        supplied = request.headers.get("X-Debug-Token", "")
+        if not supplied and request.headers.get("Authorization", "").startswith("Bearer "):
+            supplied = request.headers["Authorization"][len("Bearer "):]
+        if not hmac.compare_digest(supplied.encode("utf-8"), expected.encode("utf-8")):
+            return jsonify({"error": "Invalid or missing debug token"}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.route('/api/debug/trace', methods=['GET'])
+@require_debug_token
+def export_trace():
+    """Last ?seconds=N (default 10) of sampled frame spans as Chrome trace-event JSON."""
+    orch = get_orchestrator()
+    if not orch:
+        return jsonify({"error": "Orchestrator not initialized"}), 500
+    seconds = request.args.get("seconds", default=10.0, type=float)
+    if seconds <= 0:
+        return jsonify({"error": "seconds must be positive"}), 400
+    response = Response(json.dumps(orch.tracer.export_chrome(seconds), separators=(',', ':')),
+                        mimetype='application/json')
+    response.headers['Content-Disposition'] = f'attachment; filename=trace-{int(time.time())}.json'
+    return response
+
+@app.route('/api/debug/profile', methods=['GET', 'POST', 'DELETE'])
+@require_debug_token
+def profile_session():
+    """
+    POST starts a bounded CPU profile ({"mode": "sampling"|"cprofile", "duration": s, "interval": s}),
+    GET reports the session status, DELETE stops it early.
+    """
+    profiler = get_orchestrator().profiler
+    if request.method == 'POST':
+        options = request.get_json(silent=True) or {}
+        try:
+            session = profiler.start(mode=options.get("mode", "sampling"),
+                                     duration=options.get("duration", 10.0),
+                                     interval=options.get("interval", 0.005))
+        except (ValueError, TypeError) as e:
+            return jsonify({"error": str(e)}), 400
+        except RuntimeError as e:
+            return jsonify({"error": str(e)}), 409
+        return jsonify(session), 202
+    if request.method == 'DELETE':
+        session = profiler.stop()
+    else:
+        session = profiler.status()
+    if session is None:
+        return jsonify({"error": "No profiling session has been run"}), 404
+    return jsonify(session), 200
+
+@app.route('/api/debug/profile/result', methods=['GET'])
+@require_debug_token
+def profile_result():
+    """Downloads the finished profile (?format=text|pstats for cProfile sessions)."""
+    try:
+        body, mimetype, filename = get_orchestrator().profiler.export(request.args.get("format"))
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+    response = Response(body, mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
+@app.route('/api/debug/memory', methods=['GET', 'POST', 'DELETE'])
+@require_debug_token
+def memory_profile():
+    """
+    POST takes a tracemalloc snapshot, GET ?from=<id>[&to=<id>] diffs two snapshots,
+    DELETE stops tracing and drops the snapshots.
+    """
+    profiler = get_orchestrator().profiler
+    limit = request.args.get("limit", default=20, type=int)
+    if request.method == 'POST':
+        return jsonify(profiler.memory_snapshot(limit=limit)), 201
+    if request.method == 'DELETE':
+        profiler.memory_stop()
+        return jsonify({"success": True}), 200
+    from_id = request.args.get("from", type=int)
+    if from_id is None:
+        return jsonify({"error": "from=<snapshot id> is required"}), 400
+    try:
+        return jsonify(profiler.memory_diff(from_id, request.args.get("to", type=int), limit=limit)), 200
+    except KeyError:
+        return jsonify({"error": "Unknown snapshot id"}), 404
+
+@app.route('/api/debug/threads', methods=['GET'])
+@require_debug_token
+def thread_cpu():
+    """CPU time per thread (and utilisation since the previous call)."""
+    return jsonify(get_orchestrator().profiler.thread_cpu()), 200
+
+def generate_frames(orch, rendition=None, max_fps=None):
+    # Wakes only on new frames; a slow client skips frames instead of queueing them
+    for jpeg in orch.broadcaster.frames(rendition=rendition, max_fps=max_fps):
+        yield (b'--frame\r\n'
+               b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
 
 @app.route('/video_feed')
 def video_feed():
-    return Response(generate_frames(),
+    """MJPEG preview. Optional ?rendition=auto|<name> and ?fps=<max frames per second>."""
+    orch = get_orchestrator()
+    if not orch:
+        return jsonify({"error": "Orchestrator not initialized"}), 500
+
+    rendition = request.args.get("rendition")
+    try:
+        orch.broadcaster.resolve(rendition)
+        max_fps = request.args.get("fps", type=float)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if max_fps is not None and max_fps <= 0:
+        return jsonify({"error": "fps must be positive"}), 400
+
+    return Response(generate_frames(orch, rendition, max_fps),
                     mimetype='multipart/x-mixed-replace; boundary=frame')
 
+def generate_detection_events(orch):
+    for event in orch.detection_feed.events():
+        # Comment line keeps proxies and the browser from timing out an idle stream
+        yield f"data: {event}\n\n" if event else ": keep-alive\n\n"
+
+@app.route('/api/detection/live')
+def detection_live():
+    """Server-Sent Events stream of per-inference detections for client-side overlays."""
+    orch = get_orchestrator()
+    if not orch:
+        return jsonify({"error": "Orchestrator not initialized"}), 500
+    response = Response(generate_detection_events(orch), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 if __name__ == '__main__':
     # In production, use a WSGI server like gunicorn
     app.run(host='0.0.0.0', port=5000)
@@ -2,6 +2,9 @@ const DataModule = require('../modules/DataModule');
 const SiteModule = require('../modules/SiteModule');
 const { logger } = require('firebase-functions');
 
+// Firestore write batches hold 500 operations; keep room for the site summaries
+const MAX_BATCH_REPORTS = 250;
+
 class IngestionAgent {
     /**
      * Entry point for standard HTTP count ingestion.
@@ -12,47 +15,22 @@ class IngestionAgent {
             const body = req.body;
             logger.info('Received ingestion report', { body });
 
-            let processedPayload;
-
-            // 1. Determine payload format and normalize
-            if (body.identity && body.data) {
-                // Universal/Nested Schema
-                processedPayload = {
-                    siteId: body.identity.site_id,
-                    cameraId: body.identity.camera_id,
-                    timestamp: body.environment?.timestamp,
-                    counts: body.data.counts
-                };
-            } else if (body.tenant_id && body.data) {
-                // AIODCOUNTER05 Schema
-                processedPayload = {
-                    siteId: body.site_id,
-                    cameraId: body.camera_id,
-                    timestamp: body.timestamp,
-                    counts: body.data.counts
-                };
-            } else if (body.site_id && body.camera_id) {
-                // Legacy Flat Schema
-                processedPayload = {
-                    siteId: body.site_id,
-                    cameraId: body.camera_id,
-                    timestamp: body.timestamp,
-                    counts: body.counts
-                };
-            } else {
-                return res.status(400).send({ error: 'Unsupported or malformed payload schema' });
+            // Batch envelope: { batch_version, format, reports: [<single payload>, ...] }
+            // Each report keeps the exact single-report schema handled below.
+            if (body.batch_version && Array.isArray(body.reports)) {
+                return this.handleBatch(body, res);
             }
 
-            // 2. Business Logic / Validation
-            if (!processedPayload.siteId || !processedPayload.cameraId) {
-                return res.status(400).send({ error: 'Missing identity fields (site_id/camera_id)' });
+            const processedPayload = this.normalize(body);
+            if (processedPayload.error) {
+                return res.status(400).send({ error: processedPayload.error });
             }
 
             // (Optional) Validate camera registration
             // const isValid = await SiteModule.validateCamera(processedPayload.siteId, processedPayload.cameraId);
             // if (!isValid) logger.warn('Ingestion from unregistered camera', { processedPayload });
 
-            // 3. Delegate to DataModule
+            // Delegate to DataModule
             const docId = await DataModule.storeCount(processedPayload);
 
             return res.status(200).send({
@@ -66,6 +44,91 @@ class IngestionAgent {
             return res.status(500).send({ error: 'Internal Server Error', detail: error.message });
         }
     }
+
+    /**
+     * Stores every report of a batch upload in one atomic write.
+     * The whole batch is rejected if any report is malformed so the device can retry it as singles.
+     * Reports are keyed by their stable report id, so a retried batch overwrites instead of duplicating.
+     */
+    async handleBatch(body, res) {
+        const normalized = body.reports.map((report) => this.normalize(report));
+        const invalid = normalized.findIndex((p) => p.error);
+        if (invalid !== -1) {
+            return res.status(400).send({ error: `Report ${invalid}: ${normalized[invalid].error}` });
+        }
+        if (normalized.length > MAX_BATCH_REPORTS) {
+            return res.status(413).send({ error: `Batch exceeds ${MAX_BATCH_REPORTS} reports` });
+        }
+
+        const ids = await DataModule.storeCounts(normalized);
+
+        return res.status(200).send({
+            success: true,
+            message: `Batch of ${ids.length} report(s) ingested successfully`,
+            ids
+        });
+    }
+
+    /**
+     * Determines the payload format and normalizes it.
+     * Returns { error } for unsupported or incomplete payloads.
+     */
+    normalize(body) {
+        let processedPayload;
+
+        if (body.identity && body.data) {
+            // Universal/Nested Schema
+            processedPayload = {
+                siteId: body.identity.site_id,
+                cameraId: body.identity.camera_id,
+                timestamp: body.environment?.timestamp,
+                counts: body.data.counts
+            };
+        } else if (body.tenant_id && body.data) {
+            // AIODCOUNTER05 Schema
+            processedPayload = {
+                siteId: body.site_id,
+                cameraId: body.camera_id,
+                timestamp: body.timestamp,
+                counts: body.data.counts
+            };
+        } else if (body.site_id && body.camera_id) {
+            // Legacy Flat Schema
+            processedPayload = {
+                siteId: body.site_id,
+                cameraId: body.camera_id,
+                timestamp: body.timestamp,
+                counts: body.counts
+            };
+        } else {
+            return { error: 'Unsupported or malformed payload schema' };
+        }
+
+        if (!processedPayload.siteId || !processedPayload.cameraId) {
+            return { error: 'Missing identity fields (site_id/camera_id)' };
+        }
+        processedPayload.reportId = this.reportId(body, processedPayload);
+        return processedPayload;
+    }
+
+    /**
+     * Stable id of a report across device retries: an explicit report_id, or
+     * camera id + the interval_start and report_seq the device's report scheduler
+     * stamps into counts. interval_start has whole-second resolution and repeats
+     * when the scheduler restarts mid-interval, so report_seq keeps such reports apart.
+     * Returns undefined for reports without an interval_start (stored by timestamp as before).
+     */
+    reportId(body, processedPayload) {
+        if (body.report_id) {
+            return String(body.report_id);
+        }
+        const counts = processedPayload.counts || {};
+        if (!counts.interval_start) {
+            return undefined;
+        }
+        const id = `${processedPayload.cameraId}_${counts.interval_start}`;
+        return counts.report_seq !== undefined ? `${id}_${counts.report_seq}` : id;
+    }
 }
 
 module.exports = new IngestionAgent();
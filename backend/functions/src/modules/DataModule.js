@@ -6,36 +6,78 @@ class DataModule {
     }
 
     /**
-     * Stores detection counts in Firestore.
-     * Path: sites/{siteId}/cameras/{cameraId}/reports/{timestamp}
+     * Document for one report.
+     * Path: sites/{siteId}/cameras/{cameraId}/reports/{reportId || timestamp}
+     * With `keyed`, a stable reportId makes a retried upload overwrite instead of
+     * duplicate. Single-report posts are not keyed and keep their timestamp ids.
      */
-    async storeCount(payload) {
-        const { siteId, cameraId, timestamp, counts } = payload;
+    reportRef(payload, keyed = false) {
+        const { siteId, cameraId, timestamp, reportId } = payload;
 
         if (!siteId || !cameraId) {
             throw new Error('Missing siteId or cameraId in payload');
         }
 
-        const docRef = this.db
+        const docId = ((keyed && reportId) || timestamp || new Date().toISOString()).replace(/\//g, '_');
+        return this.db
             .collection('sites')
             .doc(siteId)
             .collection('cameras')
             .doc(cameraId)
             .collection('reports')
-            .doc(timestamp || new Date().toISOString());
+            .doc(docId);
+    }
 
-        await docRef.set({
-            counts,
-            timestamp: timestamp || admin.firestore.FieldValue.serverTimestamp(),
+    reportData(payload) {
+        return {
+            counts: payload.counts,
+            timestamp: payload.timestamp || admin.firestore.FieldValue.serverTimestamp(),
             receivedAt: admin.firestore.FieldValue.serverTimestamp()
-        }, { merge: true });
+        };
+    }
+
+    /**
+     * Stores detection counts in Firestore.
+     */
+    async storeCount(payload) {
+        const docRef = this.reportRef(payload);
+        await docRef.set(this.reportData(payload), { merge: true });
 
         // Update site-level summary (optional but useful)
-        await this.updateSiteSummary(siteId, counts);
+        await this.updateSiteSummary(payload.siteId, payload.counts);
 
         return docRef.id;
     }
 
+    /**
+     * Stores several reports atomically (one write batch): either all of them
+     * are written or none, so a device retrying a failed batch never
+     * duplicates part of it. Batch reports are keyed by their reportId.
+     */
+    async storeCounts(payloads) {
+        const batch = this.db.batch();
+        const refs = payloads.map((payload) => {
+            const docRef = this.reportRef(payload, true);
+            batch.set(docRef, this.reportData(payload), { merge: true });
+            return docRef;
+        });
+
+        // Latest report per site feeds the site summary
+        const latest = {};
+        for (const payload of payloads) {
+            latest[payload.siteId] = payload.counts;
+        }
+        for (const [siteId, counts] of Object.entries(latest)) {
+            batch.set(this.db.collection('sites').doc(siteId), {
+                lastUpdate: admin.firestore.FieldValue.serverTimestamp(),
+                latestCounts: counts
+            }, { merge: true });
+        }
+
+        await batch.commit();
+        return refs.map((docRef) => docRef.id);
+    }
+
     async updateSiteSummary(siteId, latestCounts) {
         const siteRef = this.db.collection('sites').doc(siteId);
         await siteRef.set({
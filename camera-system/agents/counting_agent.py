@@ -67,13 +67,13 @@ class CountingAgent:
 
                 # Filter by class list (if configured)
                 if self.classes_to_count and class_name not in self.classes_to_count:
-                    self.logger.debug(f"Skipping class '{class_name}' (not in classes_to_count)")
+                    self.logger.debug("Skipping class '%s' (not in classes_to_count)", class_name)
                     continue
 
                 # Filter by minimum confidence threshold
                 if confidence < self.min_confidence:
-                    self.logger.debug(f"Skipping {class_name} with confidence {confidence:.2f} "
-                                    f"(below threshold {self.min_confidence})")
+                    self.logger.debug("Skipping %s with confidence %.2f (below threshold %s)",
+                                      class_name, confidence, self.min_confidence)
                     continue
 
                 filtered.append(det)
@@ -97,7 +97,7 @@ class CountingAgent:
         counts['total'] = total
 
         if total > 0:
-            self.logger.info(f"Counted {total} objects: {counts}")
+            self.logger.debug("Counted %d objects: %s", total, counts)
         else:
             self.logger.debug("No objects met counting criteria")
 
@@ -168,7 +168,7 @@ class InferenceAgentHailo:
         else:
             output = outputs[0]
 
-        self.logger.debug(f"Output shape: {output.shape}, dtype: {output.dtype}")
+        self.logger.debug("Output shape: %s, dtype: %s", output.shape, output.dtype)
 
         # YOLOv8 output format: shape could be (1, 84, 8400) or (8400, 84)
         # Reshape to (num_detections, 84)
@@ -317,7 +317,7 @@ class InferenceAgentHailo:
             detections = self.postprocess(output_dict, frame.shape)
 
             if detections:
-                self.logger.debug(f"Detected {len(detections)} objects")
+                self.logger.debug("Detected %d objects", len(detections))
             else:
                 self.logger.debug("No objects detected")
 
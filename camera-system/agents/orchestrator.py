@@ -266,13 +266,9 @@ class OrchestratorAgent:
                 if accumulated_detections:
                     counts = self.counting.process_detections(accumulated_detections)
 
-                    # Send to Firebase
-                    if self.transport.send_counts(counts):
-                        self.metrics['reports_sent'] += 1
-                        self.metrics['last_report_time'] = time.time()
-                        self.logger.info(f"Report sent: {counts}")
-                    else:
-                        self.logger.warning("Failed to send report to Firebase")
+                    # Send to Firebase without blocking the next interval's aggregation
+                    future = self.transport.send_counts_async(counts)
+                    future.add_done_callback(lambda f, c=counts: self._on_report_done(f, c))
 
                     # Clear accumulated detections
                     accumulated_detections = []
@@ -282,7 +278,7 @@ class OrchestratorAgent:
                         'total': 0,
                         'timestamp': datetime.utcnow().isoformat() + 'Z'
                     }
-                    self.transport.send_counts(empty_counts)
+                    self.transport.send_counts_async(empty_counts)
                     self.logger.debug("No detections in interval, sent zero counts")
 
             except Exception as e:
@@ -290,6 +286,21 @@ class OrchestratorAgent:
                 self.metrics['errors'] += 1
                 time.sleep(5)
 
+    def _on_report_done(self, future, counts):
+        """Record the outcome of an asynchronous counts report."""
+        try:
+            sent = future.result()
+        except Exception as e:
+            self.logger.error(f"Report send raised: {e}")
+            sent = False
+
+        if sent:
+            self.metrics['reports_sent'] += 1
+            self.metrics['last_report_time'] = time.time()
+            self.logger.info(f"Report sent: {counts}")
+        else:
+            self.logger.warning("Failed to send report to Firebase")
+
     def _health_monitor_loop(self):
         """Health monitoring loop - checks agent status and restarts if needed."""
         self.logger.info("Health monitor started")
@@ -323,7 +334,7 @@ class OrchestratorAgent:
                                f"Errors: {self.metrics['errors']}")
 
                 # Send periodic status update
-                self.transport.send_status("active")
+                self.transport.send_status_async("active")
 
             except Exception as e:
                 self.logger.error(f"Error in health monitor: {e}")
@@ -389,9 +400,10 @@ class OrchestratorAgent:
             self.camera.stop()
             self.logger.info("✓ Camera agent stopped")
 
-        # Send final status
+        # Send final status, then release the transport's event loop and connections
         if self.transport:
             self.transport.send_status("inactive")
+            self.transport.close()
 
         # Log final metrics
         if self.metrics['start_time']:
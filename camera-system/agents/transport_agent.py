@@ -1,14 +1,24 @@
+import asyncio
+import random
 import requests
+import threading
 import time
 import sys
 import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.config_loader import load_config
 from utils.logger import setup_logger
 
 
 class TransportAgent:
-    """Handles communication with Firebase Cloud Functions backend."""
+    """Handles communication with Firebase Cloud Functions backend.
+
+    Requests run on a private asyncio event loop over a persistent, pooled
+    HTTP session, so TLS connections are reused across reports and retries
+    never block the caller's thread.
+    """
 
     def __init__(self, config_path):
         """Initialize transport agent with backend configuration.
@@ -30,6 +40,10 @@ class TransportAgent:
         self.report_interval = self.config.get('report_interval', 15)
         self.retry_attempts = self.config.get('retry_attempts', 3)
         self.timeout = self.config.get('timeout', 10)
+        self.pool_size = self.config.get('pool_size', 4)
+        # Overall budget per request including retries; never longer than one interval
+        self.request_deadline = min(self.config.get('request_deadline', self.report_interval),
+                                    self.report_interval)
 
         self.logger.info(f"TransportAgent initialized for camera={self.camera_id}, "
                         f"site={self.site_id}, interval={self.report_interval}s")
@@ -37,6 +51,76 @@ class TransportAgent:
         # Validate HTTPS enforcement
         self._validate_endpoints()
 
+        # Persistent keep-alive session and the event loop that drives it
+        self.session = self._create_session()
+        self._executor = ThreadPoolExecutor(max_workers=self.pool_size,
+                                            thread_name_prefix='transport-io')
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._run_loop, daemon=True)
+        self._loop_thread.start()
+        self._closed = False
+
+        if self.config.get('prewarm', True):
+            self._submit(self._prewarm())
+
+    def _create_session(self):
+        """Create a pooled session; retries are handled by the event loop, not urllib3.
+
+        Returns:
+            requests.Session: Session with keep-alive connection pool
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=0)
+        session.mount('https://', adapter)
+        session.headers.update({
+            'Content-Type': 'application/json',
+            'X-API-Key': self.auth_token
+        })
+        return session
+
+    def _run_loop(self):
+        """Run the transport event loop until close() is called."""
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def _submit(self, coro):
+        """Schedule a coroutine on the transport loop from any thread.
+
+        Returns:
+            concurrent.futures.Future: Resolves with the coroutine's result
+            (False without any I/O once the transport is closed)
+        """
+        if self._closed:
+            coro.close()
+            return self._resolved(False)
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def _warm_up(self, url):
+        """Send an OPTIONS request so the session pools a live TLS connection to `url`.
+
+        OPTIONS is used because it never writes data (the ingest functions
+        only ingest on POST). Any status code counts: the point is the
+        handshake, not the answer.
+
+        Returns:
+            int: HTTP status code of the warm-up response
+        """
+        response = self.session.request('OPTIONS', url, timeout=min(self.timeout, self.request_deadline),
+                                        verify=True)
+        response.close()  # Release the connection back to the pool
+        return response.status_code
+
+    async def _prewarm(self):
+        """Open TLS connections to each configured endpoint ahead of the first report."""
+        for key, url in self.endpoints.items():
+            if not url:
+                continue
+            try:
+                status = await self._loop.run_in_executor(self._executor, self._warm_up, url)
+                self.logger.info(f"Pre-warmed connection for '{key}' endpoint (status {status})")
+            except Exception as e:
+                self.logger.warning(f"Connection pre-warm failed for '{key}': {e}")
+
     def _validate_endpoints(self):
         """Ensure all configured endpoints use HTTPS for security.
 
@@ -51,7 +135,18 @@ class TransportAgent:
         self.logger.info("All endpoints validated for HTTPS")
 
     def send_counts(self, counts_data):
-        """Send object counts to Firebase ingestCounts endpoint.
+        """Send object counts and wait for the outcome (bounded by request_deadline).
+
+        Args:
+            counts_data: Counts dictionary from CountingAgent
+
+        Returns:
+            bool: True if send successful, False otherwise
+        """
+        return self.send_counts_async(counts_data).result()
+
+    def send_counts_async(self, counts_data):
+        """Send object counts to Firebase ingestCounts endpoint without blocking.
 
         Args:
             counts_data: Counts dictionary from CountingAgent
@@ -63,7 +158,7 @@ class TransportAgent:
                 }
 
         Returns:
-            bool: True if send successful, False otherwise
+            concurrent.futures.Future: Resolves to True if send successful, False otherwise
 
         Firebase payload format:
             {
@@ -79,7 +174,7 @@ class TransportAgent:
 
         if not endpoint:
             self.logger.warning("No counts endpoint configured, skipping send")
-            return True  # Not a failure if endpoint not configured
+            return self._resolved(True)  # Not a failure if endpoint not configured
 
         # Build Firebase-compatible payload
         payload = {
@@ -91,15 +186,18 @@ class TransportAgent:
             'total': counts_data.get('total', 0)
         }
 
-        headers = {
-            'Content-Type': 'application/json',
-            'X-API-Key': self.auth_token
-        }
-
         self.logger.debug(f"Sending counts payload: {payload}")
-        return self._send_with_retry(endpoint, payload, headers, 'counts')
+        return self._submit(self._send_with_deadline(endpoint, payload, 'counts'))
+
+    def send_activation(self, camera_info=None):
+        """Send camera activation request and wait for the outcome.
+
+        Returns:
+            bool: True if send successful or endpoint not configured, False otherwise
+        """
+        return self.send_activation_async(camera_info).result()
 
-    def send_activation(self, camera_info):
+    def send_activation_async(self, camera_info=None):
         """Send camera activation request to Firebase (if endpoint exists).
 
         Args:
@@ -107,14 +205,15 @@ class TransportAgent:
                 Format: {'timestamp': '2025-01-09T18:30:00Z', ...}
 
         Returns:
-            bool: True if send successful or endpoint not configured, False otherwise
+            concurrent.futures.Future: Resolves to True if send successful or endpoint not configured
         """
         endpoint = self.endpoints.get('activate', '')
 
         if not endpoint:
             self.logger.info("No activation endpoint configured, skipping")
-            return True
+            return self._resolved(True)
 
+        camera_info = camera_info or {}
         payload = {
             'cameraId': self.camera_id,
             'siteId': self.site_id,
@@ -122,14 +221,17 @@ class TransportAgent:
             'activated_at': camera_info.get('timestamp', '')
         }
 
-        headers = {
-            'Content-Type': 'application/json',
-            'X-API-Key': self.auth_token
-        }
-
-        return self._send_with_retry(endpoint, payload, headers, 'activation')
+        return self._submit(self._send_with_deadline(endpoint, payload, 'activation'))
 
     def send_status(self, status_info):
+        """Send camera status update and wait for the outcome.
+
+        Returns:
+            bool: True if send successful or endpoint not configured, False otherwise
+        """
+        return self.send_status_async(status_info).result()
+
+    def send_status_async(self, status_info):
         """Send camera status update to Firebase (if endpoint exists).
 
         Args:
@@ -137,13 +239,16 @@ class TransportAgent:
                 Format: {'status': 'running', 'timestamp': '2025-01-09T18:30:00Z'}
 
         Returns:
-            bool: True if send successful or endpoint not configured, False otherwise
+            concurrent.futures.Future: Resolves to True if send successful or endpoint not configured
         """
         endpoint = self.endpoints.get('status', '')
 
         if not endpoint:
             self.logger.info("No status endpoint configured, skipping")
-            return True
+            return self._resolved(True)
+
+        if isinstance(status_info, str):
+            status_info = {'status': status_info}
 
         payload = {
             'cameraId': self.camera_id,
@@ -152,21 +257,42 @@ class TransportAgent:
             'timestamp': status_info.get('timestamp', '')
         }
 
-        headers = {
-            'Content-Type': 'application/json',
-            'X-API-Key': self.auth_token
-        }
+        return self._submit(self._send_with_deadline(endpoint, payload, 'status'))
+
+    def _resolved(self, value):
+        """Return an already-completed future for results that need no I/O."""
+        future = Future()
+        future.set_result(value)
+        return future
 
-        return self._send_with_retry(endpoint, payload, headers, 'status')
+    async def _send_with_deadline(self, endpoint, payload, request_type):
+        """Run _send_with_retry under the per-request deadline.
 
-    def _send_with_retry(self, endpoint, payload, headers, request_type):
+        Returns:
+            bool: True if the request succeeded before the deadline, False otherwise
+        """
+        deadline = time.monotonic() + self.request_deadline
+        try:
+            return await asyncio.wait_for(
+                self._send_with_retry(endpoint, payload, request_type, deadline),
+                timeout=self.request_deadline
+            )
+        except asyncio.TimeoutError:
+            self.logger.error(f"Deadline of {self.request_deadline}s exceeded for {request_type}")
+            return False
+        except asyncio.CancelledError:
+            # close() aborts in-flight sends; callers waiting on the future get a plain failure
+            self.logger.warning(f"Transport closed before {request_type} was sent")
+            return False
+
+    async def _send_with_retry(self, endpoint, payload, request_type, deadline):
         """Send HTTP POST with exponential backoff retry logic.
 
         Args:
             endpoint: Target URL
             payload: JSON payload dictionary
-            headers: HTTP headers dictionary
             request_type: Type of request for logging ('counts', 'activation', 'status')
+            deadline: time.monotonic() value after which no further attempt is made
 
         Returns:
             bool: True if request succeeded (200 OK), False otherwise
@@ -175,18 +301,25 @@ class TransportAgent:
             - 4xx errors (client fault): Don't retry, return False immediately
             - 5xx errors (server fault): Retry with exponential backoff
             - Timeout/Connection errors: Retry with exponential backoff
-            - Backoff formula: 2^attempt + jitter (0-1 second)
+            - Backoff formula: 2^attempt + jitter (0-1 second), awaited on the
+              event loop so no thread is blocked while waiting
         """
         for attempt in range(self.retry_attempts):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
             try:
                 self.logger.debug(f"Sending {request_type} (attempt {attempt + 1}/{self.retry_attempts})")
 
-                response = requests.post(
-                    endpoint,
-                    json=payload,
-                    headers=headers,
-                    timeout=self.timeout,
-                    verify=True  # Validate SSL certificates
+                attempt_timeout = min(self.timeout, remaining)
+                response = await self._loop.run_in_executor(
+                    self._executor,
+                    lambda: self.session.post(
+                        endpoint,
+                        json=payload,
+                        timeout=attempt_timeout,
+                        verify=True  # Validate SSL certificates
+                    )
                 )
 
                 # Success
@@ -217,13 +350,14 @@ class TransportAgent:
 
             # Exponential backoff with jitter before retry
             if attempt < self.retry_attempts - 1:
-                # 2^attempt + random jitter (0-1 second)
-                wait_time = (2 ** attempt) + (time.time() % 1)
+                wait_time = (2 ** attempt) + random.random()
+                if time.monotonic() + wait_time >= deadline:
+                    break
                 self.logger.info(f"Retrying {request_type} in {wait_time:.1f} seconds...")
-                time.sleep(wait_time)
+                await asyncio.sleep(wait_time)
 
         # All retries exhausted
-        self.logger.error(f"Failed to send {request_type} after {self.retry_attempts} attempts")
+        self.logger.error(f"Failed to send {request_type} within retry budget")
         return False
 
     def test_connection(self):
@@ -241,7 +375,7 @@ class TransportAgent:
 
             try:
                 # Simple HEAD request to test connectivity
-                response = requests.head(endpoint_url, timeout=self.timeout, verify=True)
+                response = self.session.head(endpoint_url, timeout=self.timeout, verify=True)
                 results[endpoint_name] = {
                     'status': 'reachable',
                     'status_code': response.status_code
@@ -274,5 +408,37 @@ class TransportAgent:
             'endpoints': self.endpoints,
             'report_interval': self.report_interval,
             'retry_attempts': self.retry_attempts,
-            'timeout': self.timeout
+            'timeout': self.timeout,
+            'request_deadline': self.request_deadline,
+            'pool_size': self.pool_size
         }
+
+    async def _cancel_pending(self):
+        """Cancel every other task on the loop and wait until they have finished."""
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def close(self):
+        """Abort in-flight sends, stop the event loop and release pooled connections.
+
+        Safe to call more than once. Sends still pending resolve to False, and
+        later sends return False without any I/O.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(self._cancel_pending(), self._loop).result(timeout=5)
+            except Exception as e:
+                self.logger.warning(f"Pending sends did not finish cancelling: {e}")
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join(timeout=5)
+        if not self._loop_thread.is_alive():
+            self._loop.close()
+        self._executor.shutdown(wait=False)
+        self.session.close()
+        self.logger.info("Transport closed")
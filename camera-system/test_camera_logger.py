@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the shared logger: rate limiting, rendering and rotation.
+"""
+
+import sys
+import os
+import gzip
+import logging
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils import logger as app_logging
+from utils.logger import RateLimitFilter, setup_logger
+
+
+def make_record(msg="frame processed", args=None, level=logging.INFO):
+    return logging.LogRecord("Test", level, "/app/loop.py", 10, msg, args, None)
+
+
+class TestLogger(unittest.TestCase):
+    def test_rate_limit_reports_suppressed(self):
+        now = [0.0]
+        limiter = RateLimitFilter(period=10.0, burst=2, clock=lambda: now[0])
+        self.assertEqual([limiter.filter(make_record()) for _ in range(4)], [True, True, False, False])
+        self.assertTrue(limiter.filter(make_record(level=logging.CRITICAL)))
+        now[0] = 10.0
+        record = make_record()
+        self.assertTrue(limiter.filter(record))
+        self.assertIn("[2 similar message(s) suppressed]", record.msg)
+
+    def test_message_rendered_before_caller_mutates_args(self):
+        counts = {"car": 1}
+        record = app_logging._queue_handler.prepare(make_record("Counts: %s", (counts,)))
+        counts["car"] = 2
+        self.assertEqual(record.getMessage(), "Counts: {'car': 1}")
+
+    def test_rotates_into_compressed_backups(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp, "logs", "rotation.log")
+            with patch.object(app_logging, "LOG_MAX_BYTES", 200), patch.object(app_logging, "LOG_BACKUP_COUNT", 2):
+                log = setup_logger("RotationTest", path)
+            for i in range(8):
+                log.info("line %d of the rotation test", i)
+            app_logging._listener.stop()
+            app_logging._listener.start()
+
+            with gzip.open(path + ".1.gz", "rt") as f:
+                self.assertIn("RotationTest - INFO - line", f.read())
+            self.assertFalse(os.path.exists(path + ".3.gz"))
+        finally:
+            shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    unittest.main()
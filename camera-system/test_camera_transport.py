@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the transport agent's async engine.
+Covers the per-request deadline, retries and shutdown without network access.
+"""
+
+import sys
+import os
+import json
+import logging
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import requests
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import agents.transport_agent as transport_module
+from agents.transport_agent import TransportAgent
+
+
+def _response(status_code):
+    response = MagicMock()
+    response.status_code = status_code
+    response.text = ''
+    return response
+
+
+class TestTransportAgent(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.config_path = os.path.join(self.tmpdir.name, 'backend_config.json')
+        self.write_config()
+        # The production log path only exists on the device
+        self.logger_patch = patch.object(transport_module, 'setup_logger',
+                                         return_value=logging.getLogger('TransportAgentTest'))
+        self.logger_patch.start()
+        self.transports = []
+
+    def tearDown(self):
+        for transport in self.transports:
+            transport.close()
+        self.logger_patch.stop()
+        self.tmpdir.cleanup()
+
+    def write_config(self, **overrides):
+        config = {
+            'camera_id': 'CAM_001',
+            'site_id': 'SITE_001',
+            'endpoints': {'counts': 'https://example.com/ingestCounts', 'activate': '', 'status': ''},
+            'report_interval': 15,
+            'retry_attempts': 3,
+            'timeout': 1,
+            'request_deadline': 12,
+            'pool_size': 2,
+            'prewarm': False
+        }
+        config.update(overrides)
+        with open(self.config_path, 'w') as f:
+            json.dump(config, f)
+
+    def make_transport(self):
+        transport = TransportAgent(self.config_path)
+        self.transports.append(transport)
+        return transport
+
+    def test_retries_server_errors_then_succeeds(self):
+        transport = self.make_transport()
+        responses = [_response(503), _response(200)]
+        with patch.object(transport.session, 'post', side_effect=lambda *a, **kw: responses.pop(0)) as post, \
+                patch.object(transport_module.random, 'random', return_value=0.0):
+            self.assertTrue(transport.send_counts({'car': 2, 'total': 2}))
+        self.assertEqual(post.call_count, 2)
+
+    def test_client_error_is_not_retried(self):
+        transport = self.make_transport()
+        with patch.object(transport.session, 'post', return_value=_response(400)) as post:
+            self.assertFalse(transport.send_counts({'total': 0}))
+        self.assertEqual(post.call_count, 1)
+
+    def test_deadline_bounds_retries(self):
+        self.write_config(request_deadline=0.5)
+        transport = self.make_transport()
+
+        def slow_timeout(*args, **kwargs):
+            time.sleep(0.2)
+            raise requests.exceptions.Timeout()
+
+        started = time.monotonic()
+        with patch.object(transport.session, 'post', side_effect=slow_timeout) as post:
+            self.assertFalse(transport.send_counts({'total': 0}))
+        # 2^0 + jitter backoff does not fit the 0.5 s budget: one attempt, then give up
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(post.call_count, 1)
+
+    def test_close_resolves_pending_sends_and_stops_loop(self):
+        transport = self.make_transport()
+        entered = threading.Event()
+        release = threading.Event()
+
+        def stuck_post(*args, **kwargs):
+            entered.set()
+            release.wait(5)
+            return _response(200)
+
+        with patch.object(transport.session, 'post', side_effect=stuck_post):
+            future = transport.send_counts_async({'total': 1})
+            self.assertTrue(entered.wait(2))
+            transport.close()
+            self.assertFalse(future.result(timeout=2))
+            release.set()
+
+        self.assertFalse(transport._loop_thread.is_alive())
+        # Closed transports fail fast instead of hanging the caller
+        self.assertFalse(transport.send_counts({'total': 1}))
+        transport.close()
+
+    def test_prewarm_sends_options_only(self):
+        self.write_config(prewarm=True)
+        warmed = threading.Event()
+
+        def options(method, url, **kwargs):
+            warmed.set()
+            return _response(204)
+
+        with patch('requests.Session.request', side_effect=options) as request, \
+                patch('requests.Session.post') as post:
+            self.make_transport()
+            self.assertTrue(warmed.wait(2))
+        request.assert_called_once()
+        self.assertEqual(request.call_args[0][:2], ('OPTIONS', 'https://example.com/ingestCounts'))
+        self.assertLessEqual(request.call_args[1]['timeout'], 1)
+        post.assert_not_called()
+
+    def test_prewarm_failure_is_not_fatal(self):
+        self.write_config(prewarm=True)
+        failed = threading.Event()
+
+        def refuse(method, url, **kwargs):
+            failed.set()
+            raise requests.exceptions.ConnectionError("refused")
+
+        with patch('requests.Session.request', side_effect=refuse):
+            transport = self.make_transport()
+            self.assertTrue(failed.wait(2))
+        with patch.object(transport.session, 'post', return_value=_response(200)):
+            self.assertTrue(transport.send_counts({'total': 1}))
+
+
+if __name__ == '__main__':
+    unittest.main()
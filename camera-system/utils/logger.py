@@ -1,21 +1,151 @@
+import atexit
+import gzip
 import logging
+import logging.handlers
+import os
+import queue
+import shutil
 import sys
+import threading
+import time
+
+_FORMATTER = logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+# Log files rotate at LOG_MAX_BYTES, keeping LOG_BACKUP_COUNT gzip-compressed backups
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+# At most RATE_LIMIT_BURST records per RATE_LIMIT_PERIOD seconds from one call site
+RATE_LIMIT_PERIOD = 10.0
+RATE_LIMIT_BURST = 10
+
+# One queue and one writer thread for the whole process; one file handler per log file
+_queue = queue.Queue(maxsize=10000)
+_lock = threading.Lock()
+_console_handler = None
+_file_handlers = {}
+_listener = None
+
+class RateLimitFilter(logging.Filter):
+    """
+    Per call site (file:line) rate limiting.
+
+    At most `burst` records per `period` seconds pass from one call site;
+    the rest are dropped and counted, and the next record that passes
+    reports how many were suppressed. CRITICAL always passes.
+    """
+
+    def __init__(self, period=RATE_LIMIT_PERIOD, burst=RATE_LIMIT_BURST, clock=time.monotonic):
+        super().__init__()
+        self.period = period
+        self.burst = burst
+        self.clock = clock
+        self.sites = {}  # {(pathname, lineno): [window_start, passed, suppressed]}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.CRITICAL or not self.burst:
+            return True
+        key = (record.pathname, record.lineno)
+        now = self.clock()
+        with self.lock:
+            site = self.sites.get(key)
+            if site is None:
+                site = self.sites[key] = [now, 0, 0]
+            if now - site[0] >= self.period:
+                site[0], site[1] = now, 0
+            if site[1] >= self.burst:
+                site[2] += 1
+                return False
+            site[1] += 1
+            suppressed, site[2] = site[2], 0
+        if suppressed:
+            record.msg = f"{record.msg} [{suppressed} similar message(s) suppressed]"
+        return True
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Renders the message on the calling thread and enqueues it; drops records when the queue is full."""
+
+    def prepare(self, record):
+        # Like the stdlib: render msg % args before the caller can mutate the arguments
+        record = super().prepare(record)
+        record.stack_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+class _Router(logging.Handler):
+    """Listener-side handler: console for everything, plus the file of the record's logger."""
+
+    def __init__(self):
+        super().__init__()
+        self.routes = {}  # {logger name: file handler}
+
+    def emit(self, record):
+        if _console_handler:
+            _console_handler.handle(record)
+        file_handler = self.routes.get(record.name)
+        if file_handler:
+            file_handler.handle(record)
+
+_router = _Router()
+_queue_handler = _QueueHandler(_queue)
+_queue_handler.addFilter(RateLimitFilter())
+
+def _stop_listener():
+    # Flushes queued records at exit
+    if _listener and _listener._thread:
+        _listener.stop()
+
+def _gzip_rotator(source, dest):
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+def _create_file_handler(log_file):
+    """Size-rotated, gzip-compressed file handler, or None if the file cannot be opened."""
+    try:
+        os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT
+        )
+    except OSError as e:
+        sys.stderr.write(f"File logging to {log_file} disabled: {e}\n")
+        return None
+    file_handler.namer = lambda name: name + ".gz"
+    file_handler.rotator = _gzip_rotator
+    file_handler.setFormatter(_FORMATTER)
+    return file_handler
 
 def setup_logger(name, log_file=None, level=logging.INFO):
+    """
+    Returns the named logger. Safe to call repeatedly: handlers are attached
+    only once per logger and once per log file, so output is never duplicated.
+    Writes happen on a background listener thread.
+    """
+    global _console_handler, _listener
     logger = logging.getLogger(name)
     logger.setLevel(level)
 
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+    with _lock:
+        if _listener is None:
+            _console_handler = logging.StreamHandler(sys.stdout)
+            _console_handler.setFormatter(_FORMATTER)
+            _listener = logging.handlers.QueueListener(_queue, _router)
+            _listener.start()
+            atexit.register(_stop_listener)
 
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+        if log_file:
+            if log_file not in _file_handlers:
+                _file_handlers[log_file] = _create_file_handler(log_file)
+            if _file_handlers[log_file]:
+                _router.routes[name] = _file_handlers[log_file]
 
-    if log_file:
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        if _queue_handler not in logger.handlers:
+            logger.addHandler(_queue_handler)
 
     return logger
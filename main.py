@@ -10,7 +10,7 @@ def signal_handler(sig, frame):
     logger.info("Shutdown signal received. Cleaning up...")
     orch = get_orchestrator()
     if orch:
-        orch.stop_detection()
+        orch.stop(wait=True, timeout=10.0)
     logger.info("System exited gracefully.")
     sys.exit(0)
 
@@ -34,23 +34,30 @@ def main():
     # 2. Wait a moment for Flask to bind
     time.sleep(1)
 
+    orch = get_orchestrator()
+
     # Start Remote Command Listener
     from utils.command_listener import CommandListener
     from utils.binding_manager import BindingManager
     binding = BindingManager()
     if binding.is_bound():
-        CommandListener(binding.serial_number).start()
+        state_source = (lambda: orch.state) if orch else None
+        CommandListener(binding.serial_number, state_source=state_source).start()
         logger.info("Remote control enabled")
     else:
         logger.warning("Device not bound - remote control disabled")
 
-    # 3. Initialize and START orchestrator (Blocks on main thread for GUI)
-    orch = get_orchestrator()
+    # 3. START orchestrator (returns immediately; pipeline threads are owned by the orchestrator)
     if orch:
-        logger.info("Starting detection loop on main thread...")
-        orch.start_detection()
+        logger.info("Starting detection pipeline...")
+        orch.start()
     else:
         logger.error("Failed to initialize Orchestrator.")
 
+    # Keep the process alive for the API until a shutdown signal arrives,
+    # even if the pipeline is stopped and restarted through the API
+    while True:
+        time.sleep(3600)
+
 if __name__ == "__main__":
     main()
@@ -22,12 +22,12 @@ def main():
     
     def signal_handler(sig, frame):
         print("\nStopping...")
-        orch.stop_detection()
+        orch.stop(wait=True, timeout=10.0)
         sys.exit(0)
         
     signal.signal(signal.SIGINT, signal_handler)
     
-    orch.start_detection()
+    orch.start(wait=True)
     
     print("\n[ACTIVE] Live window should now be visible on your RPi screen.")
     print("Press Ctrl+C in this terminal to exit.")
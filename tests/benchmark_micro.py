@@ -0,0 +1,290 @@
+"""
+Hardware-free micro-benchmarks of the pipeline's hot functions.
+
+Runs on any Linux box (no camera, no Hailo, no backend) and compares each
+case against a committed baseline:
+
+    python tests/benchmark_micro.py                      # compare with tests/benchmark_baseline.json
+    python tests/benchmark_micro.py --update-baseline    # record a new baseline
+    python tests/benchmark_micro.py --only crossline --output results.json
+
+Per case it reports p50/p95/p99/mean latency and the transient heap
+allocated per call (tracemalloc peak, measured in a separate pass so it
+does not skew the timings). A case regresses when its p50 exceeds the
+baseline by more than its threshold (or allocates that much more per
+call); the exit code is then 1.
+Baselines are machine-specific: record them on the reference device.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agents.inference_agent_hailo import InferenceAgent
+from agents.counting_agent import CountingAgent
+from agents.crossline_counter import CrosslineCounter
+from agents.orchestrator import Orchestrator
+from agents.transport_agent import TransportAgent
+from utils.binding_manager import BindingManager
+from utils.frame_broadcaster import FrameBroadcaster
+from utils import compact_codec
+from utils.logger import get_logger
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "benchmark_baseline.json")
+DEFAULT_THRESHOLD = 0.25
+
+COCO_CLASSES = {0: "Pedestrians", 2: "Cars", 3: "Motorcycles", 5: "Buses", 7: "Trucks"}
+
+# ---------------------------------------------------------------- fixtures
+
+def make_frame(width=1920, height=1080, seed=1):
+    """Street-like synthetic frame: gradients, blocks and mild noise (JPEG-realistic, unlike pure noise)."""
+    rng = np.random.default_rng(seed)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    x = np.linspace(0, 255, width, dtype=np.float32)[None, :]
+    frame = np.dstack([(0.6 * y + 0.4 * x), (0.3 * y + 0.7 * x), (0.5 * y + 0.2 * x)]).astype(np.uint8)
+    for _ in range(60):
+        x1, y1 = int(rng.integers(0, width - 200)), int(rng.integers(0, height - 150))
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        cv2.rectangle(frame, (x1, y1), (x1 + int(rng.integers(40, 200)), y1 + int(rng.integers(30, 150))), color, -1)
+    noise = rng.integers(0, 12, frame.shape, dtype=np.uint8)
+    return cv2.add(frame, noise)
+
+def make_crowd_output(people=120, vehicles=60, seed=2):
+    """Class-separated NMS output ([batch][80 classes] -> (n, 5) arrays) for a busy scene."""
+    rng = np.random.default_rng(seed)
+    per_class = [np.zeros((0, 5), dtype=np.float32) for _ in range(80)]
+
+    def boxes(n):
+        y1 = rng.uniform(0, 0.9, n)
+        x1 = rng.uniform(0, 0.9, n)
+        h = rng.uniform(0.02, 0.1, n)
+        w = rng.uniform(0.01, 0.08, n)
+        score = rng.uniform(0.2, 0.95, n)
+        return np.stack([y1, x1, y1 + h, x1 + w, score], axis=1).astype(np.float32)
+
+    per_class[0] = boxes(people)
+    per_class[2] = boxes(int(vehicles * 0.7))
+    per_class[7] = boxes(int(vehicles * 0.2))
+    per_class[5] = boxes(int(vehicles * 0.1))
+    # Low-confidence clutter on classes that are not counted
+    per_class[9] = boxes(40)
+    return [per_class]
+
+def make_detections(n=150, width=1920, height=1080, seed=3):
+    rng = random.Random(seed)
+    classes = list(COCO_CLASSES.values())
+    detections = []
+    for i in range(n):
+        x1, y1 = rng.randint(0, width - 120), rng.randint(0, height - 120)
+        detections.append({
+            "class": rng.choice(classes),
+            "confidence": rng.uniform(0.2, 0.95),
+            "bbox": [x1, y1, x1 + rng.randint(20, 120), y1 + rng.randint(20, 120)],
+            "object_id": i + 1
+        })
+    return detections
+
+def make_track_frames(tracks, frames=60, width=1920, height=1080, seed=4):
+    """Frames of `tracks` objects moving steadily across a vertical crossline."""
+    rng = random.Random(seed)
+    objects = [(i + 1, rng.uniform(0, width), rng.uniform(0, height), rng.uniform(-15, 15), rng.uniform(-5, 5))
+               for i in range(tracks)]
+    sequence = []
+    for f in range(frames):
+        detections = []
+        for obj_id, x, y, dx, dy in objects:
+            cx, cy = (x + dx * f) % width, (y + dy * f) % height
+            detections.append({"object_id": obj_id, "class": "Cars", "confidence": 0.8,
+                               "bbox": [int(cx - 20), int(cy - 15), int(cx + 20), int(cy + 15)]})
+        sequence.append(detections)
+    return sequence
+
+# ---------------------------------------------------------------- cases
+
+def build_cases():
+    """Returns {name: (callable, iterations)}; each callable runs one call of the hot function."""
+    cases = {}
+    frame = make_frame()
+
+    inference = InferenceAgent()
+    input_size = tuple(inference.config.get("input_size", [640, 640]))
+    cases["preprocess"] = (lambda: inference._preprocess(frame, input_size), 300)
+
+    crowd = make_crowd_output()
+    cases["postprocess_crowd"] = (lambda: inference._postprocess(crowd, (1920, 1080), input_size), 300)
+
+    counter = CountingAgent()
+    detections = make_detections()
+    cases["count_objects"] = (lambda: counter.count_objects(detections), 2000)
+
+    binding = SimpleNamespace(camera_id="BENCH_CAM")
+    crossline = {"point1": {"x": 0.5, "y": 0.0}, "point2": {"x": 0.5, "y": 1.0}}
+    for tracks in (50, 200, 500):
+        crossline_counter = CrosslineCounter(binding, crossline=crossline)
+        frames = make_track_frames(tracks)
+        state = {"i": 0}
+
+        def crossline_step(c=crossline_counter, frames=frames, state=state):
+            state["i"] = (state["i"] + 1) % len(frames)
+            return c.process(frames[state["i"]], 1920, 1080)
+        cases[f"crossline_{tracks}_tracks"] = (crossline_step, 300)
+
+    annotator = SimpleNamespace(fps=7.0, logger=get_logger("Benchmark"))
+    annotate_detections = make_detections(60)
+    cases["annotate_frame"] = (lambda: Orchestrator._annotate_frame(annotator, frame, annotate_detections), 200)
+
+    with open("config/camera_config.json") as f:
+        ladder = json.load(f).get("preview", {}).get("renditions")
+    broadcaster = FrameBroadcaster(ladder=ladder)
+    for rendition in broadcaster.renditions:
+        cases[f"jpeg_{rendition.name}_q{rendition.encode_params[1]}"] = (
+            lambda r=rendition: broadcaster._encode(r, frame), 100)
+
+    transport = TransportAgent()
+    transport.binding = BindingManager(binding_path=os.path.join(os.path.dirname(__file__), "_bench_binding.json"))
+    transport.binding.config = {"bound": True, "endpoint": "http://127.0.0.1:9/ingest", "auth_token": "bench",
+                                "camera_id": "BENCH_CAM", "site_id": "bench-site", "payload_format": "universal"}
+    report = {"Pedestrians": 12, "Cars": 31, "Buses": 2, "Trucks": 5, "Motorcycles": 1, "total": 51,
+              "timestamp": "2026-01-12T20:00:00Z", "fps": 7.1,
+              "hardware": {"cpu_temp": 61.3, "hailo_temp": 48.2, "hailo_load": 35.0,
+                           "stats": {"cpu_temp": {"min": 60.1, "max": 62.0, "avg": 61.2}}},
+              "interval_start": "2026-01-12T19:59:45Z", "interval_s": 15.0, "late": False}
+    cases["payload_build"] = (lambda: transport._build_counts_payload(report), 2000)
+    encoder = compact_codec.CompactEncoder(transport.binding.serial_number, use_delta=True)
+    payload = transport._build_counts_payload(report)
+    cases["payload_compact_encode"] = (lambda: encoder.encode(payload), 2000)
+    return cases
+
+# ---------------------------------------------------------------- runner
+
+def run_case(func, iterations, warmup=10):
+    for _ in range(warmup):
+        func()
+    timings = []
+    perf = time.perf_counter_ns
+    for _ in range(iterations):
+        started = perf()
+        func()
+        timings.append(perf() - started)
+    timings.sort()
+
+    # Separate pass: tracemalloc slows every allocation
+    alloc_runs = min(iterations, 20)
+    tracemalloc.start()
+    peaks = []
+    for _ in range(alloc_runs):
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        func()
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+
+    def pct(q):
+        return timings[min(len(timings) - 1, int(q * len(timings)))] / 1000.0
+    return {
+        "iterations": iterations,
+        "p50_us": round(pct(0.50), 2),
+        "p95_us": round(pct(0.95), 2),
+        "p99_us": round(pct(0.99), 2),
+        "mean_us": round(sum(timings) / len(timings) / 1000.0, 2),
+        "alloc_kib_per_call": round(sorted(peaks)[len(peaks) // 2] / 1024.0, 1)
+    }
+
+def compare(results, baseline, default_threshold):
+    """Returns {case: verdict dict}; a case regresses when p50 exceeds baseline * (1 + threshold)."""
+    verdicts = {}
+    for name, result in results.items():
+        base = baseline.get("cases", {}).get(name)
+        if not base:
+            verdicts[name] = {"status": "new"}
+            continue
+        threshold = base.get("threshold", default_threshold)
+        ratio = result["p50_us"] / base["p50_us"] if base["p50_us"] else 1.0
+        # Allocation growth counts too, ignoring sub-KiB jitter
+        alloc_base = base.get("alloc_kib_per_call", 0.0)
+        alloc_grew = result["alloc_kib_per_call"] > max(alloc_base * (1 + threshold), alloc_base + 1.0)
+        verdicts[name] = {
+            "status": "regression" if ratio > 1 + threshold or alloc_grew else "ok",
+            "ratio": round(ratio, 3),
+            "threshold": threshold
+        }
+    return verdicts
+
+def machine_info():
+    return {"machine": platform.machine(), "python": platform.python_version(),
+            "opencv": cv2.__version__, "numpy": np.__version__, "cpus": os.cpu_count()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed p50 slowdown for cases without their own threshold (0.25 = 25%%)")
+    parser.add_argument("--only", help="Run only cases whose name contains this string")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    # Single-threaded OpenCV so results do not depend on idle cores
+    cv2.setNumThreads(1)
+    cases = build_cases()
+    if args.only:
+        cases = {k: v for k, v in cases.items() if args.only in k}
+
+    results = {name: run_case(func, iterations) for name, (func, iterations) in cases.items()}
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    verdicts = compare(results, baseline, args.threshold)
+
+    print(f"\n--- Micro-benchmarks ({platform.machine()}, Python {platform.python_version()}) ---")
+    print(f"{'Case':<28} | {'p50 us':>10} | {'p95 us':>10} | {'p99 us':>10} | {'KiB/call':>8} | {'vs base':>8} | Status")
+    print("-" * 100)
+    for name, r in results.items():
+        v = verdicts[name]
+        ratio = f"{v['ratio']:.2f}x" if "ratio" in v else "-"
+        print(f"{name:<28} | {r['p50_us']:>10.1f} | {r['p95_us']:>10.1f} | {r['p99_us']:>10.1f} | "
+              f"{r['alloc_kib_per_call']:>8.1f} | {ratio:>8} | {v['status']}")
+    print("-" * 100)
+
+    report = {"machine": machine_info(), "cases": results, "verdicts": verdicts}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        cases_out = dict(baseline.get("cases", {}))
+        for name, r in results.items():
+            entry = {"p50_us": r["p50_us"], "p95_us": r["p95_us"], "alloc_kib_per_call": r["alloc_kib_per_call"]}
+            if "threshold" in cases_out.get(name, {}):
+                entry["threshold"] = cases_out[name]["threshold"]
+            cases_out[name] = entry
+        with open(args.baseline, "w") as f:
+            json.dump({"machine": machine_info(), "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                       "cases": cases_out}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    regressions = [name for name, v in verdicts.items() if v["status"] == "regression"]
+    if regressions:
+        print(f"REGRESSION in: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
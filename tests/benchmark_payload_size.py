@@ -0,0 +1,62 @@
+import gzip
+import json
+import random
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import compact_codec
+
+def make_reports(num_reports=720, seed=1):
+    """One hour of 5 s universal-format reports with slowly varying counts."""
+    rng = random.Random(seed)
+    counts = {"Pedestrians": 4, "Cars": 10, "Buses": 1, "Trucks": 2, "Motorcycles": 0}
+    reports = []
+    for i in range(num_reports):
+        for k in counts:
+            counts[k] = max(0, counts[k] + rng.choice([-1, 0, 0, 0, 1]))
+        data = dict(counts)
+        data["total"] = sum(counts.values())
+        data["timestamp"] = f"2026-01-12T20:{(i * 5) // 60 % 60:02d}:{(i * 5) % 60:02d}Z"
+        data["fps"] = round(7.0 + rng.random(), 1)
+        data["hardware"] = {"cpu_temp": 61.3, "hailo_temp": 48.2, "hailo_load": None}
+        reports.append({
+            "identity": {"serial": "HAILO-A001-10000000abcdef01", "camera_id": "CAM_01",
+                         "site_id": "global-innovation-anaheim-001"},
+            "environment": {"timestamp": data["timestamp"], "uptime": 5.0 * i},
+            "data": {"type": "object_counts", "counts": data}
+        })
+    return reports
+
+def benchmark():
+    reports = make_reports()
+    n = len(reports)
+
+    json_bytes = sum(len(json.dumps(r).encode()) for r in reports)
+    json_gzip_bytes = sum(len(gzip.compress(json.dumps(r).encode())) for r in reports)
+
+    tagged = compact_codec.CompactEncoder("HAILO-A001-10000000abcdef01", use_delta=False)
+    tagged_bytes = sum(len(tagged.encode(r)[0]) for r in reports)
+
+    delta = compact_codec.CompactEncoder("HAILO-A001-10000000abcdef01", use_delta=True)
+    decoder = compact_codec.CompactDecoder()
+    delta_bytes = 0
+    for r in reports:
+        body, seq, counts = delta.encode(r)
+        delta_bytes += len(body)
+        assert decoder.decode(body) == r, "Round trip mismatch"
+        delta.ack(seq, counts)
+
+    print(f"\n--- Payload Size Benchmark ({n} reports) ---")
+    print(f"{'Encoding':<22} | {'Bytes/report':>12} | {'vs JSON':>8}")
+    print("-" * 48)
+    for name, total in [("JSON", json_bytes), ("JSON + gzip", json_gzip_bytes),
+                        (compact_codec.ENCODING_NAME, tagged_bytes),
+                        (f"{compact_codec.ENCODING_NAME} + delta", delta_bytes)]:
+        print(f"{name:<22} | {total / n:>12.1f} | {total / json_bytes:>7.0%}")
+    print("-" * 48)
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,222 @@
+"""
+Fleet load generator for the ingest path.
+
+Spins up N simulated devices, each a real TransportAgent with its own
+BindingManager identity and outbox, and produces counts reports at the
+configured interval against the local mock ingestion server (or any URL).
+
+Reports device-side send latency, retry amplification (requests seen by
+the backend per delivered report) and outbox queue growth.
+
+Usage:
+    python3 tests/load_generator.py --devices 50 --interval 5 --duration 120 \
+        --error-rate 0.05 --outage-at 30 --outage-duration 20
+"""
+
+import argparse
+import json
+import random
+import shutil
+import sys
+import os
+import tempfile
+import threading
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agents.transport_agent import TransportAgent
+from utils.binding_manager import BindingManager
+from tests.mock_ingest_server import start_server
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+class SimulatedDevice:
+    """One TransportAgent with its own identity, outbox and latency probe."""
+
+    def __init__(self, index, endpoint, workdir, payload_format, batch, rng):
+        self.index = index
+        self.rng = rng
+        device_dir = os.path.join(workdir, f"device_{index:04d}")
+        os.makedirs(device_dir, exist_ok=True)
+
+        self.binding = BindingManager(binding_path=os.path.join(device_dir, "binding.json"))
+        self.binding.serial_number = f"HAILO-SIM-{index:06d}"
+        self.binding.bind({
+            "endpoint": endpoint,
+            "auth_token": f"sim-token-{index}",
+            "payload_format": payload_format,
+            "tenant_id": "SIM_TENANT",
+            "site_id": f"SIM_SITE_{index // 10:03d}",
+            "camera_id": f"SIM_CAM_{index:04d}"
+        })
+
+        self.transport = TransportAgent()
+        self.transport.binding = self.binding
+        self.transport.config["outbox"] = dict(self.transport.config.get("outbox", {}),
+                                               path=os.path.join(device_dir, "outbox.db"))
+        self.transport.config["batch"] = dict(self.transport.config.get("batch", {}), enabled=batch)
+
+        self.latencies = []
+        self.lock = threading.Lock()
+        original_post = self.transport.session.post
+
+        def timed_post(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original_post(*args, **kwargs)
+            finally:
+                with self.lock:
+                    self.latencies.append(time.perf_counter() - started)
+        self.transport.session.post = timed_post
+
+        self.counts = {"Pedestrians": 3, "Cars": 8, "Buses": 0, "Trucks": 1, "Motorcycles": 0}
+        self.reports_generated = 0
+
+    def next_counts(self):
+        for k in self.counts:
+            self.counts[k] = max(0, self.counts[k] + self.rng.choice([-1, 0, 0, 1]))
+        data = dict(self.counts)
+        data["total"] = sum(self.counts.values())
+        data["timestamp"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        return data
+
+    def report(self):
+        self.transport.enqueue_counts(self.next_counts())
+        self.reports_generated += 1
+
+    def queue_depth(self):
+        outbox = self.transport.outbox
+        return outbox.count() if outbox else 0
+
+    def stop(self, flush_timeout):
+        """Stops the transport after flushing; returns the reports still left in the outbox."""
+        # stop() closes and drops the outbox, so keep a reference for the final count
+        outbox = self.transport.outbox
+        self.transport.stop(flush_timeout=flush_timeout)
+        return outbox.count() if outbox else 0
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    server = None
+    state = None
+    endpoint = args.url
+    if not endpoint:
+        server, state, base_url = start_server(latency=args.latency, jitter=args.jitter,
+                                               error_rate=args.error_rate, accept_batch=not args.no_batch,
+                                               accept_compact=args.compact, seed=args.seed)
+        endpoint = f"{base_url}/ingestCounts"
+        print(f"Started mock ingest server at {base_url}")
+
+    workdir = tempfile.mkdtemp(prefix="aiod_load_")
+    print(f"Creating {args.devices} simulated device(s) in {workdir}...")
+    devices = [SimulatedDevice(i, endpoint, workdir, args.format, args.batch, random.Random(rng.random()))
+               for i in range(args.devices)]
+    for device in devices:
+        device.transport.start()
+
+    # Realistic schedule: each device reports every interval with its own phase
+    next_due = [time.time() + rng.uniform(0, args.interval) for _ in devices]
+    start = time.time()
+    outage_started = False
+    queue_samples = []
+    last_sample = 0
+
+    print(f"{'Time':>6} | {'Generated':>9} | {'Queued':>7} | {'Backend reqs':>12} | {'Delivered':>9}")
+    print("-" * 56)
+    try:
+        while time.time() - start < args.duration:
+            now = time.time()
+            for i, device in enumerate(devices):
+                if now >= next_due[i]:
+                    device.report()
+                    next_due[i] += args.interval
+
+            if state and args.outage_at is not None and not outage_started and now - start >= args.outage_at:
+                state.start_outage(args.outage_duration)
+                outage_started = True
+                print(f"  >>> Simulated outage for {args.outage_duration}s")
+
+            if now - last_sample >= 1.0:
+                depth = sum(d.queue_depth() for d in devices)
+                queue_samples.append((now - start, depth))
+                last_sample = now
+                if int(now - start) % 5 == 0:
+                    generated = sum(d.reports_generated for d in devices)
+                    stats = state.stats() if state else {"requests": "-", "reports": "-"}
+                    print(f"{now - start:>5.0f}s | {generated:>9} | {depth:>7} | "
+                          f"{stats['requests']:>12} | {stats['reports']:>9}")
+            time.sleep(0.05)
+    except KeyboardInterrupt:
+        print("\nLoad test stopped by user.")
+
+    pre_drain = sum(d.queue_depth() for d in devices)
+    print("\nDraining outboxes...")
+    remaining = sum(d.stop(args.drain_timeout) for d in devices)
+
+    latencies = [lat for d in devices for lat in d.latencies]
+    generated = sum(d.reports_generated for d in devices)
+    results = {
+        "devices": args.devices,
+        "interval_s": args.interval,
+        "duration_s": round(time.time() - start, 1),
+        "reports_generated": generated,
+        "send_latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 1),
+            "p95": round(percentile(latencies, 95) * 1000, 1),
+            "p99": round(percentile(latencies, 99) * 1000, 1),
+            "max": round(max(latencies) * 1000, 1) if latencies else 0.0,
+            "samples": len(latencies)
+        },
+        "queue_depth": {
+            "max": max((d for _, d in queue_samples), default=0),
+            "pre_drain": pre_drain,
+            # Left undelivered after the drain; persisted for the next start
+            "final": remaining
+        }
+    }
+    if state:
+        stats = state.stats()
+        results["backend"] = stats
+        results["delivered_ratio"] = round(stats["reports"] / generated, 3) if generated else 0.0
+        # Requests the backend had to serve per report that actually landed
+        results["retry_amplification"] = round(stats["requests"] / max(stats["reports"], 1), 2)
+        server.shutdown()
+
+    print("\n--- Load Test Results ---")
+    print(json.dumps(results, indent=2))
+    shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fleet load generator for the ingest path")
+    parser.add_argument("--devices", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=5.0, help="Report interval per device (s)")
+    parser.add_argument("--duration", type=float, default=60.0, help="Test duration (s)")
+    parser.add_argument("--format", default="universal", choices=["universal", "legacy", "aiod05"])
+    parser.add_argument("--batch", action="store_true", help="Enable TransportAgent batch mode")
+    parser.add_argument("--url", default=None, help="Target an existing server instead of the built-in mock")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--no-batch", action="store_true", help="Mock backend rejects batch envelopes")
+    parser.add_argument("--compact", action="store_true", help="Mock backend advertises compact encoding")
+    parser.add_argument("--outage-at", type=float, default=None, help="Start a backend outage after N seconds")
+    parser.add_argument("--outage-duration", type=float, default=20.0)
+    parser.add_argument("--drain-timeout", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=1)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
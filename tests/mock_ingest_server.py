@@ -0,0 +1,269 @@
+"""
+Local stand-in for the ingestCounts Cloud Function.
+
+Accepts the same three schemas as IngestionAgent.handleReport (universal,
+aiod05, legacy), plus batch envelopes, gzip/deflate bodies and compact
+CBOR payloads. Latency, 5xx errors and outages can be injected so the
+device transport can be exercised without touching the real backend.
+
+Usage:
+    python3 tests/mock_ingest_server.py --port 8080 --latency 0.2 --error-rate 0.05
+
+Admin endpoints:
+    GET  /_stats           request/report counters and latency summary
+    POST /_admin/outage    {"duration": 30}  -> return 503 for 30 s
+    POST /_admin/faults    {"latency": 0.5, "jitter": 0.1, "error_rate": 0.1}
+    POST /_admin/reset     clear counters
+"""
+
+import argparse
+import gzip
+import json
+import random
+import sys
+import os
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import compact_codec
+
+
+def normalize(body):
+    """Python mirror of IngestionAgent.normalize(). Returns (payload, error)."""
+    if not isinstance(body, dict):
+        return None, 'Unsupported or malformed payload schema'
+    if body.get('identity') and body.get('data'):
+        payload = {
+            'siteId': body['identity'].get('site_id'),
+            'cameraId': body['identity'].get('camera_id'),
+            'timestamp': (body.get('environment') or {}).get('timestamp'),
+            'counts': body['data'].get('counts')
+        }
+    elif body.get('tenant_id') and body.get('data'):
+        payload = {
+            'siteId': body.get('site_id'),
+            'cameraId': body.get('camera_id'),
+            'timestamp': body.get('timestamp'),
+            'counts': body['data'].get('counts')
+        }
+    elif body.get('site_id') and body.get('camera_id'):
+        payload = {
+            'siteId': body.get('site_id'),
+            'cameraId': body.get('camera_id'),
+            'timestamp': body.get('timestamp'),
+            'counts': body.get('counts')
+        }
+    else:
+        return None, 'Unsupported or malformed payload schema'
+
+    if not payload['siteId'] or not payload['cameraId']:
+        return None, 'Missing identity fields (site_id/camera_id)'
+    return payload, None
+
+
+class MockIngestState:
+    """Fault configuration and counters shared by all request handlers."""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, accept_batch=True, accept_compact=False, seed=None):
+        self.lock = threading.Lock()
+        self.rng = random.Random(seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.accept_batch = accept_batch
+        self.accept_compact = accept_compact
+        self.outage_until = 0.0
+        self.decoder = compact_codec.CompactDecoder()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = 0
+            self.reports = 0
+            self.rejected = 0
+            self.errors_injected = 0
+            self.outage_rejections = 0
+            self.bytes_received = 0
+            self.per_camera = {}
+            self.reports_log = []
+
+    def start_outage(self, duration):
+        with self.lock:
+            self.outage_until = time.time() + duration
+
+    def stats(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'reports': self.reports,
+                'rejected': self.rejected,
+                'errors_injected': self.errors_injected,
+                'outage_rejections': self.outage_rejections,
+                'bytes_received': self.bytes_received,
+                'cameras': len(self.per_camera),
+                'in_outage': time.time() < self.outage_until
+            }
+
+
+class MockIngestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like Cloud Functions
+    state = None
+
+    def log_message(self, fmt, *args):
+        pass  # Silence per-request logging
+
+    def _reply(self, status, body, headers=None):
+        raw = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(raw)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _read_body(self):
+        raw = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        encoding = (self.headers.get('Content-Encoding') or '').lower()
+        if encoding == 'gzip':
+            raw = gzip.decompress(raw)
+        elif encoding == 'deflate':
+            raw = zlib.decompress(raw)
+        return raw
+
+    def do_GET(self):
+        if self.path == '/_stats':
+            return self._reply(200, self.state.stats())
+        return self._reply(404, {'error': 'Not found'})
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_POST(self):
+        state = self.state
+        if self.path.startswith('/_admin/'):
+            return self._admin(self.path[len('/_admin/'):])
+
+        raw = self._read_body()
+        with state.lock:
+            state.requests += 1
+            state.bytes_received += len(raw)
+            delay = max(0.0, state.latency + state.rng.uniform(-state.jitter, state.jitter))
+            in_outage = time.time() < state.outage_until
+            inject_error = not in_outage and state.rng.random() < state.error_rate
+        if delay:
+            time.sleep(delay)
+
+        if in_outage:
+            with state.lock:
+                state.outage_rejections += 1
+            return self._reply(503, {'error': 'Service Unavailable (simulated outage)'})
+        if inject_error:
+            with state.lock:
+                state.errors_injected += 1
+            return self._reply(500, {'error': 'Internal Server Error (injected)'})
+
+        try:
+            if (self.headers.get('Content-Type') or '').startswith(compact_codec.CONTENT_TYPE):
+                if not state.accept_compact:
+                    return self._reply(415, {'error': 'Unsupported media type'})
+                try:
+                    body = state.decoder.decode(raw)
+                except KeyError as e:
+                    return self._reply(409, {'error': str(e)})
+            else:
+                body = json.loads(raw or b'{}')
+        except Exception as e:
+            return self._reply(400, {'error': f'Malformed body: {e}'})
+
+        if isinstance(body, dict) and body.get('batch_version') and isinstance(body.get('reports'), list):
+            if not state.accept_batch:
+                return self._reply(400, {'error': 'Unsupported or malformed payload schema'})
+            reports = body['reports']
+        else:
+            reports = [body]
+
+        normalized = []
+        for report in reports:
+            payload, error = normalize(report)
+            if error:
+                with state.lock:
+                    state.rejected += 1
+                return self._reply(400, {'error': error})
+            normalized.append(payload)
+
+        with state.lock:
+            for payload in normalized:
+                state.reports += 1
+                key = (payload['siteId'], payload['cameraId'])
+                state.per_camera[key] = state.per_camera.get(key, 0) + 1
+                state.reports_log.append((time.time(), key, payload.get('timestamp')))
+
+        headers = {}
+        if state.accept_compact:
+            headers[compact_codec.ENCODING_HEADER] = compact_codec.ENCODING_NAME
+        return self._reply(200, {'success': True, 'message': 'Data ingested successfully',
+                                 'count': len(normalized)}, headers)
+
+    def _admin(self, action):
+        state = self.state
+        try:
+            params = json.loads(self._read_body() or b'{}')
+        except Exception:
+            params = {}
+        if action == 'outage':
+            state.start_outage(float(params.get('duration', 30)))
+        elif action == 'faults':
+            with state.lock:
+                state.latency = float(params.get('latency', state.latency))
+                state.jitter = float(params.get('jitter', state.jitter))
+                state.error_rate = float(params.get('error_rate', state.error_rate))
+        elif action == 'reset':
+            state.reset()
+        else:
+            return self._reply(404, {'error': f'Unknown admin action {action}'})
+        return self._reply(200, state.stats())
+
+
+def start_server(port=0, host='127.0.0.1', **fault_kwargs):
+    """Starts the mock server on a background thread. Returns (server, state, base_url)."""
+    state = MockIngestState(**fault_kwargs)
+    handler = type('BoundMockIngestHandler', (MockIngestHandler,), {'state': state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local mock ingestion server')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0, help='Base response latency (s)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Latency jitter (+/- s)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 500')
+    parser.add_argument('--no-batch', action='store_true', help='Reject batch envelopes like an old backend')
+    parser.add_argument('--compact', action='store_true', help='Advertise and accept compact CBOR payloads')
+    args = parser.parse_args()
+
+    server, state, url = start_server(args.port, args.host, latency=args.latency, jitter=args.jitter,
+                                      error_rate=args.error_rate, accept_batch=not args.no_batch,
+                                      accept_compact=args.compact)
+    print(f"Mock ingest server listening on {url} (POST any path). Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(10)
+            print(json.dumps(state.stats()))
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,473 @@
+"""
+Replay-driven accuracy-vs-cost sweep.
+
+Replays recorded detection streams that have ground-truth counts through the
+counting and tracking path at a grid of settings:
+- frame rate: target_fps, the pacing of the pipeline loops
+- detector threshold: confidence_threshold in detection_config.json
+- counting threshold: min_confidence in counting_config.json
+- skip factor: run inference on every Nth paced frame, as the governor's
+  inference_rate step does
+
+For each setting it reports counting error against CPU and accelerator time
+per second of video. It then picks, per site type, the cheapest setting whose
+error stays under --max-error.
+
+    python3 tests/replay_sweep.py synthesize recordings/            # example streams
+    python3 tests/replay_sweep.py sweep recordings/*.jsonl --output sweep.json
+    python3 tests/replay_sweep.py record street.mp4 --out recordings/street.jsonl \\
+        --site-type intersection --crossline 0.5,0,0.5,1 --crossings 412   # needs ultralytics
+
+Stream format (JSON lines). The first line is a header:
+    {"type": "header", "site_type": "intersection", "fps": 30, "width": 1920, "height": 1080,
+     "crossline": {"point1": {"x": 0.5, "y": 0}, "point2": {"x": 0.5, "y": 1}},
+     "ground_truth": {"crossings": 412, "occupancy": 6.3}}
+followed by one line per frame:
+    {"t": 0.033, "detections": [{"class": "Cars", "confidence": 0.71, "bbox": [x1, y1, x2, y2], "object_id": 17}]}
+
+Ground truth may contain "crossings" (line crossings counted by
+CrosslineCounter), "occupancy" (mean objects in view, compared with
+CountingAgent totals), or both. A stream's error for a setting is the
+worse of the two. Record streams with a detector threshold at or below
+the lowest threshold swept: replay can only drop detections, not recover
+them.
+
+The CPU cost is measured. Each paced inference runs the real
+InferenceAgent._postprocess on class-separated output rebuilt from the
+recorded detections, plus CountingAgent, CrosslineCounter and
+TrajectoryAnalyzer, all timed with per-thread CPU time. The cost of
+_preprocess is measured once per resolution. Accelerator time is
+inferences x --accelerator-ms; take that figure from the "infer" histogram
+at /metrics on the target device.
+"""
+
+import argparse
+import glob
+import itertools
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+# Add project root to path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+# Config files resolve against the project root, so the tool runs from any directory
+CONFIG_DIR = os.path.join(ROOT, "config")
+
+from agents.inference_agent_hailo import InferenceAgent
+from agents.counting_agent import CountingAgent
+from agents.crossline_counter import CrosslineCounter
+from agents.trajectory_analyzer import TrajectoryAnalyzer
+
+# COCO ids of the counted classes (same mapping as InferenceAgent._postprocess)
+CLASS_IDS = {"Pedestrians": 0, "Cars": 2, "Motorcycles": 3, "Buses": 5, "Trucks": 7}
+
+# ---------------------------------------------------------------- streams
+
+class DetectionStream:
+    """A recorded detection stream: header metadata plus (t, detections) frames."""
+
+    def __init__(self, path):
+        self.path = path
+        self.frames = []
+        with open(path) as f:
+            self.header = json.loads(f.readline())
+            for line in f:
+                if line.strip():
+                    frame = json.loads(line)
+                    self.frames.append((float(frame["t"]), frame.get("detections", [])))
+        if self.header.get("type") != "header":
+            raise ValueError(f"{path}: first line must be a header")
+        self.site_type = self.header.get("site_type", "default")
+        self.fps = float(self.header.get("fps", 30))
+        self.width = int(self.header.get("width", 1920))
+        self.height = int(self.header.get("height", 1080))
+        self.crossline = self.header.get("crossline")
+        self.ground_truth = self.header.get("ground_truth", {})
+        self.duration = (self.frames[-1][0] - self.frames[0][0] + 1.0 / self.fps) if self.frames else 0.0
+
+    @property
+    def name(self):
+        return os.path.splitext(os.path.basename(self.path))[0]
+
+def to_raw_output(detections, width, height):
+    """
+    Rebuilds class-separated NMS output ([batch][80] -> (n, 5) normalized
+    y1, x1, y2, x2, score) from recorded detections. Also returns the
+    object ids in the same (class, then input) order that _postprocess emits.
+    """
+    rows = {class_id: [] for class_id in CLASS_IDS.values()}
+    ids = {class_id: [] for class_id in CLASS_IDS.values()}
+    for det in detections:
+        class_id = CLASS_IDS.get(det.get("class"))
+        if class_id is None:
+            continue
+        x1, y1, x2, y2 = det["bbox"]
+        rows[class_id].append((y1 / height, x1 / width, y2 / height, x2 / width, det.get("confidence", 0.0)))
+        ids[class_id].append(det.get("object_id"))
+    per_class = [np.zeros((0, 5), dtype=np.float32) for _ in range(80)]
+    ordered_ids = []
+    for class_id in sorted(rows):
+        if rows[class_id]:
+            per_class[class_id] = np.array(rows[class_id], dtype=np.float32)
+            ordered_ids.append((class_id, ids[class_id]))
+    return [per_class], ordered_ids
+
+# ---------------------------------------------------------------- replay
+
+class ReplayPath:
+    """The counting and tracking path of the inference loop, reconfigured per setting."""
+
+    def __init__(self):
+        self.inference = InferenceAgent(os.path.join(CONFIG_DIR, "detection_config.json"))
+        self.counter = CountingAgent(os.path.join(CONFIG_DIR, "counting_config.json"))
+        self.trajectory = TrajectoryAnalyzer(os.path.join(CONFIG_DIR, "trajectory_config.json"))
+        self.input_size = tuple(self.inference.config.get("input_size", [640, 640]))
+        self.threshold = self.inference.config.get("confidence_threshold", 0.5)
+        self.preprocess_cache = {}
+
+    def configure(self, confidence_threshold, min_confidence):
+        """Applies one setting and clears tracking state left by the previous replay."""
+        self.inference.config = dict(self.inference.config, confidence_threshold=confidence_threshold)
+        self.counter.config = dict(self.counter.config, min_confidence=min_confidence)
+        self.threshold = confidence_threshold
+        self.trajectory.tracks.clear()
+
+    def preprocess_ms(self, width, height):
+        """Median _preprocess CPU time for a frame of this size (measured once per size)."""
+        key = (width, height)
+        if key not in self.preprocess_cache:
+            frame = np.zeros((height, width, 3), dtype=np.uint8)
+            timings = []
+            for _ in range(15):
+                started = time.thread_time_ns()
+                self.inference._preprocess(frame, self.input_size)
+                timings.append(time.thread_time_ns() - started)
+            self.preprocess_cache[key] = sorted(timings)[len(timings) // 2] / 1e6
+        return self.preprocess_cache[key]
+
+    def detect(self, detections, width, height):
+        """Runs the real postprocess on the recorded frame and re-attaches object ids."""
+        raw, ordered_ids = to_raw_output(detections, width, height)
+        result = self.inference._postprocess(raw, (width, height), self.input_size)
+        kept_ids = []
+        for class_id, ids in ordered_ids:
+            scores = raw[0][class_id][:, 4]
+            kept_ids.extend(obj_id for obj_id, score in zip(ids, scores) if float(score) >= self.threshold)
+        for det, obj_id in zip(result, kept_ids):
+            if obj_id is not None:
+                det["object_id"] = obj_id
+        return result
+
+def replay(path, stream, fps, confidence_threshold, min_confidence, skip):
+    """
+    Replays one stream at one setting. Frames are paced to `fps` the way the
+    inference loop paces them (deadline pacing, no catch-up bursts), and
+    every `skip`-th paced frame is inferred.
+    """
+    path.configure(confidence_threshold, min_confidence)
+    crossline = CrosslineCounter(None, crossline=stream.crossline) if stream.crossline else None
+    cycle = 1.0 / fps
+    next_deadline = stream.frames[0][0] if stream.frames else 0.0
+    paced = inferred = 0
+    occupancy_sum = 0
+    cpu_ns = 0
+
+    for t, detections in stream.frames:
+        if t + 1e-6 < next_deadline:
+            continue
+        next_deadline = max(next_deadline + cycle, t)
+        paced += 1
+        if (paced - 1) % skip:
+            continue
+        inferred += 1
+        started = time.thread_time_ns()
+        kept = path.detect(detections, stream.width, stream.height)
+        counts = path.counter.count_objects(kept)
+        if crossline:
+            crossline.process(kept, stream.width, stream.height)
+        path.trajectory.process(kept, t)
+        cpu_ns += time.thread_time_ns() - started
+        occupancy_sum += counts.get("total", 0)
+
+    duration = stream.duration or 1.0
+    inferences_per_s = inferred / duration
+    result = {
+        "inferences_per_s": round(inferences_per_s, 3),
+        "cpu_ms_per_s": (cpu_ns / 1e6) / duration + inferences_per_s * path.preprocess_ms(stream.width, stream.height),
+        "errors": {}
+    }
+    truth = stream.ground_truth
+    if "crossings" in truth and crossline:
+        result["crossings"] = crossline.crossline_count
+        result["errors"]["crossings"] = relative_error(crossline.crossline_count, truth["crossings"])
+    if "occupancy" in truth:
+        occupancy = occupancy_sum / inferred if inferred else 0.0
+        result["occupancy"] = round(occupancy, 3)
+        result["errors"]["occupancy"] = relative_error(occupancy, truth["occupancy"])
+    return result
+
+def relative_error(measured, truth):
+    if truth == 0:
+        return 0.0 if measured == 0 else 1.0
+    return abs(measured - truth) / truth
+
+# ---------------------------------------------------------------- sweep
+
+def settings_grid(args):
+    return [
+        {"fps": fps, "confidence_threshold": conf, "min_confidence": min_conf, "skip": skip}
+        for fps, conf, min_conf, skip in itertools.product(args.fps, args.conf, args.min_conf, args.skip)
+    ]
+
+def sweep(streams, grid, accelerator_ms, max_error, progress=None):
+    """
+    Returns {site_type: {"settings": [...], "recommended": setting or None}}.
+    Errors within a site type are pooled over its streams, weighted by duration.
+    """
+    by_site = {}
+    for stream in streams:
+        by_site.setdefault(stream.site_type, []).append(stream)
+
+    path = ReplayPath()
+    report = {}
+    for site_type, site_streams in sorted(by_site.items()):
+        total_duration = sum(s.duration for s in site_streams) or 1.0
+        rows = []
+        for setting in grid:
+            if progress:
+                progress(site_type, setting)
+            cpu = inferences = 0.0
+            error = 0.0
+            for stream in site_streams:
+                fps = min(setting["fps"], stream.fps)
+                result = replay(path, stream, fps, setting["confidence_threshold"], setting["min_confidence"],
+                                setting["skip"])
+                weight = stream.duration / total_duration
+                cpu += result["cpu_ms_per_s"] * weight
+                inferences += result["inferences_per_s"] * weight
+                if result["errors"]:
+                    error = max(error, max(result["errors"].values()))
+            accel = inferences * accelerator_ms
+            rows.append(dict(setting,
+                             error=round(error, 4),
+                             inferences_per_s=round(inferences, 3),
+                             cpu_ms_per_s=round(cpu, 3),
+                             accelerator_ms_per_s=round(accel, 3),
+                             cost_ms_per_s=round(cpu + accel, 3)))
+        within = [r for r in rows if r["error"] <= max_error]
+        recommended = min(within, key=lambda r: (r["cost_ms_per_s"], r["error"])) if within else None
+        report[site_type] = {"streams": [s.name for s in site_streams], "settings": rows,
+                             "recommended": recommended}
+    return report
+
+def print_report(report, max_error, top=20):
+    """Prints the `top` settings per site type: those within the error budget first, cheapest first."""
+    for site_type, site in report.items():
+        print(f"\n--- Site type '{site_type}' ({len(site['streams'])} stream(s)) ---")
+        print(f"{'FPS':>5} | {'Conf':>5} | {'MinConf':>7} | {'Skip':>4} | {'Error %':>7} | "
+              f"{'Infer/s':>7} | {'CPU ms/s':>8} | {'Accel ms/s':>10} | ")
+        print("-" * 82)
+        ranked = sorted(site["settings"], key=lambda r: (r["error"] > max_error, r["cost_ms_per_s"]))
+        for r in ranked[:top]:
+            mark = "<- cheapest" if r is site["recommended"] else ("" if r["error"] <= max_error else "over")
+            print(f"{r['fps']:>5g} | {r['confidence_threshold']:>5.2f} | {r['min_confidence']:>7.2f} | "
+                  f"{r['skip']:>4} | {r['error'] * 100:>7.2f} | {r['inferences_per_s']:>7.2f} | "
+                  f"{r['cpu_ms_per_s']:>8.2f} | {r['accelerator_ms_per_s']:>10.2f} | {mark}")
+        rec = site["recommended"]
+        if rec:
+            print(f"Recommended: target_fps={rec['fps']:g}, confidence_threshold={rec['confidence_threshold']}, "
+                  f"min_confidence={rec['min_confidence']}, inference every {rec['skip']} frame(s) "
+                  f"({rec['error'] * 100:.2f}% error)")
+        else:
+            print(f"No setting keeps the error under {max_error * 100:.1f}%.")
+
+# ---------------------------------------------------------------- synthetic streams
+
+def synthesize(path, site_type="intersection", seed=1, duration=120.0, fps=30.0, spawn_rate=0.5,
+               speed=(0.05, 0.25), miss_below=0.45, miss_rate=0.03, false_positive_rate=0.3,
+               width=1920, height=1080):
+    """
+    Writes a synthetic stream with exact ground truth: objects crossing a
+    vertical line at x=0.5 in either direction (only right-to-left counts, as
+    in CrosslineCounter), with detection confidence jitter, occasional
+    missed detections and low-confidence false positives.
+    """
+    rng = random.Random(seed)
+    classes = list(CLASS_IDS)
+    objects = []
+    next_id = 1
+    crossings = 0
+    occupancy_total = 0
+    frames = []
+    t = 0.0
+    while t < duration:
+        if rng.random() < spawn_rate / fps:
+            direction = rng.choice((-1, 1))
+            objects.append({"id": next_id, "class": rng.choice(classes), "x": 1.0 if direction < 0 else 0.0,
+                            "y": rng.uniform(0.1, 0.9), "vx": direction * rng.uniform(*speed),
+                            "quality": rng.uniform(0.3, 0.95)})
+            next_id += 1
+        detections = []
+        for obj in objects:
+            previous_x = obj["x"]
+            obj["x"] += obj["vx"] / fps
+            if previous_x > 0.5 >= obj["x"]:
+                crossings += 1
+            confidence = min(0.99, max(0.05, obj["quality"] + rng.gauss(0, 0.08)))
+            # Weak detections drop out now and then, like a real detector
+            if confidence < miss_below and rng.random() < miss_rate:
+                continue
+            cx, cy = obj["x"] * width, obj["y"] * height
+            detections.append({"class": obj["class"], "confidence": round(confidence, 3),
+                               "bbox": [int(cx - 40), int(cy - 30), int(cx + 40), int(cy + 30)],
+                               "object_id": obj["id"]})
+        objects = [o for o in objects if 0.0 <= o["x"] <= 1.0]
+        occupancy_total += len(objects)
+        if rng.random() < false_positive_rate:
+            x, y = rng.uniform(0, width - 80), rng.uniform(0, height - 60)
+            detections.append({"class": rng.choice(classes), "confidence": round(rng.uniform(0.1, 0.4), 3),
+                               "bbox": [int(x), int(y), int(x + 80), int(y + 60)]})
+        frames.append({"t": round(t, 4), "detections": detections})
+        t += 1.0 / fps
+
+    header = {"type": "header", "site_type": site_type, "fps": fps, "width": width, "height": height,
+              "crossline": {"point1": {"x": 0.5, "y": 0.0}, "point2": {"x": 0.5, "y": 1.0}},
+              "ground_truth": {"crossings": crossings, "occupancy": round(occupancy_total / len(frames), 3)},
+              "synthetic": True}
+    with open(path, "w") as f:
+        f.write(json.dumps(header) + "\n")
+        for frame in frames:
+            f.write(json.dumps(frame) + "\n")
+    return header
+
+# ---------------------------------------------------------------- recording from video
+
+def record(video_path, out_path, site_type, crossline, crossings=None, occupancy=None,
+           model="yolov8n.pt", threshold=0.1):
+    """Runs a video through a CPU detector + tracker (ultralytics) and writes a detection stream."""
+    try:
+        import cv2
+        from ultralytics import YOLO
+    except ImportError:
+        raise SystemExit("Recording from video needs the CPU backend: pip install ultralytics")
+
+    names = {v: k for k, v in CLASS_IDS.items()}
+    detector = YOLO(model)
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    width, height = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    x1, y1, x2, y2 = crossline
+    ground_truth = {}
+    if crossings is not None:
+        ground_truth["crossings"] = crossings
+    if occupancy is not None:
+        ground_truth["occupancy"] = occupancy
+    header = {"type": "header", "site_type": site_type, "fps": fps, "width": width, "height": height,
+              "crossline": {"point1": {"x": x1, "y": y1}, "point2": {"x": x2, "y": y2}},
+              "ground_truth": ground_truth, "source": os.path.basename(video_path), "threshold": threshold}
+    index = 0
+    with open(out_path, "w") as f:
+        f.write(json.dumps(header) + "\n")
+        while True:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            result = detector.track(frame, persist=True, conf=threshold, classes=list(names), verbose=False)[0]
+            detections = []
+            boxes = result.boxes
+            ids = boxes.id.tolist() if boxes.id is not None else [None] * len(boxes)
+            for box, conf, cls, obj_id in zip(boxes.xyxy.tolist(), boxes.conf.tolist(), boxes.cls.tolist(), ids):
+                det = {"class": names[int(cls)], "confidence": round(conf, 3), "bbox": [int(v) for v in box]}
+                if obj_id is not None:
+                    det["object_id"] = int(obj_id)
+                detections.append(det)
+            f.write(json.dumps({"t": round(index / fps, 4), "detections": detections}) + "\n")
+            index += 1
+    cap.release()
+    print(f"Wrote {index} frame(s) to {out_path}")
+
+# ---------------------------------------------------------------- CLI
+
+def float_list(text):
+    return [float(v) for v in text.split(",")]
+
+def int_list(text):
+    return [int(v) for v in text.split(",")]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_sweep = sub.add_parser("sweep", help="Replay streams across the settings grid")
+    p_sweep.add_argument("streams", nargs="+", help="Stream files or directories of .jsonl streams")
+    p_sweep.add_argument("--fps", type=float_list, default=[15, 10, 7, 5, 3])
+    p_sweep.add_argument("--conf", type=float_list, default=[0.2, 0.3, 0.4, 0.5])
+    p_sweep.add_argument("--min-conf", type=float_list, default=[0.25, 0.35, 0.45])
+    p_sweep.add_argument("--skip", type=int_list, default=[1, 2, 3])
+    p_sweep.add_argument("--accelerator-ms", type=float, default=12.0,
+                         help="Accelerator time per inference (median 'infer' stage on the device)")
+    p_sweep.add_argument("--max-error", type=float, default=0.02)
+    p_sweep.add_argument("--top", type=int, default=20, help="Settings printed per site type")
+    p_sweep.add_argument("--output", help="Write the full results as JSON to this path")
+
+    p_synth = sub.add_parser("synthesize", help="Write example streams with exact ground truth")
+    p_synth.add_argument("directory")
+    p_synth.add_argument("--duration", type=float, default=120.0)
+
+    p_record = sub.add_parser("record", help="Record a stream from video with a CPU detector (ultralytics)")
+    p_record.add_argument("video")
+    p_record.add_argument("--out", required=True)
+    p_record.add_argument("--site-type", default="default")
+    p_record.add_argument("--crossline", type=float_list, required=True, help="x1,y1,x2,y2 normalized")
+    p_record.add_argument("--crossings", type=int, help="Ground-truth crossing count")
+    p_record.add_argument("--occupancy", type=float, help="Ground-truth mean objects in view")
+    p_record.add_argument("--model", default="yolov8n.pt")
+    p_record.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    if args.command == "synthesize":
+        os.makedirs(args.directory, exist_ok=True)
+        profiles = [
+            ("intersection", dict(spawn_rate=0.6, speed=(0.05, 0.2))),
+            ("highway", dict(spawn_rate=1.2, speed=(0.3, 0.8), false_positive_rate=0.1)),
+            ("pedestrian_zone", dict(spawn_rate=0.4, speed=(0.02, 0.08), miss_below=0.5, miss_rate=0.05)),
+        ]
+        for seed, (site_type, profile) in enumerate(profiles, start=1):
+            path = os.path.join(args.directory, f"synthetic_{site_type}.jsonl")
+            header = synthesize(path, site_type, seed=seed, duration=args.duration, **profile)
+            print(f"Wrote {path}: ground truth {header['ground_truth']}")
+        return 0
+
+    if args.command == "record":
+        record(args.video, args.out, args.site_type, args.crossline, args.crossings, args.occupancy,
+               args.model, args.threshold)
+        return 0
+
+    paths = []
+    for entry in args.streams:
+        paths.extend(sorted(glob.glob(os.path.join(entry, "*.jsonl"))) if os.path.isdir(entry) else [entry])
+    streams = [DetectionStream(p) for p in paths]
+    for stream in streams:
+        recorded = stream.header.get("threshold")
+        if recorded is not None and recorded > min(args.conf):
+            print(f"WARNING: {stream.name} was recorded at threshold {recorded}; "
+                  f"lower sweep thresholds cannot recover dropped detections")
+    grid = settings_grid(args)
+    print(f"Replaying {len(streams)} stream(s) x {len(grid)} setting(s)...")
+
+    report = sweep(streams, grid, args.accelerator_ms, args.max_error)
+    print_report(report, args.max_error, args.top)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"max_error": args.max_error, "accelerator_ms": args.accelerator_ms, "sites": report},
+                      f, indent=2)
+        print(f"\nResults written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
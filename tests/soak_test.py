@@ -0,0 +1,338 @@
+"""
+Virtual-clock soak harness: 24-72 hours of pipeline operation in minutes.
+
+Runs the real Orchestrator, TransportAgent, report scheduler, outbox and
+logging on a ScaledClock, with a synthetic camera source, a mock inference
+backend (class-separated NMS output through the real postprocess) and the
+local mock ingest server. Tracks RSS, thread count, queue depths and report
+cadence, and writes a pass/fail JSON report.
+
+Usage:
+    python3 tests/soak_test.py --hours 24 --speed 120 --output soak_report.json
+    python3 tests/soak_test.py --hours 72 --speed 240 --error-rate 0.02
+
+Per-frame work still costs real CPU time, so at high speeds the pipeline
+processes fewer frames per virtual second than on a device; the scheduling,
+interval rollover, queueing and memory behaviour are what this exercises.
+Keep --speed low enough that a 5 ms GIL switch stays well inside the report
+late tolerance (2 s virtual): 120-240 is a good range.
+"""
+
+import argparse
+import calendar
+import json
+import math
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agents.orchestrator import Orchestrator
+from agents.camera_agent import CameraAgent
+from agents.inference_agent_hailo import InferenceAgent
+from agents.transport_agent import TransportAgent
+from utils.binding_manager import BindingManager
+from utils.clock import ScaledClock
+from utils import logger as app_logging
+from tests.mock_ingest_server import start_server
+
+# Counted COCO classes and their share of the synthetic traffic
+TRAFFIC_MIX = {0: 0.35, 2: 0.45, 3: 0.05, 5: 0.05, 7: 0.10}
+
+class SyntheticCapture:
+    """cv2.VideoCapture stand-in delivering a static scene at `fps` on the simulation clock."""
+
+    def __init__(self, clock, fps=15.0, resolution=(640, 480)):
+        self.clock = clock
+        self.fps = fps
+        self.width, self.height = resolution
+        self.frame = None
+        self.opened = True
+        self.reads = 0
+
+    def isOpened(self):
+        return self.opened
+
+    def set(self, prop, value):
+        # cv2.CAP_PROP_FRAME_WIDTH = 3, cv2.CAP_PROP_FRAME_HEIGHT = 4
+        if prop == 3:
+            self.width = int(value)
+        elif prop == 4:
+            self.height = int(value)
+        self.frame = None
+        return True
+
+    def read(self):
+        self.clock.sleep(1.0 / self.fps)
+        if self.frame is None or self.frame.shape[:2] != (self.height, self.width):
+            y = np.linspace(0, 255, self.height, dtype=np.uint8)[:, None]
+            self.frame = np.dstack([np.broadcast_to(y, (self.height, self.width))] * 3).copy()
+        self.reads += 1
+        return True, self.frame
+
+    def release(self):
+        self.opened = False
+
+class MockInferenceBackend:
+    """
+    Stand-in for the Hailo pipeline: returns class-separated NMS output
+    ({output: [batch][80 classes] -> (n, 5) arrays}) whose object count
+    follows a daily traffic curve on the simulation clock.
+    """
+
+    def __init__(self, clock, peak_objects=40, seed=7):
+        self.clock = clock
+        self.peak_objects = peak_objects
+        self.rng = np.random.default_rng(seed)
+        self.calls = 0
+
+    def objects_now(self):
+        # Quiet at night, busiest mid-afternoon
+        hour = (self.clock.time() % 86400) / 3600.0
+        level = 0.55 - 0.45 * math.cos((hour - 3.0) / 24.0 * 2 * math.pi)
+        return max(0, int(self.peak_objects * level))
+
+    def infer(self, input_data):
+        self.calls += 1
+        total = self.objects_now()
+        per_class = [np.zeros((0, 5), dtype=np.float32) for _ in range(80)]
+        for class_id, share in TRAFFIC_MIX.items():
+            n = int(round(total * share))
+            y1 = self.rng.uniform(0, 0.9, n)
+            x1 = self.rng.uniform(0, 0.9, n)
+            per_class[class_id] = np.stack([y1, x1, y1 + 0.08, x1 + 0.06,
+                                            self.rng.uniform(0.2, 0.95, n)], axis=1).astype(np.float32)
+        return {"yolov8n/yolov8_nms_postprocess": [per_class]}
+
+def rss_mb():
+    """Current resident set size (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def median(values):
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2] if ordered else 0.0
+
+class ReportCadence:
+    """Checks every enqueued report against the previous one: one report per interval, in order."""
+
+    def __init__(self, clock, interval):
+        self.clock = clock
+        self.interval = interval
+        self.count = 0
+        self.late = 0
+        self.gaps = 0
+        self.duplicates = 0
+        self.max_lag = 0.0
+        self.last_start = None
+
+    def record(self, counts):
+        start = calendar.timegm(time.strptime(counts["interval_start"], "%Y-%m-%dT%H:%M:%SZ"))
+        self.max_lag = max(self.max_lag, self.clock.time() - (start + self.interval))
+        self.count += 1
+        self.late += bool(counts.get("late"))
+        if self.last_start is not None:
+            step = start - self.last_start
+            if step <= 0:
+                self.duplicates += 1
+            elif step != self.interval:
+                self.gaps += 1
+        self.last_start = start
+
+def build_pipeline(clock, workdir, endpoint, args):
+    binding = BindingManager(binding_path=os.path.join(workdir, "binding.json"))
+    binding.serial_number = "HAILO-SOAK-000001"
+    binding.bind({
+        "endpoint": endpoint,
+        "auth_token": "soak-token",
+        "payload_format": "universal",
+        "site_id": "SOAK_SITE",
+        "camera_id": "SOAK_CAM"
+    })
+
+    transport = TransportAgent(clock=clock)
+    transport.binding = binding
+    transport.config["outbox"] = dict(transport.config.get("outbox", {}), path=os.path.join(workdir, "outbox.db"))
+
+    capture = SyntheticCapture(clock, fps=args.camera_fps)
+    camera = CameraAgent(clock=clock, capture_factory=lambda device_id: capture)
+    backend = MockInferenceBackend(clock, peak_objects=args.peak_objects)
+    inference = InferenceAgent(backend=backend)
+    inference.config["visualize_local"] = False
+
+    orch = Orchestrator(report_interval=args.interval, clock=clock, camera=camera,
+                        inference=inference, transport=transport)
+    # The telemetry sampler paces itself in real seconds; keep its virtual cadence
+    orch.telemetry.interval /= clock.speed
+    return orch, capture, backend
+
+def evaluate(samples, cadence, orch, stats, args, simulated_s):
+    """Applies the pass/fail limits. Returns {check: {"value", "limit", "pass"}}."""
+    warm = [s for s in samples if s["t_h"] * 3600 >= args.warmup]
+    baseline = warm[:max(1, len(warm) // 10)]
+    final = warm[-max(1, len(warm) // 10):]
+    rss_growth = median([s["rss_mb"] for s in final]) - median([s["rss_mb"] for s in baseline]) if warm else 0.0
+    thread_growth = (max(s["threads"] for s in warm) - baseline[0]["threads"]) if warm else 0
+    expected = int((simulated_s - args.interval) // args.interval)
+
+    def check(value, limit, ok):
+        return {"value": value, "limit": limit, "pass": bool(ok)}
+
+    return {
+        "pipeline_alive": check(orch.lifecycle, "running", orch.lifecycle in (Orchestrator.RUNNING,
+                                                                               Orchestrator.DEGRADED)),
+        "watchdog_restarts": check(orch.state.health.get("watchdog_restarts", 0), 0,
+                                   orch.state.health.get("watchdog_restarts", 0) == 0),
+        "degraded_samples": check(sum(s["lifecycle"] == Orchestrator.DEGRADED for s in samples),
+                                  args.max_degraded_samples,
+                                  sum(s["lifecycle"] == Orchestrator.DEGRADED for s in samples) <= args.max_degraded_samples),
+        "rss_growth_mb": check(round(rss_growth, 1), args.max_rss_growth_mb, rss_growth <= args.max_rss_growth_mb),
+        "thread_growth": check(thread_growth, args.max_thread_growth, thread_growth <= args.max_thread_growth),
+        "max_outbox_pending": check(max((s["outbox_pending"] for s in samples), default=0), args.max_outbox,
+                                    max((s["outbox_pending"] for s in samples), default=0) <= args.max_outbox),
+        "log_records_dropped": check(samples[-1]["log_dropped"] if samples else 0, 0,
+                                     not samples or samples[-1]["log_dropped"] == 0),
+        "reports_enqueued": check(cadence.count, f">= {expected}", cadence.count >= expected),
+        "report_gaps": check(cadence.gaps + orch.scheduler.skipped_intervals, 0,
+                             cadence.gaps + orch.scheduler.skipped_intervals == 0),
+        "report_duplicates": check(cadence.duplicates, 0, cadence.duplicates == 0),
+        "late_report_ratio": check(round(cadence.late / cadence.count, 4) if cadence.count else 0.0,
+                                   args.max_late_ratio,
+                                   not cadence.count or cadence.late / cadence.count <= args.max_late_ratio),
+        "reports_delivered": check(stats["reports"], f">= {cadence.count} - pending",
+                                   stats["reports"] >= cadence.count - samples[-1]["outbox_pending"] if samples else True)
+    }
+
+def run(args):
+    sys.setswitchinterval(0.001)
+    workdir = tempfile.mkdtemp(prefix="aiod_soak_")
+    log_handler = app_logging.configure_logging(config=dict(
+        app_logging.DEFAULT_CONFIG, console=False,
+        file={"path": os.path.join(workdir, "soak.log"), "max_bytes": 1024 * 1024, "backup_count": 2,
+              "compress": True}))
+    server, state, base_url = start_server(error_rate=args.error_rate, seed=args.seed)
+    clock = ScaledClock(speed=args.speed)
+    orch, capture, backend = build_pipeline(clock, workdir, f"{base_url}/ingestCounts", args)
+
+    cadence = ReportCadence(clock, args.interval)
+    original_enqueue = orch.transport.enqueue_counts
+
+    def recording_enqueue(counts):
+        cadence.record(counts)
+        return original_enqueue(counts)
+    orch.transport.enqueue_counts = recording_enqueue
+
+    duration = args.hours * 3600
+    print(f"\n--- Soak test: {args.hours:g} h simulated at {args.speed:g}x "
+          f"(~{duration / args.speed / 60:.1f} min real) in {workdir} ---")
+    print(f"{'Sim h':>6} | {'RSS MB':>7} | {'Threads':>7} | {'Outbox':>6} | {'LogQ':>5} | "
+          f"{'Reports':>7} | {'Infer/s':>7} | State")
+    print("-" * 78)
+
+    samples = []
+    reports_seen = 0
+    real_started = time.monotonic()
+    orch.start(wait=True, timeout=10.0)
+    started = clock.monotonic()
+    last_calls = 0
+    try:
+        while clock.monotonic() - started < duration:
+            clock.sleep(args.sample_every)
+            elapsed = clock.monotonic() - started
+            with state.lock:
+                reports_seen += len(state.reports_log)
+                # Server-side bookkeeping would otherwise count as device memory growth
+                state.reports_log.clear()
+            sample = {
+                "t_h": round(elapsed / 3600, 3),
+                "rss_mb": round(rss_mb(), 1),
+                "threads": threading.active_count(),
+                "outbox_pending": orch.transport.outbox.count() if orch.transport.outbox else 0,
+                "log_queue": log_handler.queue.qsize(),
+                "log_dropped": log_handler.dropped,
+                "reports": cadence.count,
+                "inferences_per_s": round((backend.calls - last_calls) / args.sample_every, 2),
+                "lifecycle": orch.lifecycle,
+                "governor_level": orch.governor.level
+            }
+            last_calls = backend.calls
+            samples.append(sample)
+            if len(samples) % args.print_every == 0:
+                print(f"{sample['t_h']:>6.1f} | {sample['rss_mb']:>7.1f} | {sample['threads']:>7} | "
+                      f"{sample['outbox_pending']:>6} | {sample['log_queue']:>5} | {sample['reports']:>7} | "
+                      f"{sample['inferences_per_s']:>7.2f} | {sample['lifecycle']}")
+    except KeyboardInterrupt:
+        print("\nSoak interrupted; evaluating what ran.")
+    simulated_s = clock.monotonic() - started
+
+    checks = evaluate(samples, cadence, orch, state.stats(), args, simulated_s)
+    orch.stop(wait=True, timeout=30.0)
+    server.shutdown()
+    app_logging.configure_logging()
+
+    passed = all(c["pass"] for c in checks.values())
+    report = {
+        "passed": passed,
+        "simulated_hours": round(simulated_s / 3600, 2),
+        "real_seconds": round(time.monotonic() - real_started, 1),
+        "speed": args.speed,
+        "report_interval": args.interval,
+        "checks": checks,
+        "totals": {
+            "frames_captured": capture.reads,
+            "inferences": backend.calls,
+            "reports_enqueued": cadence.count,
+            "reports_late": cadence.late,
+            "max_report_lag_s": round(cadence.max_lag, 2),
+            "backend": state.stats()
+        },
+        "samples": samples
+    }
+    print("-" * 78)
+    for name, c in checks.items():
+        print(f"{'PASS' if c['pass'] else 'FAIL':<5} {name:<22} {c['value']} (limit {c['limit']})")
+    print(f"Soak test {'PASSED' if passed else 'FAILED'}.")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    if args.keep:
+        print(f"Work directory kept: {workdir}")
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0 if passed else 1
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=float, default=24.0, help="Simulated duration")
+    parser.add_argument("--speed", type=float, default=120.0, help="Virtual seconds per real second")
+    parser.add_argument("--interval", type=float, default=15.0, help="Report interval (s)")
+    parser.add_argument("--camera-fps", type=float, default=15.0)
+    parser.add_argument("--peak-objects", type=int, default=40)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Mock backend 500 rate")
+    parser.add_argument("--sample-every", type=float, default=300.0, help="Virtual seconds between samples")
+    parser.add_argument("--print-every", type=int, default=12, help="Print every Nth sample")
+    parser.add_argument("--warmup", type=float, default=1800.0, help="Virtual seconds excluded from growth checks")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=32.0)
+    parser.add_argument("--max-thread-growth", type=int, default=2)
+    parser.add_argument("--max-outbox", type=int, default=20)
+    parser.add_argument("--max-late-ratio", type=float, default=0.01)
+    parser.add_argument("--max-degraded-samples", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    parser.add_argument("--keep", action="store_true", help="Keep the work directory (logs, outbox)")
+    return run(parser.parse_args())
+
+if __name__ == "__main__":
+    sys.exit(main())
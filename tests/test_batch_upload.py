@@ -0,0 +1,103 @@
+import sys
+import os
+import gzip
+import json
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agents.transport_agent import TransportAgent
+from utils.binding_manager import BindingManager
+from utils.report_outbox import ReportOutbox
+
+class TestBatchUpload(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.binding_manager = BindingManager(binding_path=os.path.join(self.tmpdir, "binding.json"))
+        self.transport = TransportAgent()
+        self.transport.binding = self.binding_manager
+        self.transport.config["batch"] = {"enabled": True, "max_size": 3, "max_age": 60, "compression": "gzip"}
+        self.transport.outbox = ReportOutbox(db_path=os.path.join(self.tmpdir, "outbox.db"))
+        self.transport.sender_running = True
+
+    def tearDown(self):
+        self.transport.outbox.close()
+        shutil.rmtree(self.tmpdir)
+
+    def _bind(self, payload_format, **extra):
+        bind_data = {
+            "endpoint": "https://example.com/ingest",
+            "auth_token": "token",
+            "payload_format": payload_format,
+            "camera_id": "CAM_01",
+            "site_id": "SITE_01"
+        }
+        bind_data.update(extra)
+        self.binding_manager.bind(bind_data)
+
+    def _response(self, status):
+        response = MagicMock()
+        response.status_code = status
+        if status >= 400:
+            response.raise_for_status.side_effect = Exception(f"HTTP {status}")
+        return response
+
+    @patch('requests.Session.post')
+    def test_waits_for_full_batch(self, mock_post):
+        self._bind("universal")
+        self.transport.enqueue_counts({"total": 1})
+        self.assertEqual(self.transport._drain_once(50, 0), (0, 0))
+        self.assertFalse(mock_post.called)
+
+    @patch('requests.Session.post')
+    def test_universal_batch_is_gzipped_and_preserves_payloads(self, mock_post):
+        mock_post.return_value = self._response(200)
+        self._bind("universal")
+        for i in range(3):
+            self.transport.enqueue_counts({"total": i})
+
+        self.assertEqual(self.transport._drain_once(50, 0), (3, 0))
+        kwargs = mock_post.call_args[1]
+        self.assertEqual(kwargs["headers"]["Content-Encoding"], "gzip")
+        envelope = json.loads(gzip.decompress(kwargs["data"]))
+
+        self.assertEqual(envelope["format"], "universal")
+        self.assertEqual(envelope["identity"]["camera_id"], "CAM_01")
+        self.assertEqual([r["data"]["counts"]["total"] for r in envelope["reports"]], [0, 1, 2])
+        self.assertEqual(envelope["reports"][0]["data"]["type"], "object_counts")
+        self.assertEqual(self.transport.outbox.count(), 0)
+
+    def test_aiod05_envelope_has_no_top_level_camera(self):
+        self._bind("aiod05", tenant_id="TENANT_01")
+        payloads = [self.transport._build_counts_payload({"total": 1})]
+        envelope = self.transport._build_batch_envelope(payloads)
+        self.assertEqual(envelope["tenant_id"], "TENANT_01")
+        self.assertNotIn("camera_id", envelope)
+        self.assertEqual(envelope["reports"][0]["data"]["event_type"], "periodic_report")
+
+    def test_legacy_envelope(self):
+        self._bind("legacy")
+        payloads = [self.transport._build_counts_payload({"total": 1, "timestamp": "t"})]
+        envelope = self.transport._build_batch_envelope(payloads)
+        self.assertEqual(envelope["format"], "legacy")
+        self.assertEqual(envelope["reports"][0]["camera_id"], "CAM_01")
+
+    @patch('requests.Session.post')
+    def test_rejected_batch_falls_back_to_single_posts(self, mock_post):
+        # Batch POST (data=) is rejected, single POSTs (json=) succeed
+        mock_post.side_effect = lambda url, **kw: self._response(400 if "data" in kw else 200)
+        self._bind("legacy")
+        for i in range(3):
+            self.transport.enqueue_counts({"total": i})
+
+        self.assertEqual(self.transport._drain_once(50, 0), (3, 0))
+        single_posts = [c[1]["json"] for c in mock_post.call_args_list if "json" in c[1]]
+        self.assertEqual([p["counts"]["total"] for p in single_posts], [0, 1, 2])
+        self.assertFalse(self.transport._batching_active())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import sys
+import os
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agents.camera_agent import CameraAgent
+
+class FakeCapture:
+    """VideoCapture stand-in that delivers one frame each time `release_frame()` is called."""
+
+    def __init__(self, *args):
+        self.ready = threading.Semaphore(0)
+        self.reads = 0
+
+    def isOpened(self):
+        return True
+
+    def set(self, *args):
+        return True
+
+    def read(self):
+        if not self.ready.acquire(timeout=0.05):
+            return False, None
+        self.reads += 1
+        return True, np.full((4, 4, 3), self.reads, dtype=np.uint8)
+
+    def release_frame(self):
+        self.ready.release()
+
+    def release(self):
+        pass
+
+class TestCameraFrameHandoff(unittest.TestCase):
+    def setUp(self):
+        self.capture = FakeCapture()
+        with patch("agents.camera_agent.cv2.VideoCapture", return_value=self.capture):
+            self.camera = CameraAgent()
+            self.camera.start()
+
+    def tearDown(self):
+        self.camera.stop()
+
+    def test_wait_frame_wakes_on_new_frame(self):
+        threading.Timer(0.05, self.capture.release_frame).start()
+        started = time.monotonic()
+        frame, seq, captured_at = self.camera.wait_frame(0, timeout=2.0)
+        self.assertIsNotNone(frame)
+        self.assertEqual(seq, 1)
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertAlmostEqual(captured_at, time.time(), delta=1.0)
+
+    def test_wait_frame_only_returns_newer_frames(self):
+        self.capture.release_frame()
+        frame, seq, _ = self.camera.wait_frame(0, timeout=2.0)
+        self.assertEqual(seq, 1)
+        # Same sequence again: nothing new to hand off
+        frame, same_seq, captured_at = self.camera.wait_frame(seq, timeout=0.1)
+        self.assertIsNone(frame)
+        self.assertEqual(same_seq, seq)
+        self.assertIsNone(captured_at)
+
+    def test_resolution_request_skips_active_resolution(self):
+        self.camera.active_resolution = (640, 480)
+        self.camera.request_resolution([960, 540])
+        self.assertEqual(self.camera.pending_resolution, (960, 540))
+        # Back to the active resolution before the switch happened: nothing to apply
+        self.camera.request_resolution([640, 480])
+        self.assertIsNone(self.camera.pending_resolution)
+        with patch.object(self.capture, "set") as cap_set:
+            self.camera.request_resolution([640, 480])
+            time.sleep(0.1)
+        cap_set.assert_not_called()
+
+    def test_stop_releases_waiters(self):
+        result = {}
+        waiter = threading.Thread(target=lambda: result.update(value=self.camera.wait_frame(0, timeout=5.0)))
+        waiter.start()
+        time.sleep(0.05)
+        self.camera.stop()
+        waiter.join(timeout=2.0)
+        self.assertFalse(waiter.is_alive())
+        self.assertIsNone(result["value"][0])
+
+if __name__ == '__main__':
+    unittest.main()
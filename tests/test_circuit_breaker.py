@@ -0,0 +1,110 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agents.transport_agent import TransportAgent
+from utils.binding_manager import BindingManager
+from utils.circuit_breaker import CircuitBreaker
+from utils.clock import ManualClock
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.clock = ManualClock()
+        self.breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=10.0, probe_jitter=0.0,
+                                      retry_budget_ratio=0.1, budget_window=60.0, min_retry_budget=2,
+                                      clock=self.clock)
+
+    def _fail(self, n):
+        for _ in range(n):
+            self.assertTrue(self.breaker.allow_request())
+            self.breaker.record_failure()
+
+    def test_opens_after_threshold(self):
+        self._fail(3)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_half_open_allows_single_probe(self):
+        self._fail(3)
+        self.clock.advance(10.0)
+        self.assertTrue(self.breaker.allow_request())
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(self.breaker.allow_request())
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_failed_probe_backs_off(self):
+        self._fail(3)
+        self.clock.advance(10.0)
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.clock.advance(10.0)
+        self.assertFalse(self.breaker.allow_request())  # recovery timeout doubled to 20 s
+        self.clock.advance(10.0)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_snapshot_reports_absolute_times(self):
+        self._fail(3)
+        snapshot = self.breaker.snapshot()
+        self.assertEqual(snapshot["opened_at"], 1000.0)
+        self.assertEqual(snapshot["next_probe_at"], 1010.0)
+        self.clock.advance(5.0)
+        self.assertEqual(self.breaker.snapshot(), snapshot)
+
+        self.clock.advance(5.0)
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.record_success()
+        snapshot = self.breaker.snapshot()
+        self.assertIsNone(snapshot["opened_at"])
+        self.assertIsNone(snapshot["next_probe_at"])
+
+    def test_retry_budget(self):
+        for _ in range(30):
+            self.breaker.allow_request()
+            self.breaker.record_success()
+        # 10% of 30 requests = 3 retries
+        allowed = sum(self.breaker.allow_request(is_retry=True) for _ in range(10))
+        self.assertEqual(allowed, 3)
+        self.assertEqual(self.breaker.snapshot()["retries_denied"], 7)
+
+        # Budget refills once the window has passed
+        self.clock.advance(61.0)
+        self.assertTrue(self.breaker.allow_request(is_retry=True))
+
+class TestTransportBreaker(unittest.TestCase):
+    @patch('requests.Session.post')
+    def test_open_circuit_skips_network(self, mock_post):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            binding = BindingManager(binding_path=os.path.join(tmpdir, "binding.json"))
+            binding.bind({"endpoint": "https://example.com/ingest", "auth_token": "t",
+                          "camera_id": "C", "site_id": "S"})
+            transport = TransportAgent()
+            transport.binding = binding
+            transport.config["max_attempts"] = 1
+
+            response = MagicMock()
+            response.status_code = 503
+            response.raise_for_status.side_effect = Exception("HTTP 503")
+            mock_post.return_value = response
+            for _ in range(transport.breaker.failure_threshold):
+                self.assertFalse(transport.send_counts({"total": 1}))
+            calls = mock_post.call_count
+
+            self.assertFalse(transport.send_counts({"total": 1}))
+            self.assertEqual(mock_post.call_count, calls)
+            self.assertEqual(transport.get_health()["circuit"]["state"], "open")
+        finally:
+            shutil.rmtree(tmpdir)
+
+if __name__ == '__main__':
+    unittest.main()
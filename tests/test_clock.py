@@ -0,0 +1,134 @@
+import sys
+import os
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.clock import ManualClock, ScaledClock, SYSTEM_CLOCK
+from agents.camera_agent import CameraAgent
+from agents.inference_agent_hailo import InferenceAgent
+from agents.crossline_counter import CrosslineCounter
+
+class StaticCapture:
+    def __init__(self, clock):
+        self.clock = clock
+        self.frame = np.zeros((48, 64, 3), dtype=np.uint8)
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        return True
+
+    def read(self):
+        self.clock.sleep(1.0)
+        return True, self.frame
+
+    def release(self):
+        pass
+
+class TestScaledClock(unittest.TestCase):
+    def test_virtual_time_runs_faster(self):
+        clock = ScaledClock(speed=1000.0, start=1768248000.0)
+        started = time.monotonic()
+        clock.sleep(50.0)
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertGreaterEqual(clock.monotonic(), 50.0)
+        self.assertAlmostEqual(clock.time(), 1768248000.0 + clock.monotonic(), delta=5.0)
+
+    def test_timed_waits_are_scaled(self):
+        clock = ScaledClock(speed=1000.0)
+        event = threading.Event()
+        started = time.monotonic()
+        self.assertFalse(clock.wait(event, 100.0))
+        cond = threading.Condition()
+        with cond:
+            self.assertFalse(clock.wait_for(cond, lambda: False, 100.0))
+        self.assertLess(time.monotonic() - started, 1.0)
+        event.set()
+        self.assertTrue(clock.wait(event, None))
+
+    def test_invalid_speed(self):
+        with self.assertRaises(ValueError):
+            ScaledClock(speed=0)
+
+class TestManualClock(unittest.TestCase):
+    def test_moves_only_when_told(self):
+        clock = ManualClock(50.0)
+        self.assertEqual((clock(), clock.time(), clock.monotonic()), (50.0, 50.0, 50.0))
+        self.assertEqual(clock.advance(10.0), 60.0)
+        clock.sleep(5.0)
+        self.assertEqual(clock(), 65.0)
+
+    def test_timed_waits_advance_without_blocking(self):
+        clock = ManualClock()
+        event = threading.Event()
+        started = time.monotonic()
+        self.assertFalse(clock.wait(event, 30.0))
+        cond = threading.Condition()
+        with cond:
+            self.assertFalse(clock.wait_for(cond, lambda: False, 30.0))
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(clock(), 1060.0)
+        event.set()
+        self.assertTrue(clock.wait(event, 30.0))
+        self.assertEqual(clock(), 1060.0)
+
+class TestInjectedSources(unittest.TestCase):
+    def test_camera_uses_clock_and_capture_factory(self):
+        clock = ScaledClock(speed=500.0)
+        camera = CameraAgent(clock=clock, capture_factory=lambda device_id: StaticCapture(clock))
+        camera.start()
+        try:
+            frame, seq, captured_at = camera.wait_frame(0, timeout=10.0)
+            self.assertEqual(frame.shape, (48, 64, 3))
+            self.assertGreaterEqual(seq, 1)
+            self.assertAlmostEqual(captured_at, clock.time(), delta=10.0)
+        finally:
+            camera.stop()
+
+    def test_inference_with_substitute_backend(self):
+        class Backend:
+            def infer(self, input_data):
+                per_class = [np.zeros((0, 5), dtype=np.float32) for _ in range(80)]
+                per_class[2] = np.array([[0.1, 0.1, 0.3, 0.2, 0.9]], dtype=np.float32)
+                return {"nms": [per_class]}
+
+        agent = InferenceAgent(backend=Backend())
+        agent.start()
+        detections = agent.run_inference(np.zeros((100, 200, 3), dtype=np.uint8))
+        agent.stop()
+        self.assertEqual([d["class"] for d in detections], ["Cars"])
+        self.assertEqual(detections[0]["bbox"], [20, 10, 40, 30])
+        self.assertFalse(agent.is_running)
+
+    def test_crossline_counter_defaults_to_system_clock(self):
+        counter = CrosslineCounter(None, crossline={"point1": {"x": 0.5, "y": 0}, "point2": {"x": 0.5, "y": 1}})
+        self.assertIs(counter.clock, SYSTEM_CLOCK)
+        counter.process([{"object_id": 1, "bbox": [90, 0, 100, 10]}], 100, 100)
+        self.assertEqual(counter.process([{"object_id": 1, "bbox": [0, 0, 10, 10]}], 100, 100), 1)
+
+    def test_crossline_loads_right_after_boot(self):
+        # Monotonic time below the check interval, as on a Pi starting the service at boot
+        clock = ManualClock(3.0)
+        db = MagicMock()
+        db.collection.return_value.where.return_value.limit.return_value.stream.return_value = []
+        counter = CrosslineCounter(MagicMock(camera_id="cam_01"), db=db, clock=clock)
+        stream = db.collection.return_value.where.return_value.limit.return_value.stream
+        self.assertEqual(stream.call_count, 1)
+        # The interval runs from the initial load, not from monotonic zero
+        clock.advance(8.0)
+        counter._check_for_crossline_updates()
+        self.assertEqual(stream.call_count, 1)
+        clock.advance(3.0)
+        counter._check_for_crossline_updates()
+        self.assertEqual(stream.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agents.transport_agent import TransportAgent
+from utils.binding_manager import BindingManager
+from utils import compact_codec
+
+class TestCompactCodec(unittest.TestCase):
+    def test_cbor_round_trip(self):
+        doc = {"a": [1, -2, 3.5, 1e300, None, True, False], 7: "x", "nested": {"b": b"\x00\x01"}}
+        self.assertEqual(compact_codec.cbor_loads(compact_codec.cbor_dumps(doc)), doc)
+
+    def test_tagged_payload_is_smaller_and_lossless(self):
+        payload = {
+            "identity": {"serial": "HAILO-A001-0000", "camera_id": "CAM_01", "site_id": "SITE_01"},
+            "environment": {"timestamp": "2026-01-12T20:00:00Z", "uptime": 12.5},
+            "data": {"type": "object_counts", "counts": {"Cars": 3, "total": 3}}
+        }
+        encoder = compact_codec.CompactEncoder("HAILO-A001-0000")
+        body, _, _ = encoder.encode(payload)
+        self.assertLess(len(body), len(json.dumps(payload)))
+        self.assertEqual(compact_codec.CompactDecoder().decode(body), payload)
+
+    def test_delta_against_acknowledged_report(self):
+        encoder = compact_codec.CompactEncoder("S1")
+        decoder = compact_codec.CompactDecoder()
+
+        first = {"camera_id": "C", "site_id": "S", "counts": {"Cars": 5, "Buses": 1, "total": 6}}
+        body, seq, counts = encoder.encode(first)
+        self.assertEqual(decoder.decode(body), first)
+        encoder.ack(seq, counts)
+
+        second = {"camera_id": "C", "site_id": "S", "counts": {"Cars": 7, "total": 7}}
+        body, _, _ = encoder.encode(second)
+        envelope = compact_codec.cbor_loads(body)
+        self.assertEqual(envelope[compact_codec.ENV_BASE], seq)
+        self.assertEqual(decoder.decode(body), second)
+
+    def test_unknown_base_raises(self):
+        encoder = compact_codec.CompactEncoder("S1")
+        encoder.ack(41, {"total": 1})
+        body, _, _ = encoder.encode({"camera_id": "C", "site_id": "S", "counts": {"total": 2}})
+        with self.assertRaises(KeyError):
+            compact_codec.CompactDecoder().decode(body)
+
+    def test_removed_key_differs_from_none_value(self):
+        base = {"Cars": 2, "note": "x", "total": 2}
+        current = {"Cars": 2, "note": None}
+        delta = compact_codec.counts_delta(base, current)
+        self.assertIs(delta["total"], compact_codec.REMOVED)
+        self.assertIsNone(delta["note"])
+        decoded = compact_codec.cbor_loads(compact_codec.cbor_dumps(delta))
+        self.assertEqual(compact_codec.apply_delta(base, decoded), current)
+
+    def test_device_restart_keeps_new_bases(self):
+        decoder = compact_codec.CompactDecoder()
+
+        def run(encoder, reports):
+            for i in range(reports):
+                body, seq, counts = encoder.encode({"camera_id": "C", "site_id": "S", "counts": {"total": i}})
+                self.assertEqual(decoder.decode(body)["counts"], {"total": i})
+                encoder.ack(seq, counts)
+
+        run(compact_codec.CompactEncoder("S1"), 1000)
+        # Restarted device: sequence numbers start again from 1
+        run(compact_codec.CompactEncoder("S1"), 300)
+        self.assertLessEqual(len(decoder.streams["S1"]), decoder.history)
+
+class TestCompactNegotiation(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.binding_manager = BindingManager(binding_path=os.path.join(self.tmpdir, "binding.json"))
+        self.binding_manager.bind({
+            "endpoint": "https://example.com/ingest",
+            "auth_token": "token",
+            "payload_format": "legacy",
+            "camera_id": "CAM_01",
+            "site_id": "SITE_01"
+        })
+        self.transport = TransportAgent()
+        self.transport.binding = self.binding_manager
+        self.transport.config["compact_encoding"] = {"enabled": True, "delta": True}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _response(self, status, headers=None):
+        response = MagicMock()
+        response.status_code = status
+        response.headers = headers or {}
+        return response
+
+    @patch('requests.Session.post')
+    def test_switches_after_backend_advertises(self, mock_post):
+        mock_post.return_value = self._response(200, {compact_codec.ENCODING_HEADER: compact_codec.ENCODING_NAME})
+        self.transport.send_counts({"total": 1})
+        self.assertIn("json", mock_post.call_args[1])
+
+        self.transport.send_counts({"total": 2})
+        kwargs = mock_post.call_args[1]
+        self.assertEqual(kwargs["headers"]["Content-Type"], compact_codec.CONTENT_TYPE)
+        self.assertEqual(compact_codec.CompactDecoder().decode(kwargs["data"])["counts"]["total"], 2)
+
+    @patch('requests.Session.post')
+    def test_stays_json_without_header(self, mock_post):
+        mock_post.return_value = self._response(200)
+        self.transport.send_counts({"total": 1})
+        self.transport.send_counts({"total": 2})
+        self.assertIn("json", mock_post.call_args[1])
+
+    @patch('requests.Session.post')
+    def test_reverts_to_json_on_415(self, mock_post):
+        mock_post.return_value = self._response(200, {compact_codec.ENCODING_HEADER: compact_codec.ENCODING_NAME})
+        self.transport.send_counts({"total": 1})
+        mock_post.side_effect = lambda url, **kw: self._response(415 if "data" in kw else 200)
+        self.assertTrue(self.transport.send_counts({"total": 2}))
+        self.assertFalse(self.transport.compact_accepted)
+        self.assertIn("json", mock_post.call_args[1])
+
+if __name__ == '__main__':
+    unittest.main()
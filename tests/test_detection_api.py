@@ -0,0 +1,35 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api import detection_api
+from agents.orchestrator import Orchestrator
+
+class TestStatusEndpoint(unittest.TestCase):
+    def setUp(self):
+        detection_api.orchestrator = Orchestrator()
+        detection_api.status_hub = None
+        self.client = detection_api.app.test_client()
+
+    def tearDown(self):
+        detection_api.orchestrator = None
+        detection_api.status_hub = None
+
+    def test_status_includes_hardware_and_governor(self):
+        detection_api.orchestrator.telemetry.sample_once()
+        response = self.client.get('/api/detection/status')
+        self.assertEqual(response.status_code, 200)
+        health = response.get_json()["health"]
+        self.assertEqual(health["governor"], detection_api.orchestrator.governor.status())
+        self.assertIn("cpu_temp", health["hardware"])
+        self.assertIn("circuit", health["transport"])
+
+        # Unchanged state answers 304 to a conditional request
+        again = self.client.get('/api/detection/status', headers={"If-None-Match": response.headers["ETag"]})
+        self.assertEqual(again.status_code, 304)
+
+if __name__ == '__main__':
+    unittest.main()
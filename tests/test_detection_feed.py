@@ -0,0 +1,48 @@
+import sys
+import os
+import json
+import threading
+import time
+import unittest
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.detection_feed import DetectionFeed
+
+DETECTIONS = [
+    {"class": "car", "confidence": np.float32(0.8731), "bbox": [10, 20, 110, 90]},
+    {"class": "person", "confidence": 0.5, "bbox": [200, 40, 230, 120], "object_id": 7}
+]
+
+class TestDetectionFeed(unittest.TestCase):
+    def setUp(self):
+        self.feed = DetectionFeed()
+
+    def test_no_serialisation_without_subscribers(self):
+        self.feed.publish(DETECTIONS, (1080, 1920, 3))
+        self.assertIsNone(self.feed.event)
+        self.assertEqual(self.feed.seq, 0)
+
+    def test_event_carries_frame_size_and_detections(self):
+        events = self.feed.events(timeout=1.0)
+        threading.Thread(target=lambda: (time.sleep(0.05), self.feed.publish(DETECTIONS, (1080, 1920, 3), fps=7.04)),
+                         daemon=True).start()
+        event = json.loads(next(events))
+        events.close()
+
+        self.assertEqual(event["frame"], [1920, 1080])
+        self.assertEqual(event["overlay"], "client")
+        self.assertEqual(event["fps"], 7.0)
+        self.assertEqual(event["detections"][0], {"class": "car", "confidence": 0.873, "bbox": [10, 20, 110, 90]})
+        self.assertEqual(event["detections"][1]["object_id"], 7)
+        self.assertFalse(self.feed.wants_events())
+
+    def test_idle_stream_yields_keep_alive(self):
+        events = self.feed.events(timeout=0.01)
+        self.assertIsNone(next(events))
+        events.close()
+
+if __name__ == "__main__":
+    unittest.main()
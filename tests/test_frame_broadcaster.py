@@ -0,0 +1,113 @@
+import sys
+import os
+import threading
+import time
+import unittest
+import numpy as np
+import cv2
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.frame_broadcaster import FrameBroadcaster, StreamClient
+
+def make_image(value):
+    return np.full((48, 64, 3), value, dtype=np.uint8)
+
+class TestFrameBroadcaster(unittest.TestCase):
+    def setUp(self):
+        self.broadcaster = FrameBroadcaster()
+
+    def test_idle_without_subscribers(self):
+        self.assertFalse(self.broadcaster.wants_frames())
+        stream = self.broadcaster.frames(timeout=0.05)
+        threading.Thread(target=lambda: (time.sleep(0.05), self.broadcaster.publish(make_image(10))),
+                         daemon=True).start()
+        first = next(stream)
+        self.assertTrue(first.startswith(b'\xff\xd8'))
+        self.assertTrue(self.broadcaster.wants_frames())
+        stream.close()
+        self.assertFalse(self.broadcaster.wants_frames())
+
+    def test_encodes_once_for_all_subscribers(self):
+        streams = [self.broadcaster.frames(timeout=0.05) for _ in range(3)]
+        results = []
+
+        def consume(stream):
+            results.append(next(stream))
+
+        threads = [threading.Thread(target=consume, args=(s,), daemon=True) for s in streams]
+        for t in threads:
+            t.start()
+        while self.broadcaster.stats()["subscribers"] < 3:
+            time.sleep(0.01)
+        self.broadcaster.publish(make_image(50))
+        for t in threads:
+            t.join(timeout=2.0)
+
+        self.assertEqual(len(results), 3)
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(self.broadcaster.stats()["frames_encoded"], 1)
+
+    def test_slow_client_gets_latest_frame_only(self):
+        stream = self.broadcaster.frames(timeout=0.05)
+        threading.Thread(target=lambda: (time.sleep(0.05), self.broadcaster.publish(make_image(1))),
+                         daemon=True).start()
+        next(stream)
+        # Client is busy while three frames are published
+        for value in (2, 3, 4):
+            last = self.broadcaster.publish(make_image(value * 40))
+        self.assertEqual(next(stream), last)
+        stream.close()
+
+    def test_only_watched_renditions_are_encoded(self):
+        stream = self.broadcaster.frames(rendition="270p", timeout=0.05)
+        threading.Thread(target=lambda: (time.sleep(0.05), self.broadcaster.publish(
+            np.zeros((1080, 1920, 3), dtype=np.uint8))), daemon=True).start()
+        jpeg = next(stream)
+        stream.close()
+
+        image = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+        self.assertEqual(image.shape[:2], (270, 480))
+        stats = self.broadcaster.stats()["renditions"]
+        self.assertEqual(stats["270p"]["frames_encoded"], 1)
+        self.assertEqual(stats["1080p"]["frames_encoded"], 0)
+        self.assertEqual(stats["540p"]["frames_encoded"], 0)
+
+    def test_unknown_rendition_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.broadcaster.resolve("4k")
+        self.assertEqual(self.broadcaster.resolve("auto"), (1, True))
+
+class TestStreamClient(unittest.TestCase):
+    heights = [1080, 540, 270]
+
+    def _feed(self, client, write_time, period, frames, start=100.0):
+        now = start
+        for _ in range(frames):
+            now += period
+            client.record_write(write_time, now)
+        return now
+
+    def test_slow_link_steps_down(self):
+        client = StreamClient(0, auto=True)
+        client.last_switch = 0.0
+        now = self._feed(client, write_time=0.13, period=0.14, frames=10)
+        self.assertEqual(client.choose(self.heights, now), 1)
+
+    def test_fast_link_steps_up_after_hold(self):
+        client = StreamClient(2, auto=True, hold=5.0)
+        client.last_switch = 0.0
+        now = self._feed(client, write_time=0.005, period=0.14, frames=10)
+        self.assertEqual(client.choose(self.heights, now), 1)
+        # Held at the new rung until `hold` elapses
+        now = self._feed(client, write_time=0.005, period=0.14, frames=10, start=now)
+        self.assertEqual(client.choose(self.heights, now), 1)
+
+    def test_fixed_rendition_never_switches(self):
+        client = StreamClient(0, auto=False)
+        now = self._feed(client, write_time=0.2, period=0.1, frames=10)
+        self.assertEqual(client.choose(self.heights, now), 0)
+
+if __name__ == "__main__":
+    unittest.main()
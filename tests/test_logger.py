@@ -0,0 +1,97 @@
+import sys
+import os
+import gzip
+import logging
+import queue
+import shutil
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import logger as app_logging
+from utils.logger import get_logger, RateLimitFilter, NonBlockingQueueHandler
+from utils.clock import ManualClock
+
+def make_record(msg="frame processed", level=logging.INFO, lineno=10):
+    return logging.LogRecord("Test", level, "/app/loop.py", lineno, msg, None, None)
+
+class TestRateLimitFilter(unittest.TestCase):
+    def test_burst_then_suppress_then_report(self):
+        clock = ManualClock(0.0)
+        limiter = RateLimitFilter(period=10.0, burst=3, clock=clock)
+        passed = [limiter.filter(make_record()) for _ in range(10)]
+        self.assertEqual(passed, [True] * 3 + [False] * 7)
+        # Another call site has its own budget
+        self.assertTrue(limiter.filter(make_record(lineno=11)))
+
+        clock.advance(10.0)
+        record = make_record()
+        self.assertTrue(limiter.filter(record))
+        self.assertIn("[7 similar message(s) suppressed]", record.msg)
+        self.assertEqual(limiter.suppressed_total, 7)
+
+    def test_sampling_low_severity(self):
+        limiter = RateLimitFilter(burst=0, sample_level=logging.DEBUG, sample_every=5)
+        passed = sum(limiter.filter(make_record(level=logging.DEBUG)) for _ in range(20))
+        self.assertEqual(passed, 4)
+        # Above the sampling level nothing is sampled away
+        self.assertEqual(sum(limiter.filter(make_record(level=logging.INFO, lineno=2)) for _ in range(20)), 20)
+
+    def test_critical_always_passes(self):
+        limiter = RateLimitFilter(burst=1)
+        self.assertTrue(all(limiter.filter(make_record(level=logging.CRITICAL)) for _ in range(5)))
+
+class TestQueueLogging(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        app_logging.configure_logging()
+        shutil.rmtree(self.tmp)
+
+    def test_get_logger_attaches_one_handler(self):
+        log = get_logger("RepeatedLogger")
+        get_logger("RepeatedLogger")
+        self.assertEqual(len(log.handlers), 1)
+        self.assertIsInstance(log.handlers[0], NonBlockingQueueHandler)
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+        handler.handle(make_record())
+        handler.handle(make_record())
+        self.assertEqual(handler.dropped, 1)
+
+    def test_message_rendered_before_caller_mutates_args(self):
+        log_queue = queue.Queue()
+        handler = NonBlockingQueueHandler(log_queue)
+        counts = {"Cars": 1}
+        record = logging.LogRecord("Test", logging.INFO, "/app/loop.py", 10, "Count result: %s", (counts,), None)
+        handler.handle(record)
+        counts["Cars"] = 2
+        counts["fps"] = 9.5
+        queued = log_queue.get_nowait()
+        self.assertEqual(queued.getMessage(), "Count result: {'Cars': 1}")
+        self.assertIsNone(queued.args)
+
+    def test_lazy_formatting_and_compressed_rotation(self):
+        path = os.path.join(self.tmp, "app.log")
+        app_logging.configure_logging(config={
+            "level": "INFO", "console": False, "queue_size": 100,
+            "file": {"path": path, "max_bytes": 200, "backup_count": 2, "compress": True},
+            "rate_limit": {"period": 10.0, "burst": 0}
+        })
+        log = get_logger("RotationTest")
+        for i in range(20):
+            log.info("line %d of the rotation test", i)
+        app_logging.shutdown_logging()
+
+        with open(path) as f:
+            self.assertIn("of the rotation test", f.read())
+        with gzip.open(path + ".1.gz", "rt") as f:
+            self.assertIn("RotationTest - INFO - line", f.read())
+        self.assertFalse(os.path.exists(path + ".3.gz"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import sys
+import os
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agents.orchestrator import Orchestrator
+
+class TestOrchestratorLifecycle(unittest.TestCase):
+    def setUp(self):
+        self.orch = Orchestrator()
+        # Hardware-free agents: no frames, no backend
+        self.orch.camera = MagicMock()
+        self.orch.camera.get_frame.return_value = None
+        # A stalled camera: wait_frame blocks until its timeout without a frame
+        self.orch.camera.wait_frame.side_effect = lambda last_seq=0, timeout=1.0: (time.sleep(0.05), (None, last_seq, None))[1]
+        self.orch.camera.last_frame_time.return_value = time.time()
+        self.orch.inference = MagicMock()
+        self.orch.inference.config = {"target_fps": 10, "visualize_local": False}
+        self.orch.transport = MagicMock()
+
+    def tearDown(self):
+        self.orch.stop(wait=True, timeout=5.0)
+
+    def test_start_and_stop_return_immediately(self):
+        gate = threading.Event()
+        self.orch.camera.start.side_effect = lambda: gate.wait(2.0)
+
+        started = time.monotonic()
+        self.assertTrue(self.orch.start())
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(self.orch.lifecycle, Orchestrator.STARTING)
+
+        gate.set()
+        self.assertEqual(self.orch.wait_for(Orchestrator.RUNNING, timeout=5.0), Orchestrator.RUNNING)
+        self.assertTrue(self.orch.state.active)
+        self.assertIn("start_latency_ms", self.orch.state.lifecycle)
+
+        self.assertTrue(self.orch.stop())
+        self.assertEqual(self.orch.wait_for(Orchestrator.STOPPED, timeout=5.0), Orchestrator.STOPPED)
+        self.assertFalse(self.orch.state.active)
+        self.assertIn("stop_latency_ms", self.orch.state.lifecycle)
+        self.orch.transport.stop.assert_called_once()
+
+    def test_invalid_transitions_are_rejected(self):
+        self.assertFalse(self.orch.stop())
+        self.assertTrue(self.orch.start(wait=True, timeout=5.0))
+        self.assertFalse(self.orch.start())
+
+    def test_failed_start_returns_to_stopped(self):
+        self.orch.camera.start.side_effect = RuntimeError("Could not open camera device 0")
+        self.orch.start(wait=True, timeout=5.0)
+        self.assertEqual(self.orch.lifecycle, Orchestrator.STOPPED)
+        self.assertEqual(self.orch.state.lifecycle["last_error"], "Could not open camera device 0")
+
+    def test_stop_while_starting(self):
+        gate = threading.Event()
+        self.orch.camera.start.side_effect = lambda: gate.wait(2.0)
+        self.orch.start()
+        self.assertTrue(self.orch.stop())
+        self.assertEqual(self.orch.lifecycle, Orchestrator.STOPPING)
+        gate.set()
+        self.assertEqual(self.orch.wait_for(Orchestrator.STOPPED, timeout=5.0), Orchestrator.STOPPED)
+        self.assertFalse(self.orch.running)
+
+    def test_stalled_camera_marks_degraded_and_recovers(self):
+        self.orch.start(wait=True, timeout=5.0)
+        now = time.time() + 5.0
+        self.orch.camera.last_frame_time.return_value = now - 10.0
+        self.orch._watchdog(now)
+        self.assertEqual(self.orch.lifecycle, Orchestrator.DEGRADED)
+        self.assertTrue(self.orch.state.health["camera_stalled"])
+        self.orch.inference.run_inference.assert_not_called()
+
+        since = self.orch.state.lifecycle["since"]
+        self.orch._watchdog(now + 5.0)
+        self.assertEqual(self.orch.state.lifecycle["since"], since)
+
+        self.orch.camera.last_frame_time.return_value = now + 10.0
+        self.orch._watchdog(now + 10.0)
+        self.assertEqual(self.orch.lifecycle, Orchestrator.RUNNING)
+        self.assertFalse(self.orch.state.health["camera_stalled"])
+
+    def test_watchdog_ignores_stopping_pipeline(self):
+        self.orch.start(wait=True, timeout=5.0)
+        self.orch.lifecycle = Orchestrator.STOPPING
+        self.orch.inference_thread = MagicMock()
+        self.orch.inference_thread.is_alive.return_value = False
+        self.orch.camera.last_frame_time.return_value = 0.0
+        self.orch._watchdog(time.time() + 10.0)
+        self.assertEqual(self.orch.lifecycle, Orchestrator.STOPPING)
+        self.assertIsInstance(self.orch.inference_thread, MagicMock)
+        self.orch.lifecycle = Orchestrator.RUNNING
+
+    def test_governor_steps_are_applied(self):
+        self.orch.governor.level = 3
+        self.orch._apply_governor()
+        self.assertTrue(self.orch.preview_paused)
+        self.assertFalse(self.orch.annotation_enabled)
+        self.assertEqual(self.orch.inference_rate_factor, self.orch.governor.inference_rate_factor)
+        self.orch.camera.request_resolution.assert_called_with(None)
+
+        self.orch.governor.level = 0
+        self.orch._apply_governor()
+        self.assertFalse(self.orch.preview_paused)
+        self.assertTrue(self.orch.annotation_enabled)
+        self.assertEqual(self.orch.inference_rate_factor, 1.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agents.transport_agent import TransportAgent
+from utils.binding_manager import BindingManager
+from utils import payload_codecs
+
+class TestPayloadCodecs(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.binding_manager = BindingManager(binding_path=os.path.join(self.tmpdir, "binding.json"))
+        self.transport = TransportAgent()
+        self.transport.binding = self.binding_manager
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _bind(self, **overrides):
+        bind_data = {
+            "endpoint": "https://example.com/ingest",
+            "auth_token": "token_a",
+            "camera_id": "CAM_01",
+            "site_id": "SITE_01"
+        }
+        bind_data.update(overrides)
+        self.binding_manager.bind(bind_data)
+
+    def test_codec_cached_until_binding_changes(self):
+        self._bind()
+        self.transport._build_counts_payload({"total": 1})
+        codec = self.transport.codec
+        self.transport._build_counts_payload({"total": 2})
+        self.assertIs(self.transport.codec, codec)
+
+        self._bind(payload_format="legacy")
+        payload = self.transport._build_counts_payload({"total": 3})
+        self.assertIsNot(self.transport.codec, codec)
+        self.assertEqual(payload["camera_id"], "CAM_01")
+
+    def test_auth_headers_replaced_on_rebind(self):
+        self._bind(custom_headers={"X-Tenant": "t1"})
+        self.transport._update_session_auth()
+        self.assertEqual(self.transport.session.headers["Authorization"], "Bearer token_a")
+        self.assertEqual(self.transport.session.headers["X-Tenant"], "t1")
+
+        self._bind(auth_mode="apikey", auth_token="token_b")
+        self.transport._update_session_auth()
+        self.assertEqual(self.transport.session.headers["X-API-Key"], "token_b")
+        self.assertNotIn("Authorization", self.transport.session.headers)
+        self.assertNotIn("X-Tenant", self.transport.session.headers)
+        self.assertEqual(self.transport.session.headers["Content-Type"], "application/json")
+
+    def test_universal_identity_is_precomputed(self):
+        self._bind()
+        first = self.transport._build_counts_payload({"total": 1})
+        second = self.transport._build_counts_payload({"total": 2})
+        self.assertIs(first["identity"], second["identity"])
+        self.assertEqual(first["identity"]["site_id"], "SITE_01")
+
+    def test_unknown_format_defaults_to_universal(self):
+        self._bind(payload_format="something_else")
+        self.assertIsInstance(payload_codecs.create_codec(self.binding_manager), payload_codecs.UniversalCodec)
+
+    def test_dumps_is_compact_json(self):
+        self.assertEqual(json.loads(payload_codecs.dumps({"a": [1, 2]})), {"a": [1, 2]})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.pipeline_governor import PipelineGovernor
+from utils.clock import ManualClock
+
+class TestPipelineGovernor(unittest.TestCase):
+    def setUp(self):
+        self.clock = ManualClock()
+        self.governor = PipelineGovernor({
+            "step_down_temp": 78.0,
+            "step_up_temp": 70.0,
+            "step_down_hold_s": 10.0,
+            "step_up_hold_s": 60.0
+        }, clock=self.clock)
+
+    def feed(self, cpu_temp, seconds=5.0, flags=()):
+        self.clock.advance(seconds)
+        return self.governor.evaluate({"cpu_temp": cpu_temp, "hailo_temp": 60.0}, flags)
+
+    def test_steps_down_in_order_with_hold(self):
+        event = self.feed(80.0)
+        self.assertEqual(event["action"], "step_down")
+        self.assertEqual(event["step"], "preview")
+        # Still hot, but within the step-down hold
+        self.assertIsNone(self.feed(80.0))
+        self.assertEqual(self.feed(80.0)["step"], "annotation")
+        self.feed(80.0)
+        self.assertEqual(self.feed(80.0)["step"], "inference_rate")
+        self.feed(80.0)
+        self.assertEqual(self.feed(80.0)["step"], "resolution")
+        self.assertEqual(self.governor.active_steps(), ("preview", "annotation", "inference_rate", "resolution"))
+        # Nothing left to shed
+        self.feed(80.0)
+        self.assertIsNone(self.feed(80.0))
+
+    def test_hysteresis_band_holds_level(self):
+        self.feed(80.0)
+        for _ in range(30):
+            # Between step_up_temp and step_down_temp: no change either way
+            self.assertIsNone(self.feed(74.0))
+        self.assertEqual(self.governor.level, 1)
+
+    def test_steps_up_after_cooling_period(self):
+        self.feed(80.0)
+        self.feed(80.0, seconds=10.0)
+        self.assertEqual(self.governor.level, 2)
+        events = [self.feed(65.0, seconds=10.0) for _ in range(6)]
+        self.assertEqual([e for e in events if e], [])
+        event = self.feed(65.0, seconds=10.0)
+        self.assertEqual(event["action"], "step_up")
+        self.assertEqual(event["step"], "annotation")
+        # The next step up needs another full cool period
+        self.assertIsNone(self.feed(65.0, seconds=10.0))
+        self.assertEqual(self.governor.level, 1)
+
+    def test_throttle_flags_step_down(self):
+        event = self.feed(60.0, flags=["under_voltage"])
+        self.assertEqual(event["reason"], "firmware flags: under_voltage")
+        # Not cool while flags are set, even at low temperature
+        for _ in range(20):
+            self.feed(60.0, seconds=10.0, flags=["under_voltage"])
+        self.assertEqual(self.governor.level, 4)
+
+    def test_custom_order_and_status(self):
+        governor = PipelineGovernor({"order": ["inference_rate", "preview"]}, clock=self.clock)
+        governor.evaluate({"cpu_temp": 90.0})
+        status = governor.status()
+        self.assertEqual(status["active_steps"], ["inference_rate"])
+        self.assertEqual(status["events"][0]["step"], "inference_rate")
+        with self.assertRaises(ValueError):
+            PipelineGovernor({"order": ["fan"]})
+
+    def test_invalid_config(self):
+        for config in ({"inference_rate_factor": 0}, {"inference_rate_factor": 1.5}, {"reduced_resolution": [960]}):
+            with self.assertRaises(ValueError):
+                PipelineGovernor(config)
+
+    def test_disabled(self):
+        governor = PipelineGovernor({"enabled": False}, clock=self.clock)
+        self.assertIsNone(governor.evaluate({"cpu_temp": 95.0}))
+        self.assertEqual(governor.level, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import sys
+import os
+import json
+import threading
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.pipeline_state import PipelineState
+
+class TestPipelineState(unittest.TestCase):
+    def test_snapshot_is_immutable(self):
+        state = PipelineState(counts={"Cars": 2})
+        with self.assertRaises(AttributeError):
+            state.fps = 10.0
+        with self.assertRaises(TypeError):
+            state.counts["Cars"] = 3
+
+    def test_evolve_bumps_version_and_leaves_original(self):
+        source = {"Cars": 2}
+        state = PipelineState(counts=source)
+        source["Cars"] = 99  # Publisher reusing its dict must not leak into the snapshot
+        newer = state.evolve(fps=7.5)
+        self.assertEqual(newer.version, state.version + 1)
+        self.assertEqual(newer.fps, 7.5)
+        self.assertEqual(state.fps, 0.0)
+        self.assertEqual(newer.counts["Cars"], 2)
+        with self.assertRaises(TypeError):
+            state.evolve(colour="red")
+
+    def test_to_dict_is_json_ready_and_cached(self):
+        state = PipelineState(active=True, counts={"Cars": 1}, health={"inference_thread": True})
+        view = state.to_dict()
+        self.assertIs(state.to_dict(), view)
+        self.assertEqual(json.loads(json.dumps(view))["counts"], {"Cars": 1})
+
+    def test_readers_see_consistent_snapshots_during_writes(self):
+        holder = {"state": PipelineState()}
+        lock = threading.Lock()
+        torn = []
+
+        def writer(field, n):
+            for i in range(n):
+                with lock:
+                    value = {"a": i, "b": i}
+                    holder["state"] = holder["state"].evolve(**{field: value})
+
+        def reader():
+            for _ in range(2000):
+                state = holder["state"]
+                counts = state.counts
+                if counts.get("a") != counts.get("b"):
+                    torn.append(dict(counts))
+
+        threads = [threading.Thread(target=writer, args=("counts", 500)),
+                   threading.Thread(target=writer, args=("health", 500)),
+                   threading.Thread(target=reader)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(torn, [])
+        # No lost updates between the two writer threads
+        self.assertEqual(holder["state"].version, 1000)
+
+if __name__ == "__main__":
+    unittest.main()
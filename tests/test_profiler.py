@@ -0,0 +1,93 @@
+import sys
+import os
+import threading
+import time
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.profiler import PipelineProfiler
+
+def busy_work():
+    return sum(i * i for i in range(2000))
+
+class TestPipelineProfiler(unittest.TestCase):
+    def setUp(self):
+        self.profiler = PipelineProfiler()
+        self.running = True
+
+    def tearDown(self):
+        self.running = False
+        self.profiler.stop()
+        self.profiler.memory_stop()
+
+    def _worker(self):
+        while self.running:
+            self.profiler.checkpoint()
+            busy_work()
+            time.sleep(0.002)
+        self.profiler.release()
+
+    def test_rejects_bad_arguments(self):
+        with self.assertRaises(ValueError):
+            self.profiler.start(mode="perf")
+        with self.assertRaises(ValueError):
+            self.profiler.start(duration=0)
+        self.profiler.start(duration=5.0)
+        with self.assertRaises(RuntimeError):
+            self.profiler.start(duration=5.0)
+
+    def test_sampling_collects_collapsed_stacks(self):
+        worker = threading.Thread(target=self._worker, name="Inference", daemon=True)
+        worker.start()
+        self.profiler.start(mode="sampling", duration=0.3, interval=0.005)
+        with self.assertRaises(RuntimeError):
+            self.profiler.export()
+        time.sleep(0.5)
+        self.assertEqual(self.profiler.status()["state"], "finished")
+
+        body, mimetype, filename = self.profiler.export()
+        text = body.decode("utf-8")
+        self.assertTrue(filename.endswith(".collapsed.txt"))
+        self.assertIn("Inference;", text)
+        self.assertIn("_worker (test_profiler.py:", text)
+
+    def test_cprofile_collects_from_pipeline_threads(self):
+        worker = threading.Thread(target=self._worker, name="Inference", daemon=True)
+        worker.start()
+        self.profiler.start(mode="cprofile", duration=5.0)
+        time.sleep(0.2)
+        self.profiler.stop()  # returns once the worker has detached at its next checkpoint
+
+        body, _, filename = self.profiler.export()
+        self.assertTrue(filename.endswith(".txt"))
+        self.assertIn("busy_work", body.decode("utf-8"))
+        self.assertEqual(self.profiler.status()["threads"], ["Inference"])
+
+    def test_idle_checkpoint_installs_nothing(self):
+        self.profiler.checkpoint()
+        self.assertIsNone(getattr(self.profiler._local, "profile", None))
+        self.assertIsNone(sys.getprofile())
+
+    def test_memory_diff(self):
+        first = self.profiler.memory_snapshot()
+        hoard = [bytearray(1024) for _ in range(2000)]
+        self.profiler.memory_snapshot()
+        diff = self.profiler.memory_diff(first["id"])
+        self.assertGreater(diff["size_diff_bytes"], 1024 * 1000)
+        self.assertIn("test_profiler.py", diff["top"][0]["location"])
+        with self.assertRaises(KeyError):
+            self.profiler.memory_diff(99)
+        del hoard
+
+    def test_thread_cpu(self):
+        self.profiler.thread_cpu()
+        busy_work()
+        report = self.profiler.thread_cpu()
+        main = next(t for t in report["threads"] if t["name"] == "MainThread")
+        self.assertGreater(main["cpu_s"], 0)
+        self.assertIn("cpu_percent", main)
+
+if __name__ == '__main__':
+    unittest.main()
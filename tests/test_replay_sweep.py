@@ -0,0 +1,66 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tests.replay_sweep import DetectionStream, ReplayPath, replay, sweep, synthesize, to_raw_output
+
+class TestReplaySweep(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.tmp, "street.jsonl")
+        cls.header = synthesize(cls.path, "intersection", seed=3, duration=30.0, spawn_rate=1.0)
+        cls.stream = DetectionStream(cls.path)
+        cls.replay_path = ReplayPath()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp)
+
+    def test_stream_loading(self):
+        self.assertEqual(self.stream.site_type, "intersection")
+        self.assertEqual(len(self.stream.frames), 900)
+        self.assertAlmostEqual(self.stream.duration, 30.0, delta=0.1)
+        self.assertGreater(self.stream.ground_truth["crossings"], 0)
+
+    def test_postprocess_keeps_object_ids(self):
+        detections = [
+            {"class": "Trucks", "confidence": 0.9, "bbox": [100, 100, 200, 200], "object_id": 1},
+            {"class": "Cars", "confidence": 0.25, "bbox": [300, 100, 400, 200], "object_id": 2},
+            {"class": "Cars", "confidence": 0.8, "bbox": [500, 100, 600, 200], "object_id": 3},
+            {"class": "Pedestrians", "confidence": 0.7, "bbox": [700, 100, 740, 200]}
+        ]
+        raw, ordered_ids = to_raw_output(detections, 1920, 1080)
+        self.assertEqual([class_id for class_id, _ in ordered_ids], [0, 2, 7])
+        self.replay_path.configure(0.3, 0.35)
+        kept = self.replay_path.detect(detections, 1920, 1080)
+        self.assertEqual([(d["class"], d.get("object_id")) for d in kept],
+                         [("Pedestrians", None), ("Cars", 3), ("Trucks", 1)])
+
+    def test_full_rate_replay_matches_ground_truth(self):
+        result = replay(self.replay_path, self.stream, 30.0, 0.1, 0.1, 1)
+        self.assertAlmostEqual(result["inferences_per_s"], 30.0, delta=0.5)
+        self.assertLessEqual(result["errors"]["crossings"], 0.1)
+        self.assertLessEqual(result["errors"]["occupancy"], 0.1)
+
+    def test_skip_and_fps_reduce_inferences(self):
+        result = replay(self.replay_path, self.stream, 10.0, 0.3, 0.35, 2)
+        self.assertAlmostEqual(result["inferences_per_s"], 5.0, delta=0.3)
+
+    def test_sweep_recommends_cheapest_setting_within_budget(self):
+        grid = [{"fps": fps, "confidence_threshold": 0.2, "min_confidence": 0.25, "skip": 1}
+                for fps in (30.0, 10.0)]
+        report = sweep([self.stream], grid, accelerator_ms=10.0, max_error=1.0)
+        site = report["intersection"]
+        self.assertEqual(len(site["settings"]), 2)
+        self.assertEqual(site["recommended"]["fps"], 10.0)
+        self.assertAlmostEqual(site["recommended"]["accelerator_ms_per_s"], 100.0, delta=5.0)
+        self.assertIsNone(sweep([self.stream], grid, 10.0, max_error=-1.0)["intersection"]["recommended"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,245 @@
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agents.transport_agent import TransportAgent
+from utils.binding_manager import BindingManager
+from utils.report_outbox import ReportOutbox
+
+class TestReportOutbox(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, "outbox.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_persists_across_reopen(self):
+        outbox = ReportOutbox(db_path=self.db_path)
+        outbox.put("CAM_01", "https://example.com/ingest", {"n": 1})
+        outbox.close()
+
+        reopened = ReportOutbox(db_path=self.db_path)
+        rows = reopened.peek()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0][3], {"n": 1})
+        reopened.close()
+
+    def test_evicts_oldest_first(self):
+        outbox = ReportOutbox(db_path=self.db_path, max_rows=3)
+        for i in range(5):
+            outbox.put("CAM_01", "https://example.com/ingest", {"n": i})
+        self.assertEqual([r[3]["n"] for r in outbox.peek()], [2, 3, 4])
+        self.assertEqual(outbox.evicted, 2)
+        outbox.close()
+
+    def test_eviction_spans_several_chunks(self):
+        outbox = ReportOutbox(db_path=self.db_path)
+        for i in range(200):
+            outbox.put("CAM_01", "https://example.com/ingest", {"n": i})
+        outbox.max_rows = 10
+        outbox.put("CAM_01", "https://example.com/ingest", {"n": 200})
+        self.assertEqual(outbox.evicted, 191)
+        self.assertEqual([r[3]["n"] for r in outbox.peek(1)], [191])
+        size = outbox.size_bytes()
+        outbox.close()
+
+        reopened = ReportOutbox(db_path=self.db_path)
+        self.assertEqual((reopened.count(), reopened.size_bytes()), (10, size))
+        reopened.close()
+
+    def test_byte_budget(self):
+        outbox = ReportOutbox(db_path=self.db_path, max_bytes=100)
+        for i in range(10):
+            outbox.put("CAM_01", "https://example.com/ingest", {"pad": "x" * 30, "n": i})
+        self.assertLessEqual(outbox.size_bytes(), 100)
+        self.assertEqual(outbox.peek()[-1][3]["n"], 9)
+        outbox.close()
+
+    def test_ack_removes_rows(self):
+        outbox = ReportOutbox(db_path=self.db_path)
+        row_id = outbox.put("CAM_01", "https://example.com/ingest", {"n": 1})
+        outbox.ack([row_id])
+        self.assertEqual(outbox.count(), 0)
+        outbox.close()
+
+    def test_dead_letter_moves_and_bounds_rows(self):
+        outbox = ReportOutbox(db_path=self.db_path, max_dead_letters=2)
+        ids = [outbox.put("CAM_01", "https://example.com/ingest", {"n": i}) for i in range(4)]
+        self.assertEqual(outbox.mark_failed(ids[0]), 1)
+        for row_id in ids[:3]:
+            outbox.dead_letter([row_id], "rejected by backend")
+        self.assertEqual([r[3]["n"] for r in outbox.peek()], [3])
+        self.assertEqual(outbox.count(), 1)
+        self.assertEqual(outbox.dead_letter_count(), 2)
+        self.assertEqual(outbox.dead_lettered, 3)
+        self.assertEqual([(r[2]["n"], r[4]) for r in outbox.dead_letters()],
+                         [(2, "rejected by backend"), (1, "rejected by backend")])
+        outbox.close()
+
+class TestTransportOutboxDrain(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.binding_manager = BindingManager(binding_path=os.path.join(self.tmpdir, "binding.json"))
+        self.binding_manager.bind({
+            "endpoint": "https://example.com/ingest",
+            "auth_token": "token",
+            "payload_format": "legacy",
+            "camera_id": "CAM_01",
+            "site_id": "SITE_01"
+        })
+        self.transport = TransportAgent()
+        self.transport.binding = self.binding_manager
+        self.transport.outbox = ReportOutbox(db_path=os.path.join(self.tmpdir, "outbox.db"))
+
+    def tearDown(self):
+        self.transport.outbox.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_failed_head_blocks_camera(self):
+        for i in range(3):
+            self.transport.enqueue_counts({"total": i})
+
+        sent = []
+        def fake_post(url, payload):
+            sent.append(payload["counts"]["total"])
+            return False
+
+        with patch.object(self.transport, '_post_raw', side_effect=fake_post):
+            delivered, failed = self.transport._drain_once(batch_size=10, min_gap=0)
+
+        # Only the head was attempted; newer reports wait behind it
+        self.assertEqual(sent, [0])
+        self.assertEqual((delivered, failed), (0, 1))
+        self.assertEqual(self.transport.outbox.count(), 3)
+
+    def test_drains_in_order(self):
+        for i in range(3):
+            self.transport.enqueue_counts({"total": i})
+
+        sent = []
+        def fake_post(url, payload):
+            sent.append(payload["counts"]["total"])
+            return True
+
+        with patch.object(self.transport, '_post_raw', side_effect=fake_post):
+            self.transport._drain_once(batch_size=10, min_gap=0)
+
+        self.assertEqual(sent, [0, 1, 2])
+        self.assertEqual(self.transport.outbox.count(), 0)
+
+    def test_permanent_rejection_does_not_block_camera(self):
+        for i in range(3):
+            self.transport.enqueue_counts({"total": i})
+
+        sent = []
+        def fake_post(url, payload):
+            sent.append(payload["counts"]["total"])
+            return None if payload["counts"]["total"] == 0 else True
+
+        with patch.object(self.transport, '_post_raw', side_effect=fake_post):
+            delivered, failed = self.transport._drain_once(batch_size=10, min_gap=0)
+
+        self.assertEqual(sent, [0, 1, 2])
+        self.assertEqual(failed, 0)
+        self.assertEqual(self.transport.outbox.count(), 0)
+        self.assertEqual(self.transport.outbox.dead_letter_count(), 1)
+        self.assertEqual(self.transport.get_health()["outbox_dead_lettered"], 1)
+
+    def test_head_dead_lettered_after_max_attempts(self):
+        self.transport.config.setdefault("outbox", {})["max_attempts"] = 3
+        for i in range(2):
+            self.transport.enqueue_counts({"total": i})
+
+        def fake_post(url, payload):
+            return payload["counts"]["total"] != 0
+
+        with patch.object(self.transport, '_post_raw', side_effect=fake_post):
+            for _ in range(2):
+                self.assertEqual(self.transport._drain_once(batch_size=10, min_gap=0), (0, 1))
+            self.transport._drain_once(batch_size=10, min_gap=0)
+
+        self.assertEqual(self.transport.outbox.count(), 0)
+        self.assertEqual(self.transport.outbox.dead_letters()[0][4], "failed 3 attempts")
+
+    def test_outage_does_not_use_up_attempts(self):
+        self.transport.config.setdefault("outbox", {})["max_attempts"] = 1
+        self.transport.enqueue_counts({"total": 0})
+        self.transport.breaker.state = self.transport.breaker.OPEN
+
+        with patch.object(self.transport, '_post_raw', return_value=False):
+            self.assertEqual(self.transport._drain_once(batch_size=10, min_gap=0), (0, 1))
+
+        self.assertEqual(self.transport.outbox.count(), 1)
+        self.assertEqual(self.transport.outbox.dead_letter_count(), 0)
+
+class TestTransportSenderLifecycle(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.binding_manager = BindingManager(binding_path=os.path.join(self.tmpdir, "binding.json"))
+        self.binding_manager.bind({
+            "endpoint": "https://example.com/ingest",
+            "auth_token": "token",
+            "payload_format": "legacy",
+            "camera_id": "CAM_01",
+            "site_id": "SITE_01"
+        })
+        self.transport = TransportAgent()
+        self.transport.binding = self.binding_manager
+        self.transport.config["outbox"] = {"path": os.path.join(self.tmpdir, "outbox.db"), "max_backoff": 0.05}
+        self.transport.config["timeout"] = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_sender_survives_drain_errors(self):
+        calls = []
+        def flaky_post(url, payload):
+            calls.append(payload["counts"]["total"])
+            if len(calls) == 1:
+                raise ValueError("codec exploded")
+            return True
+
+        with patch.object(self.transport, '_post_raw', side_effect=flaky_post):
+            self.transport.start()
+            self.transport.enqueue_counts({"total": 1})
+            for _ in range(100):
+                if self.transport.outbox.count() == 0:
+                    break
+                time.sleep(0.05)
+            self.assertTrue(self.transport.sender_thread.is_alive())
+            self.assertEqual(self.transport.outbox.count(), 0)
+            self.transport.stop(flush_timeout=0.5)
+        self.assertEqual(calls, [1, 1])
+        self.assertIsNone(self.transport.outbox)
+
+    def test_outbox_closed_only_after_sender_exits(self):
+        entered = threading.Event()
+        release = threading.Event()
+        def stuck_post(url, payload):
+            entered.set()
+            release.wait(5)
+            return True
+
+        with patch.object(self.transport, '_post_raw', side_effect=stuck_post):
+            self.transport.start()
+            self.transport.enqueue_counts({"total": 1})
+            self.assertTrue(entered.wait(5))
+            self.transport.stop(flush_timeout=0.05)
+            # The sender is still inside its send, so the outbox must stay open
+            self.assertIsNotNone(self.transport.outbox)
+            release.set()
+            self.transport.sender_thread.join(5)
+        self.assertFalse(self.transport.sender_thread.is_alive())
+        self.assertIsNone(self.transport.outbox)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.report_scheduler import ReportScheduler
+from utils.clock import ManualClock
+
+class TestReportScheduler(unittest.TestCase):
+    def setUp(self):
+        # 2026-01-12T20:00:07Z, i.e. 7 s into a 15 s interval
+        self.clock = ManualClock(1768248007.0)
+
+    def _scheduler(self, serial="HAILO-A001-10000000abcdef01", **kwargs):
+        return ReportScheduler(15.0, serial=serial, clock=self.clock, **kwargs)
+
+    def test_boundaries_are_wall_clock_aligned(self):
+        sched = self._scheduler()
+        self.assertEqual(sched.next_start % 15.0, 0.0)
+        self.assertIsNone(sched.poll(sched.due_at - 0.01))
+
+        tag = sched.poll(sched.due_at)
+        self.assertEqual(tag["interval_start"], "2026-01-12T20:00:00Z")
+        self.assertFalse(tag["late"])
+
+        tag = sched.poll(sched.due_at + 0.5)
+        self.assertEqual(tag["interval_start"], "2026-01-12T20:00:15Z")
+        self.assertFalse(tag["late"])
+
+    def test_phase_is_deterministic_and_spread(self):
+        phases = [self._scheduler(serial=f"HAILO-SIM-{i:06d}").phase for i in range(200)]
+        self.assertEqual(phases[3], self._scheduler(serial="HAILO-SIM-000003").phase)
+        self.assertTrue(all(0 <= p < 15.0 * 0.8 for p in phases))
+        # A site powering up together spreads across most of the interval
+        self.assertGreater(max(phases) - min(phases), 10.0)
+
+    def test_late_report_keeps_true_interval_start(self):
+        sched = self._scheduler(phase_spread=0.0)
+        tag = sched.poll(sched.due_at + 5.0)
+        self.assertTrue(tag["late"])
+        self.assertEqual(tag["interval_start"], "2026-01-12T20:00:00Z")
+        self.assertEqual(sched.late_reports, 1)
+
+    def test_stall_skips_missed_intervals(self):
+        sched = self._scheduler(phase_spread=0.0)
+        tag = sched.poll(sched.due_at + 31.0)
+        self.assertEqual(tag["interval_start"], "2026-01-12T20:00:30Z")
+        self.assertTrue(tag["late"])
+        self.assertEqual(sched.skipped_intervals, 2)
+        # Back on the regular grid afterwards
+        self.assertEqual(sched.due_at, 1768248060.0)
+
+    def test_reset_applies_new_interval(self):
+        sched = self._scheduler(phase_spread=0.0)
+        sched.reset(60.0)
+        self.assertEqual(sched.interval, 60.0)
+        self.assertEqual(sched.due_at, 1768248060.0)
+
+    def test_report_seq_distinguishes_repeated_interval(self):
+        sched = self._scheduler(phase_spread=0.0)
+        first = sched.poll(sched.due_at)
+        # Restarted mid-interval: the same interval start is reported again
+        self.clock.advance(1.0)
+        sched.reset()
+        second = sched.poll(sched.due_at)
+        self.assertEqual(first["interval_start"], second["interval_start"])
+        self.assertGreater(second["report_seq"], first["report_seq"])
+        # A new process continues above the previous one's sequence
+        self.assertGreater(self._scheduler().report_seq, second["report_seq"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.stage_metrics import StageMetrics, Histogram
+
+class TestHistogram(unittest.TestCase):
+    def test_buckets_are_cumulative(self):
+        histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+        for value in (0.005, 0.05, 0.05, 0.5, 5.0):
+            histogram.observe(value)
+        cumulative, total, count = histogram.snapshot()
+        self.assertEqual(cumulative, [1, 3, 4, 5])
+        self.assertEqual(count, 5)
+        self.assertAlmostEqual(total, 5.605)
+
+    def test_quantile_returns_bucket_bound(self):
+        histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+        self.assertIsNone(histogram.quantile(0.5))
+        for _ in range(9):
+            histogram.observe(0.005)
+        histogram.observe(0.5)
+        self.assertEqual(histogram.quantile(0.5), 0.01)
+        self.assertEqual(histogram.quantile(0.99), 1.0)
+
+class TestStageMetrics(unittest.TestCase):
+    def setUp(self):
+        self.metrics = StageMetrics(buckets=(0.01, 0.1), labels={"serial": "SN1"})
+
+    def test_prometheus_exposition(self):
+        self.metrics.observe("infer", 0.02)
+        self.metrics.inc("frames_dropped_total", 3, stage="inference")
+        self.metrics.register_gauge("queue_depth", lambda: {"outbox": 4}, "Pending items.")
+        text = self.metrics.render_prometheus()
+
+        self.assertIn("# TYPE traffic_ai_stage_seconds histogram", text)
+        self.assertIn('traffic_ai_stage_seconds_bucket{serial="SN1",stage="infer",le="0.01"} 0', text)
+        self.assertIn('traffic_ai_stage_seconds_bucket{serial="SN1",stage="infer",le="0.1"} 1', text)
+        self.assertIn('traffic_ai_stage_seconds_bucket{serial="SN1",stage="infer",le="+Inf"} 1', text)
+        self.assertIn('traffic_ai_stage_seconds_count{serial="SN1",stage="infer"} 1', text)
+        self.assertIn('traffic_ai_frames_dropped_total{serial="SN1",stage="inference"} 3', text)
+        self.assertIn('traffic_ai_queue_depth{serial="SN1",queue="outbox"} 4', text)
+        # Every known stage is exported, even before its first observation
+        self.assertIn('traffic_ai_stage_seconds_count{serial="SN1",stage="transport_send"} 0', text)
+
+    def test_timer_records_stage(self):
+        with self.metrics.time("counting"):
+            pass
+        self.assertEqual(self.metrics.snapshot()["stages"]["counting"]["count"], 1)
+
+    def test_failing_gauge_is_skipped(self):
+        self.metrics.register_gauge("broken", lambda: 1 / 0)
+        self.assertNotIn("traffic_ai_broken", self.metrics.render_prometheus())
+
+    def test_disabled_records_nothing(self):
+        metrics = StageMetrics(enabled=False)
+        metrics.observe("infer", 0.5)
+        metrics.inc("frames_dropped_total", stage="inference")
+        self.assertEqual(metrics.snapshot(), {"stages": {}, "counters": {}})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.status_hub import StatusHub
+from utils.circuit_breaker import CircuitBreaker
+from utils.clock import ManualClock
+
+class TestStatusHub(unittest.TestCase):
+    def setUp(self):
+        self.clock = ManualClock()
+        self.state = {"counts": {"Cars": 1}, "fps": {"fps": 7.0}, "binding": {"bound": False}}
+        self.collects = 0
+        self.hub = StatusHub(self._collect, min_interval=0.5, clock=self.clock)
+
+    def _collect(self):
+        self.collects += 1
+        return {k: dict(v) for k, v in self.state.items()}
+
+    def _tick(self):
+        self.clock.advance(1.0)
+        return self.hub.refresh()
+
+    def test_version_only_advances_on_change(self):
+        self.assertEqual(self._tick(), 1)
+        self.assertEqual(self._tick(), 1)
+        self.state["counts"]["Cars"] = 2
+        self.assertEqual(self._tick(), 2)
+
+    def test_open_circuit_does_not_advance_version(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=30.0, probe_jitter=0.0, clock=self.clock)
+        hub = StatusHub(lambda: {"health": {"transport": {"circuit": breaker.snapshot()}}},
+                        min_interval=0.5, clock=self.clock)
+        breaker.allow_request()
+        breaker.record_failure()
+        version = hub.refresh()
+        for _ in range(40):
+            self.clock.advance(0.5)
+            self.assertEqual(hub.refresh(), version)
+        self.assertEqual(hub.changes_since(version), (version, {}))
+
+    def test_sampling_is_rate_limited(self):
+        self._tick()
+        for _ in range(10):
+            self.hub.refresh()
+        self.assertEqual(self.collects, 1)
+        self.hub.refresh(force=True)
+        self.assertEqual(self.collects, 2)
+
+    def test_render_is_cached_per_version(self):
+        builds = []
+        build = lambda sections: builds.append(1) or str(sections["counts"])
+        v1, body1 = self.hub.render("status", build)
+        v2, body2 = self.hub.render("status", build)
+        self.assertEqual((v1, body1), (v2, body2))
+        self.assertEqual(len(builds), 1)
+        self.assertNotEqual(self.hub.etag(v1), self.hub.etag(v1 + 1))
+
+    def test_changes_since_merges_only_changed_sections(self):
+        base = self._tick()
+        self.state["counts"]["Cars"] = 5
+        self._tick()
+        self.state["fps"]["fps"] = 6.5
+        current = self._tick()
+        version, changes = self.hub.changes_since(base)
+        self.assertEqual(version, current)
+        self.assertEqual(changes, {"counts": {"Cars": 5}, "fps": {"fps": 6.5}})
+        self.assertEqual(self.hub.changes_since(current), (current, {}))
+
+    def test_stream_snapshot_then_deltas_and_resume(self):
+        self._tick()
+        events = self.hub.events(heartbeat=3600)
+        event, event_id, data = next(events)
+        self.assertEqual(event, "snapshot")
+        self.assertEqual(data["sections"]["binding"], {"bound": False})
+
+        self.state["binding"]["bound"] = True
+        self._tick()
+        event, event_id, data = next(events)
+        self.assertEqual(event, "delta")
+        self.assertEqual(data["changes"], {"binding": {"bound": True}})
+        events.close()
+
+        # Reconnect with Last-Event-ID: only what changed since then
+        self.state["counts"]["Cars"] = 9
+        self._tick()
+        resumed = self.hub.events(since=self.hub.parse_version(event_id), heartbeat=3600)
+        event, _, data = next(resumed)
+        self.assertEqual(event, "delta")
+        self.assertEqual(data["changes"], {"counts": {"Cars": 9}})
+        resumed.close()
+        self.assertEqual(self.hub.subscribers, 0)
+
+    def test_unknown_or_expired_version_gets_snapshot(self):
+        self._tick()
+        self.assertIsNone(self.hub.parse_version("deadbeef-1"))
+        stale = self.hub.events(since=None, heartbeat=3600)
+        self.assertEqual(next(stale)[0], "snapshot")
+        stale.close()
+
+if __name__ == "__main__":
+    unittest.main()
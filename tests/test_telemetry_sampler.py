@@ -0,0 +1,86 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.hardware_monitor import HardwareMonitor
+from utils.telemetry_sampler import TelemetrySampler
+from utils.clock import ManualClock
+
+class TestTelemetrySampler(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.monitor = HardwareMonitor(sysfs_root=self.root)
+        self._write("class/thermal/thermal_zone0/temp", "61234")
+        self._write("devices/system/cpu/cpu0/cpufreq/scaling_cur_freq", "1500000")
+        self._write("devices/platform/soc/soc:firmware/get_throttled", "0x0")
+        self.clock = ManualClock()
+        self.identify = patch.object(HardwareMonitor, "get_hailo_identify", return_value=(55.0, 40.0))
+        self.identify_mock = self.identify.start()
+        self.sampler = TelemetrySampler(self.monitor, interval=5.0, hailo_every=2, clock=self.clock)
+
+    def tearDown(self):
+        self.identify.stop()
+        self.sampler.stop()
+        shutil.rmtree(self.root)
+
+    def _write(self, relative, value):
+        path = os.path.join(self.root, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(value)
+
+    def test_reads_sysfs(self):
+        sample = self.sampler.sample_once()
+        self.assertAlmostEqual(sample["cpu_temp"], 61.234)
+        self.assertEqual(sample["cpu_freq_mhz"], 1500.0)
+        self.assertEqual(sample["throttled"], 0)
+        self.assertEqual(sample["hailo_temp"], 55.0)
+
+    def test_hailo_sampled_every_nth(self):
+        for _ in range(4):
+            self.sampler.sample_once()
+        self.assertEqual(self.identify_mock.call_count, 2)
+        # Samples in between carry the last Hailo reading
+        self.assertEqual(self.sampler.latest()["hailo_load"], 40.0)
+
+    def test_report_summary_covers_samples_since_last_report(self):
+        for temp in ("60000", "70000", "65000"):
+            self._write("class/thermal/thermal_zone0/temp", temp)
+            self.clock.advance(5)
+            self.sampler.sample_once()
+        self._write("devices/platform/soc/soc:firmware/get_throttled", "0x50004")
+        self.clock.advance(5)
+        self.sampler.sample_once()
+
+        summary = self.sampler.report_summary()
+        self.assertEqual(summary["samples"], 4)
+        self.assertEqual(summary["stats"]["cpu_temp"], {"min": 60.0, "max": 70.0, "avg": 65.0})
+        self.assertEqual(summary["cpu_temp"], 65.0)
+        self.assertEqual(summary["throttled"], ["throttling"])
+
+        self._write("devices/platform/soc/soc:firmware/get_throttled", "0x0")
+        self.clock.advance(5)
+        self.sampler.sample_once()
+        summary = self.sampler.report_summary()
+        self.assertEqual(summary["samples"], 1)
+        self.assertEqual(summary["throttled"], [])
+
+    def test_report_without_new_samples_repeats_latest(self):
+        self.sampler.sample_once()
+        self.sampler.report_summary()
+        self.clock.advance(1)
+        self.assertEqual(self.sampler.report_summary()["samples"], 1)
+
+    def test_missing_sysfs(self):
+        monitor = HardwareMonitor(sysfs_root=os.path.join(self.root, "absent"))
+        self.assertIsNone(monitor.get_cpu_freq_mhz())
+        self.assertIsNone(monitor.get_throttled())
+
+if __name__ == '__main__':
+    unittest.main()
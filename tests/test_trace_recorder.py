@@ -0,0 +1,80 @@
+import sys
+import os
+import json
+import threading
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.trace_recorder import TraceRecorder
+
+class TestTraceRecorder(unittest.TestCase):
+    def test_sampling_is_consistent_per_trace_id(self):
+        recorder = TraceRecorder(sample_rate=0.25)
+        for seq in range(1, 9):
+            with recorder.span("inference", seq):
+                pass
+            with recorder.span("counting", seq):
+                pass
+        traced = sorted({s[3] for s in recorder.spans})
+        # Every 4th frame, with all of its stages
+        self.assertEqual(traced, [4, 8])
+        self.assertEqual(len(recorder.spans), 4)
+
+    def test_untraced_spans_are_always_recorded(self):
+        recorder = TraceRecorder(sample_rate=0.0)
+        with recorder.span("inference", 3):
+            pass
+        with recorder.span("GET /api/detection/status"):
+            pass
+        self.assertEqual([s[2] for s in recorder.untraced_spans], ["GET /api/detection/status"])
+        self.assertEqual(len(recorder.spans), 0)
+
+    def test_untraced_spans_do_not_evict_frame_traces(self):
+        recorder = TraceRecorder(capacity=4, sample_rate=1.0, untraced_capacity=2)
+        for seq in range(1, 5):
+            recorder.record("capture", seq, 1.0, 1.001)
+        for _ in range(50):
+            recorder.record("GET /api/detection/status", None, 1.0, 1.001)
+        self.assertEqual([s[3] for s in recorder.spans], [1, 2, 3, 4])
+        self.assertEqual(len(recorder.untraced_spans), 2)
+
+    def test_ring_buffer_keeps_newest(self):
+        recorder = TraceRecorder(capacity=3, sample_rate=1.0)
+        for seq in range(1, 6):
+            recorder.record("capture", seq, 1.0, 1.001)
+        self.assertEqual([s[3] for s in recorder.spans], [3, 4, 5])
+
+    def test_disabled_records_nothing(self):
+        recorder = TraceRecorder(sample_rate=1.0, enabled=False)
+        with recorder.span("inference", 1):
+            pass
+        recorder.record("report", None, 1.0, 2.0)
+        self.assertEqual(len(recorder.spans), 0)
+
+    def test_chrome_export(self):
+        recorder = TraceRecorder(sample_rate=1.0)
+        worker = threading.Thread(target=lambda: recorder.span("inference", 7, objects=2).__enter__().__exit__(None, None, None),
+                                  name="Inference")
+        worker.start()
+        worker.join()
+        trace = json.loads(json.dumps(recorder.export_chrome(seconds=60)))
+
+        spans = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+        self.assertEqual(len(spans), 1)
+        self.assertEqual(spans[0]["name"], "inference")
+        self.assertEqual(spans[0]["args"], {"objects": 2, "trace_id": 7})
+        thread_names = [e["args"]["name"] for e in trace["traceEvents"] if e["name"] == "thread_name"]
+        self.assertEqual(thread_names, ["Inference"])
+
+    def test_export_window(self):
+        recorder = TraceRecorder(sample_rate=1.0)
+        recorder.record("capture", 1, 0.0, 0.001)  # long before the window
+        with recorder.span("capture", 2):
+            pass
+        spans = [e for e in recorder.export_chrome(seconds=5)["traceEvents"] if e["ph"] == "X"]
+        self.assertEqual([e["args"]["trace_id"] for e in spans], [2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import sys
+import os
+import json
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agents.trajectory_analyzer import TrajectoryAnalyzer
+
+class TestTrajectoryAnalyzer(unittest.TestCase):
+    def setUp(self):
+        # 1 pixel == 0.1 m on both axes
+        config = {
+            "enabled": True,
+            "homography": [[0.1, 0, 0], [0, 0.1, 0], [0, 0, 1]],
+            "anchor": "center",
+            "zones": [{"name": "box", "polygon": [[0, 0], [20, 0], [20, 20], [0, 20]]}],
+            "speed_bins_kmh": [0, 10, 20, 40],
+            "dwell_bins_s": [0, 1, 5],
+            "max_track_age": 0.5,
+            "min_track_updates": 3
+        }
+        self.tmp = tempfile.NamedTemporaryFile('w', suffix='.json', delete=False)
+        json.dump(config, self.tmp)
+        self.tmp.close()
+        self.analyzer = TrajectoryAnalyzer(config_path=self.tmp.name)
+
+    def tearDown(self):
+        os.remove(self.tmp.name)
+
+    def _move(self, obj_id, start_x, px_per_frame, frames, fps=10.0, t0=0.0):
+        for i in range(frames):
+            x = start_x + i * px_per_frame
+            det = {"object_id": obj_id, "bbox": [x - 5, 95, x + 5, 105]}
+            self.analyzer.process([det], t0 + i / fps)
+
+    def test_disabled_without_config(self):
+        analyzer = TrajectoryAnalyzer(config_path="config/does_not_exist.json")
+        analyzer.process([{"object_id": 1, "bbox": [0, 0, 10, 10]}], 0.0)
+        self.assertIsNone(analyzer.flush_interval())
+
+    def test_image_to_ground(self):
+        self.assertEqual(self.analyzer.image_to_ground(100, 50), (10.0, 5.0))
+
+    def test_speed_histogram(self):
+        # 5 px/frame at 10 FPS = 50 px/s = 5 m/s = 18 km/h
+        self._move(1, 0, 5, 40)
+        summary = self.analyzer.flush_interval()
+        self.assertEqual(summary["speed_kmh"]["samples"], 1)
+        self.assertEqual(summary["speed_kmh"]["counts"], [0, 1, 0, 0])
+        # Interval data is cleared after a flush
+        self.assertEqual(self.analyzer.flush_interval()["speed_kmh"]["samples"], 0)
+
+    def test_dwell_inside_zone(self):
+        # Object sits at (1 m, 10 m) for 2 s, then vanishes
+        for i in range(21):
+            self.analyzer.process([{"object_id": 7, "bbox": [5, 95, 15, 105]}], i / 10.0)
+        self.analyzer.process([], 3.0)
+        dwell = self.analyzer.flush_interval()["dwell_s"]["box"]
+        self.assertEqual(dwell["counts"], [0, 1, 0])
+
+    def test_points_scaled_to_calibration_resolution(self):
+        self.assertEqual(self.analyzer.calibration_resolution, (1920, 1080))
+        full = self.analyzer.image_to_ground(960, 540, frame_size=(1920, 1080))
+        reduced = self.analyzer.image_to_ground(480, 270, frame_size=(960, 540))
+        self.assertAlmostEqual(full[0], reduced[0])
+        self.assertAlmostEqual(full[1], reduced[1])
+        self.assertAlmostEqual(full[0], 96.0)
+
+    def test_detections_without_track_ids_are_ignored(self):
+        self.analyzer.process([{"class": "Cars", "bbox": [0, 0, 10, 10]}], 0.0)
+        self.assertEqual(self.analyzer.tracks, {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -11,6 +11,8 @@ class BindingManager:
         self.binding_path = binding_path
         self.config = self._load_binding()
         self.serial_number = self._generate_serial()
+        # Bumped on every bind/unbind so consumers can cache derived state
+        self.version = 0
 
     def _load_binding(self):
         if os.path.exists(self.binding_path):
@@ -52,6 +54,7 @@ class BindingManager:
             with open(self.binding_path, 'w') as f:
                 json.dump(config_data, f, indent=4)
             self.config = config_data
+            self.version += 1
             self.logger.info("Hardware BOUND successfully.")
             return True
         except Exception as e:
@@ -64,6 +67,7 @@ class BindingManager:
             if os.path.exists(self.binding_path):
                 os.remove(self.binding_path)
             self.config = {"bound": False}
+            self.version += 1
             self.logger.info("Hardware UNBOUND (Factory Reset).")
             return True
         except Exception as e:
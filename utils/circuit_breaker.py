@@ -0,0 +1,144 @@
+import random
+import threading
+import time
+from collections import deque
+from utils.logger import get_logger
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker with a global retry budget.
+
+    - CLOSED: requests flow; `failure_threshold` consecutive failures open the circuit.
+    - OPEN: requests are refused locally until a jittered recovery timeout elapses.
+    - HALF_OPEN: a single probe request is let through; success closes the circuit,
+      failure re-opens it with a doubled (capped) recovery timeout.
+
+    Retries are only allowed while they stay under `retry_budget_ratio` of the
+    requests seen in the last `budget_window` seconds, so retries can never
+    multiply load on a struggling backend.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, recovery_timeout=15.0, max_recovery_timeout=300.0,
+                 probe_jitter=0.3, retry_budget_ratio=0.1, budget_window=60.0, min_retry_budget=3,
+                 clock=time.time):
+        self.logger = get_logger(self.__class__.__name__)
+        self.failure_threshold = failure_threshold
+        self.base_recovery_timeout = recovery_timeout
+        self.max_recovery_timeout = max_recovery_timeout
+        self.probe_jitter = probe_jitter
+        self.retry_budget_ratio = retry_budget_ratio
+        self.budget_window = budget_window
+        self.min_retry_budget = min_retry_budget
+        self.clock = clock
+
+        self.lock = threading.Lock()
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.recovery_timeout = recovery_timeout
+        self.next_probe_at = 0.0
+        self.probe_in_flight = False
+        self.opened_at = None
+
+        self.requests = deque()  # timestamps of first attempts
+        self.retries = deque()   # timestamps of retries
+        self.refused = 0
+        self.retries_denied = 0
+
+    def _trim(self, now):
+        horizon = now - self.budget_window
+        while self.requests and self.requests[0] < horizon:
+            self.requests.popleft()
+        while self.retries and self.retries[0] < horizon:
+            self.retries.popleft()
+
+    def _retry_budget(self):
+        return max(self.min_retry_budget, int(len(self.requests) * self.retry_budget_ratio))
+
+    def allow_request(self, is_retry=False):
+        """Returns True if a request (or retry) may be sent now."""
+        with self.lock:
+            now = self.clock()
+            self._trim(now)
+
+            if self.state == self.OPEN:
+                if now < self.next_probe_at:
+                    self.refused += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self.probe_in_flight = False
+                self.logger.info("Circuit HALF-OPEN: sending probe request")
+
+            if self.state == self.HALF_OPEN:
+                if self.probe_in_flight or is_retry:
+                    self.refused += 1
+                    return False
+                self.probe_in_flight = True
+                self.requests.append(now)
+                return True
+
+            if is_retry:
+                if len(self.retries) >= self._retry_budget():
+                    self.retries_denied += 1
+                    return False
+                self.retries.append(now)
+            else:
+                self.requests.append(now)
+            return True
+
+    def record_success(self):
+        with self.lock:
+            if self.state != self.CLOSED:
+                outage = self.clock() - self.opened_at if self.opened_at else 0
+                self.logger.info(f"Circuit CLOSED: backend recovered after {outage:.0f}s")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self.recovery_timeout = self.base_recovery_timeout
+            self.probe_in_flight = False
+            self.opened_at = None
+
+    def record_failure(self):
+        with self.lock:
+            now = self.clock()
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN:
+                # Probe failed: back off further before the next probe
+                self.recovery_timeout = min(self.recovery_timeout * 2, self.max_recovery_timeout)
+                self._open(now)
+            elif self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self.opened_at = now
+                self._open(now)
+
+    def _open(self, now):
+        """Caller holds the lock."""
+        jitter = random.uniform(-self.probe_jitter, self.probe_jitter)
+        delay = self.recovery_timeout * (1 + jitter)
+        self.state = self.OPEN
+        self.probe_in_flight = False
+        self.next_probe_at = now + delay
+        self.logger.warning(f"Circuit OPEN after {self.consecutive_failures} failure(s); next probe in {delay:.1f}s")
+
+    def snapshot(self):
+        """
+        Returns a JSON-serialisable view of the breaker state.
+
+        Times are absolute clock values (`opened_at`, `next_probe_at`) rather than
+        durations, so the snapshot only changes when the breaker state does;
+        clients compute "open for" / "next probe in" themselves.
+        """
+        with self.lock:
+            now = self.clock()
+            self._trim(now)
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "opened_at": self.opened_at,
+                "next_probe_at": round(self.next_probe_at, 3) if self.state == self.OPEN else None,
+                "requests_in_window": len(self.requests),
+                "retries_in_window": len(self.retries),
+                "retry_budget": self._retry_budget(),
+                "refused": self.refused,
+                "retries_denied": self.retries_denied
+            }
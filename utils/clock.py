@@ -0,0 +1,110 @@
+import time
+
+class Clock:
+    """
+    Time source for the pipeline's scheduling decisions.
+
+    Agents take a `clock` and use it for wall-clock timestamps, monotonic
+    deadlines and every sleep or timed wait, so a simulation can run them on
+    virtual time. Stage latencies (perf_counter) always stay real: they
+    measure cost, not schedule.
+    """
+
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def wait(self, event, timeout=None):
+        """event.wait(timeout) with `timeout` in clock seconds. Returns the event flag."""
+        return event.wait(timeout)
+
+    def wait_for(self, cond, predicate, timeout=None):
+        """cond.wait_for(predicate, timeout) with `timeout` in clock seconds. Caller holds `cond`."""
+        return cond.wait_for(predicate, timeout)
+
+SYSTEM_CLOCK = Clock()
+
+class ScaledClock(Clock):
+    """
+    Virtual time running `speed` times faster than real time.
+
+    Starts at `start` (default: now) and advances with the real clock, so
+    threads, locks and I/O behave normally while every clock-based interval
+    shrinks by `speed`: at speed=600 a 15 s report interval takes 25 ms and
+    24 hours take 144 s.
+    """
+
+    def __init__(self, speed=600.0, start=None):
+        if speed <= 0:
+            raise ValueError("speed must be positive")
+        self.speed = float(speed)
+        self.start = time.time() if start is None else start
+        self._real_start = time.monotonic()
+
+    def elapsed(self):
+        """Virtual seconds since the clock was created."""
+        return (time.monotonic() - self._real_start) * self.speed
+
+    def time(self):
+        return self.start + self.elapsed()
+
+    def monotonic(self):
+        return self.elapsed()
+
+    def _real(self, seconds):
+        return None if seconds is None else max(0.0, seconds) / self.speed
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(self._real(seconds))
+
+    def wait(self, event, timeout=None):
+        return event.wait(self._real(timeout))
+
+    def wait_for(self, cond, predicate, timeout=None):
+        return cond.wait_for(predicate, self._real(timeout))
+
+class ManualClock(Clock):
+    """
+    Virtual time that only moves when told to: advance(), sleep(), or a timed
+    wait that runs out (without blocking). Calling the clock returns `now`,
+    so it also stands in for a plain `clock=time.time` callable in tests.
+    """
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+        return self.now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.now += seconds
+
+    def wait(self, event, timeout=None):
+        if timeout is None or event.is_set():
+            return event.wait(timeout)
+        self.sleep(timeout)
+        return event.is_set()
+
+    def wait_for(self, cond, predicate, timeout=None):
+        if timeout is None or predicate():
+            return cond.wait_for(predicate, timeout)
+        self.sleep(timeout)
+        return predicate()
@@ -8,10 +8,12 @@ from utils.logger import get_logger
 from utils.binding_manager import BindingManager
 
 class CommandListener:
-    def __init__(self, serial_number, local_api_port=5000):
+    def __init__(self, serial_number, local_api_port=5000, state_source=None):
         self.logger = get_logger(self.__class__.__name__)
         self.serial = serial_number
         self.local_api_port = local_api_port
+        # Callable returning the orchestrator's current PipelineState (read-only, lock-free)
+        self.state_source = state_source
         self.db = firestore.Client()
         self.storage_client = storage.Client()
         self.running = False
@@ -48,6 +50,8 @@ class CommandListener:
                     
                     if action == 'snapshot':
                         success, result = self._handle_snapshot(command_data)
+                    elif action == 'status':
+                        success, result = self._handle_status()
                     else:
                         success, result = self._handle_control_command(action)
                     
@@ -75,6 +79,13 @@ class CommandListener:
             self.logger.error(f"Control command failed: {e}")
             return False, str(e)
     
+    def _handle_status(self):
+        """Report the current pipeline state snapshot"""
+        if not self.state_source:
+            return False, "Pipeline state not available"
+        state = self.state_source()
+        return True, state.to_dict()
+
     def _handle_snapshot(self, command_data):
         """Capture snapshot and upload to Firebase Storage"""
         try:
@@ -0,0 +1,338 @@
+"""
+Compact binary payload encoding for metered links.
+
+Reports are encoded as CBOR (RFC 8949) with the long, repeated JSON keys
+replaced by small integer tags. The counts section can additionally be
+sent as a delta against the last report the backend acknowledged.
+
+The encoding is only used after the backend advertises support through
+the ENCODING_HEADER response header; otherwise reports stay JSON.
+CompactDecoder is the reference implementation for backends.
+"""
+
+import struct
+from collections import OrderedDict
+
+ENCODING_NAME = "cbor-tags-v1"
+CONTENT_TYPE = "application/cbor"
+# Response header the backend sets to advertise the encodings it accepts
+ENCODING_HEADER = "X-AIOD-Accept-Encoding"
+
+# Stable key tags. Append only: never renumber an existing key.
+KEY_TAGS = {
+    "identity": 1, "serial": 2, "camera_id": 3, "site_id": 4, "tenant_id": 5,
+    "environment": 6, "timestamp": 7, "uptime": 8, "data": 9, "type": 10,
+    "counts": 11, "event_type": 12, "total": 13, "fps": 14, "hardware": 15,
+    "cpu_temp": 16, "hailo_temp": 17, "hailo_load": 18, "Pedestrians": 19,
+    "Cars": 20, "Buses": 21, "Trucks": 22, "Motorcycles": 23, "trajectory": 24,
+    "speed_kmh": 25, "dwell_s": 26, "edges": 27, "samples": 28, "interval_start": 29,
+    "interval_s": 30, "late": 31, "cpu_freq_mhz": 32, "throttled": 33, "stats": 34,
+    "min": 35, "max": 36, "avg": 37, "report_seq": 38,
+}
+TAG_KEYS = {v: k for k, v in KEY_TAGS.items()}
+
+# Envelope tags (negative so they never collide with KEY_TAGS)
+ENV_STREAM = -1
+ENV_SEQ = -2
+ENV_BASE = -3
+ENV_BODY = -4
+
+# Frequent string values are tagged too (CBOR tag 6 wraps the integer)
+VALUE_TAG = 6
+VALUE_STRINGS = ("object_counts", "periodic_report")
+
+
+# ---------------------------------------------------------------- CBOR core
+
+class _Removed:
+    """Delta marker for a removed counts key; encoded as CBOR `undefined`."""
+    __slots__ = ()
+
+    def __repr__(self):
+        return "REMOVED"
+
+REMOVED = _Removed()
+
+def _head(major, value):
+    if value < 24:
+        return bytes([(major << 5) | value])
+    if value < 0x100:
+        return bytes([(major << 5) | 24, value])
+    if value < 0x10000:
+        return bytes([(major << 5) | 25]) + struct.pack(">H", value)
+    if value < 0x100000000:
+        return bytes([(major << 5) | 26]) + struct.pack(">I", value)
+    return bytes([(major << 5) | 27]) + struct.pack(">Q", value)
+
+
+def cbor_dumps(obj):
+    """Encodes None/bool/int/float/str/bytes/list/dict as CBOR."""
+    out = bytearray()
+    _encode(obj, out)
+    return bytes(out)
+
+
+def _encode(obj, out):
+    if obj is None:
+        out.append(0xf6)
+    elif obj is REMOVED:
+        out.append(0xf7)
+    elif obj is True:
+        out.append(0xf5)
+    elif obj is False:
+        out.append(0xf4)
+    elif isinstance(obj, int):
+        out += _head(0, obj) if obj >= 0 else _head(1, -1 - obj)
+    elif isinstance(obj, float):
+        # Use half the bytes when float32 is lossless
+        try:
+            packed = struct.pack(">f", obj)
+        except OverflowError:
+            packed = None
+        if packed is not None and struct.unpack(">f", packed)[0] == obj:
+            out += b"\xfa" + packed
+        else:
+            out += b"\xfb" + struct.pack(">d", obj)
+    elif isinstance(obj, str):
+        raw = obj.encode("utf-8")
+        out += _head(3, len(raw)) + raw
+    elif isinstance(obj, (bytes, bytearray)):
+        out += _head(2, len(obj)) + bytes(obj)
+    elif isinstance(obj, (list, tuple)):
+        out += _head(4, len(obj))
+        for item in obj:
+            _encode(item, out)
+    elif isinstance(obj, dict):
+        out += _head(5, len(obj))
+        for k, v in obj.items():
+            _encode(k, out)
+            _encode(v, out)
+    elif isinstance(obj, _Tagged):
+        out += _head(6, obj.tag)
+        _encode(obj.value, out)
+    else:
+        raise TypeError(f"Cannot CBOR-encode {type(obj).__name__}")
+
+
+class _Tagged:
+    __slots__ = ("tag", "value")
+
+    def __init__(self, tag, value):
+        self.tag = tag
+        self.value = value
+
+
+def cbor_loads(data):
+    """Decodes a CBOR document produced by cbor_dumps."""
+    obj, offset = _decode(memoryview(data), 0)
+    if offset != len(data):
+        raise ValueError("Trailing bytes after CBOR document")
+    return obj
+
+
+def _read_length(data, offset, info):
+    if info < 24:
+        return info, offset
+    size = {24: 1, 25: 2, 26: 4, 27: 8}.get(info)
+    if size is None:
+        raise ValueError(f"Unsupported CBOR length encoding {info}")
+    return int.from_bytes(data[offset:offset + size], "big"), offset + size
+
+
+def _decode(data, offset):
+    initial = data[offset]
+    offset += 1
+    major, info = initial >> 5, initial & 0x1f
+
+    if major == 7:
+        if info == 20:
+            return False, offset
+        if info == 21:
+            return True, offset
+        if info == 22:
+            return None, offset
+        if info == 23:
+            return REMOVED, offset
+        if info == 26:
+            return struct.unpack(">f", data[offset:offset + 4])[0], offset + 4
+        if info == 27:
+            return struct.unpack(">d", data[offset:offset + 8])[0], offset + 8
+        raise ValueError(f"Unsupported CBOR simple value {info}")
+
+    value, offset = _read_length(data, offset, info)
+    if major == 0:
+        return value, offset
+    if major == 1:
+        return -1 - value, offset
+    if major == 2:
+        return bytes(data[offset:offset + value]), offset + value
+    if major == 3:
+        return str(data[offset:offset + value], "utf-8"), offset + value
+    if major == 4:
+        items = []
+        for _ in range(value):
+            item, offset = _decode(data, offset)
+            items.append(item)
+        return items, offset
+    if major == 5:
+        result = {}
+        for _ in range(value):
+            k, offset = _decode(data, offset)
+            v, offset = _decode(data, offset)
+            result[k] = v
+        return result, offset
+    if major == 6:
+        inner, offset = _decode(data, offset)
+        return _Tagged(value, inner), offset
+    raise ValueError(f"Unsupported CBOR major type {major}")
+
+
+# ---------------------------------------------------------------- key tagging
+
+def tag_keys(obj):
+    """Replaces known keys and string values with their integer tags."""
+    if isinstance(obj, dict):
+        return {KEY_TAGS.get(k, k): tag_keys(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [tag_keys(v) for v in obj]
+    if isinstance(obj, str) and obj in VALUE_STRINGS:
+        return _Tagged(VALUE_TAG, VALUE_STRINGS.index(obj))
+    return obj
+
+
+def untag_keys(obj):
+    """Inverse of tag_keys."""
+    if isinstance(obj, dict):
+        return {TAG_KEYS.get(k, k) if isinstance(k, int) else k: untag_keys(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [untag_keys(v) for v in obj]
+    if isinstance(obj, _Tagged) and obj.tag == VALUE_TAG:
+        return VALUE_STRINGS[obj.value]
+    return obj
+
+
+# ---------------------------------------------------------------- deltas
+
+def _find_counts(payload):
+    """Returns the dict holding 'counts' for any of the payload formats, or None."""
+    if isinstance(payload.get("data"), dict) and isinstance(payload["data"].get("counts"), dict):
+        return payload["data"]
+    if isinstance(payload.get("counts"), dict):
+        return payload
+    return None
+
+
+def counts_delta(base, current):
+    """Numeric fields become differences, unchanged fields are omitted, removed fields are REMOVED."""
+    delta = {}
+    for k, v in current.items():
+        old = base.get(k)
+        if isinstance(v, (int, float)) and not isinstance(v, bool) and \
+                isinstance(old, (int, float)) and not isinstance(old, bool):
+            if v != old:
+                delta[k] = v - old
+        elif k not in base or old != v:
+            delta[k] = v
+    for k in base:
+        if k not in current:
+            delta[k] = REMOVED
+    return delta
+
+
+def apply_delta(base, delta):
+    """Inverse of counts_delta."""
+    result = dict(base)
+    for k, v in delta.items():
+        if v is REMOVED:
+            result.pop(k, None)
+        elif isinstance(v, (int, float)) and not isinstance(v, bool) and \
+                isinstance(base.get(k), (int, float)) and not isinstance(base.get(k), bool):
+            result[k] = base[k] + v
+        else:
+            result[k] = v
+    return result
+
+
+# ---------------------------------------------------------------- encoder / decoder
+
+class CompactEncoder:
+    """
+    Device-side encoder. Keeps the counts of the last acknowledged report
+    so the next one can be sent as a delta.
+    """
+
+    def __init__(self, stream_id, use_delta=True):
+        self.stream_id = stream_id
+        self.use_delta = use_delta
+        self.seq = 0
+        self.acked_seq = None
+        self.acked_counts = None
+
+    def encode(self, payload):
+        """Returns (body_bytes, seq, full_counts) for one report."""
+        self.seq += 1
+        envelope = {ENV_STREAM: self.stream_id, ENV_SEQ: self.seq}
+
+        holder = _find_counts(payload)
+        counts = holder["counts"] if holder else None
+        if self.use_delta and counts is not None and self.acked_counts is not None:
+            body = dict(payload)
+            if holder is payload:
+                body["counts"] = counts_delta(self.acked_counts, counts)
+            else:
+                body["data"] = dict(holder, counts=counts_delta(self.acked_counts, counts))
+            envelope[ENV_BASE] = self.acked_seq
+        else:
+            body = payload
+
+        envelope[ENV_BODY] = tag_keys(body)
+        return cbor_dumps(envelope), self.seq, counts
+
+    def ack(self, seq, counts):
+        """Records a delivered report as the new delta base."""
+        if counts is not None:
+            self.acked_seq = seq
+            self.acked_counts = counts
+
+    def reset(self):
+        """Forgets the delta base, e.g. after the backend lost state or fell back to JSON."""
+        self.acked_seq = None
+        self.acked_counts = None
+
+
+class CompactDecoder:
+    """
+    Reference backend decoder. Rebuilds full JSON-equivalent payloads.
+
+    Keeps the last `history` bases per stream in arrival order. A full
+    (non-delta) report starts the stream over, since the device only sends
+    one when it has no acknowledged base, e.g. after a restart that reset
+    its sequence numbers.
+    """
+
+    def __init__(self, history=16):
+        self.history = history
+        self.streams = {}  # {stream_id: OrderedDict(seq -> counts)}
+
+    def decode(self, body):
+        envelope = cbor_loads(body)
+        stream_id = envelope[ENV_STREAM]
+        seq = envelope[ENV_SEQ]
+        payload = untag_keys(envelope[ENV_BODY])
+        holder = _find_counts(payload)
+        if ENV_BASE not in envelope and holder is not None:
+            self.streams[stream_id] = OrderedDict()
+        known = self.streams.setdefault(stream_id, OrderedDict())
+
+        if ENV_BASE in envelope:
+            base = known.get(envelope[ENV_BASE])
+            if base is None:
+                raise KeyError(f"Unknown delta base {envelope[ENV_BASE]} for stream {stream_id}")
+            holder["counts"] = apply_delta(base, holder["counts"])
+
+        if holder is not None:
+            known.pop(seq, None)
+            known[seq] = holder["counts"]
+            while len(known) > self.history:
+                known.popitem(last=False)
+        return payload
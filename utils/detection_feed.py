@@ -0,0 +1,74 @@
+import json
+import threading
+import time
+from utils.logger import get_logger
+
+class DetectionFeed:
+    """
+    Per-inference detection metadata for the client-side overlay.
+
+    The inference loop publishes each detection set; it is serialised to JSON
+    once (only while someone is listening) and subscribers are woken through a
+    condition variable. Like FrameBroadcaster, a slow subscriber only ever
+    receives the newest event.
+    """
+
+    def __init__(self, overlay="client"):
+        self.logger = get_logger(self.__class__.__name__)
+        self.overlay = overlay
+        self.cond = threading.Condition()
+        self.event = None
+        self.seq = 0
+        self.subscribers = 0
+
+    def wants_events(self):
+        return self.subscribers > 0
+
+    def publish(self, detections, frame_shape, fps=0.0, counts=None):
+        """Serialises one detection set. No-op without subscribers."""
+        if not self.subscribers:
+            return
+        height, width = frame_shape[:2]
+        items = []
+        for det in detections:
+            item = {
+                "class": det.get("class"),
+                "confidence": round(float(det.get("confidence", 0.0)), 3),
+                "bbox": [int(v) for v in det.get("bbox", [])]
+            }
+            if det.get("object_id") is not None:
+                item["object_id"] = det["object_id"]
+            items.append(item)
+
+        with self.cond:
+            self.seq += 1
+            self.event = json.dumps({
+                "seq": self.seq,
+                "ts": round(time.time(), 3),
+                "overlay": self.overlay,
+                "frame": [width, height],
+                "fps": round(fps, 1),
+                "counts": dict(counts or {}),
+                "detections": items
+            }, separators=(",", ":"))
+            self.cond.notify_all()
+
+    def events(self, timeout=15.0):
+        """
+        Generator yielding JSON event strings for one subscriber, or None after
+        `timeout` seconds without a new event (callers send a keep-alive).
+        """
+        with self.cond:
+            self.subscribers += 1
+            last_seq = self.seq
+        try:
+            while True:
+                with self.cond:
+                    if not self.cond.wait_for(lambda: self.seq != last_seq, timeout):
+                        event = None
+                    else:
+                        event, last_seq = self.event, self.seq
+                yield event
+        finally:
+            with self.cond:
+                self.subscribers -= 1
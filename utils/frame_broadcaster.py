@@ -0,0 +1,222 @@
+import threading
+import time
+import cv2
+from utils.logger import get_logger
+
+# Highest quality first. Heights above the source resolution are not upscaled.
+DEFAULT_LADDER = [
+    {"name": "1080p", "height": 1080, "quality": 70},
+    {"name": "540p", "height": 540, "quality": 60},
+    {"name": "270p", "height": 270, "quality": 50}
+]
+
+class Rendition:
+    """One rung of the preview ladder and its most recently encoded JPEG."""
+
+    def __init__(self, name, height, quality):
+        self.name = name
+        self.height = height
+        self.encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), quality]
+        self.jpeg = None
+        self.seq = 0
+        self.published_at = 0.0
+        self.subscribers = 0
+        self.encoded = 0
+
+class StreamClient:
+    """
+    Per-connection rendition choice for adaptive streams.
+
+    The time a generator spends suspended on `yield` is the time the server
+    took to write the chunk to the socket. Comparing it with the interval
+    between frames gives the link utilisation: a client whose writes take
+    most of the frame interval steps down a rung, one that stays well below
+    it (even after scaling for the larger rung) steps back up.
+    """
+
+    def __init__(self, index, auto=True, max_fps=None, down_at=0.8, up_at=0.5, hold=5.0, alpha=0.3):
+        self.index = index
+        self.auto = auto
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.down_at = down_at
+        self.up_at = up_at
+        self.hold = hold
+        self.alpha = alpha
+        self.write_time = None
+        self.period = None
+        self.last_sent = None
+        self.last_switch = time.monotonic()
+        self.switches = 0
+
+    def record_write(self, seconds, now):
+        if self.last_sent is not None:
+            period = now - self.last_sent
+            self.period = period if self.period is None else self.alpha * period + (1 - self.alpha) * self.period
+        self.write_time = seconds if self.write_time is None else \
+            self.alpha * seconds + (1 - self.alpha) * self.write_time
+        self.last_sent = now
+
+    def utilisation(self):
+        if not self.period or self.write_time is None:
+            return 0.0
+        return self.write_time / self.period
+
+    def choose(self, heights, now):
+        """Returns the rendition index to use next given the ladder's effective heights."""
+        if not self.auto or self.period is None:
+            return self.index
+        util = self.utilisation()
+        if util > self.down_at and self.index < len(heights) - 1 and now - self.last_switch >= 1.0:
+            return self._switch(self.index + 1, now)
+        if self.index > 0 and now - self.last_switch >= self.hold:
+            # JPEG size scales roughly with pixel count
+            ratio = (heights[self.index - 1] / max(heights[self.index], 1)) ** 2
+            if util * ratio < self.up_at:
+                return self._switch(self.index - 1, now)
+        return self.index
+
+    def _switch(self, index, now):
+        self.index = index
+        self.last_switch = now
+        self.switches += 1
+        # Measurements of the old rung no longer apply
+        self.write_time = None
+        self.period = None
+        self.last_sent = None
+        return index
+
+class FrameBroadcaster:
+    """
+    Encode-once fan-out of annotated frames to MJPEG clients.
+
+    The display loop publishes each new annotated frame; it is scaled and
+    JPEG-encoded exactly once per rendition that currently has subscribers,
+    and subscribers are woken through a condition variable. Every subscriber
+    only ever sees the newest frame, so a slow client skips frames instead of
+    building up a backlog. With no subscribers the display loop is told not
+    to encode at all (see `wants_frames`).
+    """
+
+    def __init__(self, ladder=None, default_rendition="auto", stale_after=1.0):
+        self.logger = get_logger(self.__class__.__name__)
+        self.renditions = [Rendition(r["name"], r.get("height"), r.get("quality", 70))
+                           for r in (ladder or DEFAULT_LADDER)]
+        self.by_name = {r.name: i for i, r in enumerate(self.renditions)}
+        self.default_rendition = default_rendition
+        self.stale_after = stale_after
+        self.cond = threading.Condition()
+        self.source_height = None
+        self.switches = 0
+
+    def wants_frames(self):
+        """True while at least one stream client is waiting for frames."""
+        return any(r.subscribers for r in self.renditions)
+
+    def resolve(self, name):
+        """Maps a rendition name (or 'auto') to (index, auto). Raises ValueError for unknown names."""
+        name = name or self.default_rendition
+        if name == "auto":
+            # Start in the middle of the ladder and adapt from there
+            return len(self.renditions) // 2, True
+        if name not in self.by_name:
+            raise ValueError(f"Unknown rendition '{name}'. Available: auto, {', '.join(self.by_name)}")
+        return self.by_name[name], False
+
+    def _heights(self):
+        source = self.source_height or 0
+        return [min(r.height, source) if r.height and source else (r.height or source)
+                for r in self.renditions]
+
+    def _encode(self, rendition, image):
+        height = image.shape[0]
+        if rendition.height and rendition.height < height:
+            width = int(round(image.shape[1] * rendition.height / height))
+            image = cv2.resize(image, (width, rendition.height), interpolation=cv2.INTER_AREA)
+        ret, buffer = cv2.imencode('.jpg', image, rendition.encode_params)
+        if not ret:
+            self.logger.error(f"Failed to encode {rendition.name} frame for broadcast")
+            return None
+        return buffer.tobytes()
+
+    def publish(self, image):
+        """Encodes `image` once for every watched rendition and wakes their subscribers."""
+        self.source_height = image.shape[0]
+        with self.cond:
+            targets = [r for r in self.renditions if r.subscribers > 0]
+        encoded = [(r, self._encode(r, image)) for r in targets]
+
+        now = time.time()
+        with self.cond:
+            for rendition, jpeg in encoded:
+                if jpeg is None:
+                    continue
+                rendition.jpeg = jpeg
+                rendition.seq += 1
+                rendition.published_at = now
+                rendition.encoded += 1
+            self.cond.notify_all()
+        return encoded[0][1] if encoded else None
+
+    def latest(self, name=None):
+        """Returns the most recently published JPEG (may be stale), or None."""
+        if name:
+            return self.renditions[self.by_name[name]].jpeg
+        for rendition in self.renditions:
+            if rendition.jpeg is not None:
+                return rendition.jpeg
+        return None
+
+    def _fresh(self, rendition):
+        return rendition.jpeg is not None and time.time() - rendition.published_at < self.stale_after
+
+    def frames(self, rendition=None, max_fps=None, timeout=5.0):
+        """
+        Generator yielding each newly published JPEG for one subscriber.
+        Frames published while the client is still sending are skipped. With
+        rendition 'auto' the client moves along the ladder as its link allows.
+        """
+        index, auto = self.resolve(rendition)
+        client = StreamClient(index, auto=auto, max_fps=max_fps)
+        with self.cond:
+            current = self.renditions[index]
+            current.subscribers += 1
+            last_seq = current.seq - 1 if self._fresh(current) else current.seq
+        try:
+            while True:
+                if client.min_interval and client.last_sent is not None:
+                    wait = client.min_interval - (time.monotonic() - client.last_sent)
+                    if wait > 0:
+                        time.sleep(wait)
+                with self.cond:
+                    current = self.renditions[client.index]
+                    if not self.cond.wait_for(lambda: current.seq != last_seq, timeout):
+                        continue
+                    jpeg, last_seq = current.jpeg, current.seq
+
+                started = time.monotonic()
+                yield jpeg
+                now = time.monotonic()
+                client.record_write(now - started, now)
+
+                old_index = client.index
+                new_index = client.choose(self._heights(), now)
+                if new_index != old_index:
+                    with self.cond:
+                        self.renditions[old_index].subscribers -= 1
+                        target = self.renditions[new_index]
+                        target.subscribers += 1
+                        # Wait for the first frame encoded at the new rung
+                        last_seq = target.seq
+                        self.switches += 1
+        finally:
+            with self.cond:
+                self.renditions[client.index].subscribers -= 1
+
+    def stats(self):
+        return {
+            "subscribers": sum(r.subscribers for r in self.renditions),
+            "frames_encoded": sum(r.encoded for r in self.renditions),
+            "rendition_switches": self.switches,
+            "renditions": {r.name: {"subscribers": r.subscribers, "frames_encoded": r.encoded}
+                           for r in self.renditions}
+        }
@@ -1,15 +1,33 @@
+import os
 import subprocess
 import re
 from utils.logger import get_logger
 
+# Raspberry Pi firmware throttle bits (current state; bit + 16 = occurred since boot)
+THROTTLE_FLAGS = {0: "under_voltage", 1: "freq_capped", 2: "throttling", 3: "soft_temp_limit"}
+
 class HardwareMonitor:
     """Monitors RPi and Hailo hardware metrics."""
-    
-    def __init__(self):
+
+    def __init__(self, sysfs_root="/sys"):
         self.logger = get_logger(self.__class__.__name__)
-    
+        self.thermal_path = os.path.join(sysfs_root, "class/thermal/thermal_zone0/temp")
+        self.freq_path = os.path.join(sysfs_root, "devices/system/cpu/cpu0/cpufreq/scaling_cur_freq")
+        self.throttled_path = os.path.join(sysfs_root, "devices/platform/soc/soc:firmware/get_throttled")
+        self.hailo_available = True
+
+    def _read_sysfs(self, path):
+        try:
+            with open(path, 'r') as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
     def get_cpu_temp(self):
-        """Returns CPU temperature in Celsius."""
+        """Returns CPU temperature in Celsius (sysfs, falling back to vcgencmd)."""
+        raw = self._read_sysfs(self.thermal_path)
+        if raw and raw.lstrip('-').isdigit():
+            return int(raw) / 1000.0
         try:
             result = subprocess.run(
                 ['vcgencmd', 'measure_temp'],
@@ -24,9 +42,35 @@ class HardwareMonitor:
         except Exception as e:
             self.logger.error(f"Failed to read CPU temp: {e}")
         return None
-    
-    def get_hailo_temp(self):
-        """Returns Hailo chip temperature in Celsius."""
+
+    def get_cpu_freq_mhz(self):
+        """Returns the current CPU0 frequency in MHz from sysfs."""
+        raw = self._read_sysfs(self.freq_path)
+        if raw and raw.isdigit():
+            return int(raw) / 1000.0
+        return None
+
+    def get_throttled(self):
+        """Returns the firmware throttle bitmask (see THROTTLE_FLAGS), or None if unavailable."""
+        raw = self._read_sysfs(self.throttled_path)
+        if not raw:
+            return None
+        try:
+            return int(raw, 16)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def throttle_flags(mask):
+        """Names of the throttle conditions active now in `mask`."""
+        if not mask:
+            return []
+        return [name for bit, name in THROTTLE_FLAGS.items() if mask & (1 << bit)]
+
+    def get_hailo_identify(self):
+        """Returns (temperature, utilization) from a single `hailortcli fw-control identify` call."""
+        if not self.hailo_available:
+            return None, None
         try:
             result = subprocess.run(
                 ['hailortcli', 'fw-control', 'identify'],
@@ -34,37 +78,37 @@ class HardwareMonitor:
                 text=True,
                 timeout=2
             )
-            if result.returncode == 0:
-                # Parse temperature from output
-                match = re.search(r'Temperature:\s*(\d+\.?\d*)', result.stdout)
-                if match:
-                    return float(match.group(1))
+        except FileNotFoundError:
+            # Not installed: don't spawn a failing process on every sample
+            self.hailo_available = False
+            self.logger.warning("hailortcli not found; Hailo telemetry disabled.")
+            return None, None
         except Exception as e:
-            self.logger.error(f"Failed to read Hailo temp: {e}")
-        return None
-    
+            self.logger.error(f"Failed to read Hailo telemetry: {e}")
+            return None, None
+        if result.returncode != 0:
+            return None, None
+        temp = re.search(r'Temperature:\s*(\d+\.?\d*)', result.stdout)
+        load = re.search(r'Utilization:\s*(\d+\.?\d*)%', result.stdout)
+        return (float(temp.group(1)) if temp else None,
+                float(load.group(1)) if load else None)
+
+    def get_hailo_temp(self):
+        """Returns Hailo chip temperature in Celsius."""
+        return self.get_hailo_identify()[0]
+
     def get_hailo_load(self):
         """Returns Hailo utilization percentage."""
-        try:
-            result = subprocess.run(
-                ['hailortcli', 'fw-control', 'identify'],
-                capture_output=True,
-                text=True,
-                timeout=2
-            )
-            if result.returncode == 0:
-                # Parse utilization if available
-                match = re.search(r'Utilization:\s*(\d+\.?\d*)%', result.stdout)
-                if match:
-                    return float(match.group(1))
-        except Exception as e:
-            self.logger.error(f"Failed to read Hailo load: {e}")
-        return None
-    
+        return self.get_hailo_identify()[1]
+
     def get_all_metrics(self):
-        """Returns all hardware metrics as a dict."""
+        """Returns all hardware metrics as a dict (blocking: runs hailortcli)."""
+        hailo_temp, hailo_load = self.get_hailo_identify()
+        throttled = self.get_throttled()
         return {
             "cpu_temp": self.get_cpu_temp(),
-            "hailo_temp": self.get_hailo_temp(),
-            "hailo_load": self.get_hailo_load()
+            "cpu_freq_mhz": self.get_cpu_freq_mhz(),
+            "throttled": self.throttle_flags(throttled) if throttled is not None else None,
+            "hailo_temp": hailo_temp,
+            "hailo_load": hailo_load
         }
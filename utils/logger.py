@@ -1,17 +1,220 @@
+"""
+Process-wide logging.
+
+Pipeline threads never do log I/O themselves: every logger from get_logger()
+has one shared QueueHandler that filters the record, renders its message and
+enqueues it. Pass arguments lazily (`logger.debug("Count result: %s", result)`):
+records dropped by level, sampling or rate limiting are never rendered, and
+the ones that pass are rendered before the caller can mutate the arguments.
+A QueueListener thread formats the records and writes them to stdout and a
+size-rotated, gzip-compressed log file.
+
+A per-call-site RateLimitFilter keeps a hot loop that logs on every frame
+(or fails on every frame) from flooding the queue, and can sample
+low-severity records. Settings come from config/logging_config.json.
+"""
+
+import atexit
+import gzip
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import shutil
 import sys
+import threading
+import time
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DEFAULT_CONFIG = {
+    "level": "INFO",
+    "levels": {},
+    "console": True,
+    "queue_size": 10000,
+    "file": {
+        "path": "logs/traffic_ai.log",
+        "max_bytes": 5 * 1024 * 1024,
+        "backup_count": 5,
+        "compress": True
+    },
+    "rate_limit": {
+        "period": 10.0,
+        "burst": 10
+    },
+    "sampling": {
+        "level": "DEBUG",
+        "every": 1
+    }
+}
+CONFIG_PATH = "config/logging_config.json"
+
+_lock = threading.RLock()
+_queue_handler = None
+_listener = None
+_config = None
+
+class RateLimitFilter(logging.Filter):
+    """
+    Per call site (file:line) rate limiting and sampling.
+
+    At most `burst` records per `period` seconds pass from one call site;
+    the rest are dropped and counted, and the next record that passes
+    reports how many were suppressed. Records at or below `sample_level`
+    are additionally sampled 1-in-`sample_every`. CRITICAL always passes.
+    """
+
+    def __init__(self, period=10.0, burst=10, sample_level=logging.DEBUG, sample_every=1, clock=time.monotonic):
+        super().__init__()
+        self.period = period
+        self.burst = burst
+        self.sample_level = sample_level
+        self.sample_every = max(1, int(sample_every))
+        self.clock = clock
+        self.sites = {}  # {(pathname, lineno): [window_start, passed, suppressed, seen]}
+        self.suppressed_total = 0
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.CRITICAL:
+            return True
+        key = (record.pathname, record.lineno)
+        now = self.clock()
+        with self.lock:
+            site = self.sites.get(key)
+            if site is None:
+                site = self.sites[key] = [now, 0, 0, 0]
+            site[3] += 1
+            if record.levelno <= self.sample_level and (site[3] - 1) % self.sample_every:
+                return False
+            if now - site[0] >= self.period:
+                site[0], site[1] = now, 0
+            if self.burst and site[1] >= self.burst:
+                site[2] += 1
+                self.suppressed_total += 1
+                return False
+            site[1] += 1
+            suppressed, site[2] = site[2], 0
+        if suppressed:
+            record.msg = f"{record.msg} [{suppressed} similar message(s) suppressed]"
+        return True
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks the calling thread; drops records when the queue is full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Render msg % args now, like the stdlib: callers often mutate the arguments
+        # right after logging, and the listener would otherwise format them later.
+        # Timestamp/level formatting and I/O still happen on the listener thread.
+        record = super().prepare(record)
+        record.stack_info = None  # Already rendered into msg
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def _gzip_rotator(source, dest):
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+def _load_config(path):
+    config = json.loads(json.dumps(DEFAULT_CONFIG))
+    try:
+        with open(path, 'r') as f:
+            user = json.load(f)
+    except (OSError, ValueError):
+        return config
+    for key, value in user.items():
+        if isinstance(value, dict) and isinstance(config.get(key), dict):
+            config[key].update(value)
+        else:
+            config[key] = value
+    return config
+
+def _build_handlers(config):
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = []
+    if config.get("console", True):
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(formatter)
+        handlers.append(console)
+    file_cfg = config.get("file") or {}
+    if file_cfg.get("path"):
+        try:
+            os.makedirs(os.path.dirname(file_cfg["path"]) or ".", exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                file_cfg["path"],
+                maxBytes=file_cfg.get("max_bytes", 5 * 1024 * 1024),
+                backupCount=file_cfg.get("backup_count", 5)
+            )
+            if file_cfg.get("compress", True):
+                file_handler.namer = lambda name: name + ".gz"
+                file_handler.rotator = _gzip_rotator
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+        except OSError as e:
+            sys.stderr.write(f"File logging disabled: {e}\n")
+    return handlers
+
+def configure_logging(config_path=CONFIG_PATH, config=None):
+    """(Re)configures the shared queue handler and starts the listener thread."""
+    global _queue_handler, _listener, _config
+    with _lock:
+        if _listener:
+            _listener.stop()
+        _config = config if config is not None else _load_config(config_path)
+        log_queue = queue.Queue(maxsize=_config.get("queue_size", 10000))
+        handler = NonBlockingQueueHandler(log_queue)
+        rate_cfg = _config.get("rate_limit") or {}
+        sample_cfg = _config.get("sampling") or {}
+        handler.addFilter(RateLimitFilter(
+            period=rate_cfg.get("period", 10.0),
+            burst=rate_cfg.get("burst", 10),
+            sample_level=logging.getLevelName(sample_cfg.get("level", "DEBUG")),
+            sample_every=sample_cfg.get("every", 1)
+        ))
+        _listener = logging.handlers.QueueListener(log_queue, *_build_handlers(_config),
+                                                   respect_handler_level=True)
+        _listener.start()
+
+        # Swap the handler on loggers created before (re)configuration
+        old_handler, _queue_handler = _queue_handler, handler
+        if old_handler:
+            for logger in list(logging.Logger.manager.loggerDict.values()):
+                if isinstance(logger, logging.Logger) and old_handler in logger.handlers:
+                    logger.removeHandler(old_handler)
+                    logger.addHandler(handler)
+        return handler
+
+def shutdown_logging():
+    """Flushes queued records and stops the listener thread."""
+    global _listener
+    with _lock:
+        if _listener:
+            _listener.stop()
+            _listener = None
+
+atexit.register(shutdown_logging)
 
 def get_logger(name: str):
     """
-    Creates and returns a logger instance with standard formatting.
+    Returns a logger that writes through the shared non-blocking queue.
+    Safe to call repeatedly: the handler is attached only once.
     """
-    logger = logging.getLogger(name)
-    if not logger.handlers:
-        logger.setLevel(logging.INFO)
-        handler = logging.StreamHandler(sys.stdout)
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+    with _lock:
+        if _queue_handler is None:
+            configure_logging()
+        logger = logging.getLogger(name)
+        if _queue_handler not in logger.handlers:
+            level = _config.get("levels", {}).get(name, _config.get("level", "INFO"))
+            logger.setLevel(level)
+            logger.addHandler(_queue_handler)
     return logger
@@ -0,0 +1,142 @@
+"""
+Payload codecs for TransportAgent.
+
+One codec per backend payload format. A codec is built once per binding
+version: the static identity section and the auth header set are computed
+up front, so building a report only wraps the per-interval counts.
+"""
+
+import json
+import time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(data):
+    """Serialises to compact UTF-8 JSON bytes, using orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def build_auth_headers(config):
+    """Returns the auth + custom header set for a binding config."""
+    headers = {}
+    token = config.get("auth_token", "")
+    auth_mode = config.get("auth_mode", "bearer").lower()
+
+    if auth_mode == "apikey":
+        headers["X-API-Key"] = token
+    elif auth_mode == "bearer":
+        headers["Authorization"] = f"Bearer {token}"
+    elif auth_mode == "custom":
+        # Expecting custom_auth_header key
+        headers[config.get("custom_auth_header", "Authorization")] = token
+
+    # Multi-Backend Custom Headers
+    custom = config.get("custom_headers", {})
+    if isinstance(custom, dict):
+        headers.update(custom)
+    return headers
+
+
+class PayloadCodec:
+    """Base codec: precomputes everything that only changes when the binding changes."""
+    name = None
+
+    def __init__(self, binding):
+        config = binding.config
+        self.serial = binding.serial_number
+        self.camera_id = config.get("camera_id")
+        self.site_id = config.get("site_id")
+        self.tenant_id = config.get("tenant_id")
+        self.endpoint = config.get("endpoint")
+        self.headers = build_auth_headers(config)
+
+    def build(self, counts_data, uptime):
+        raise NotImplementedError
+
+    def batch_envelope(self, payloads):
+        """Wraps unchanged single-report payloads in an array envelope."""
+        return {"batch_version": 1, "format": self.name, "reports": payloads}
+
+
+class LegacyCodec(PayloadCodec):
+    """FLAT SCHEMA: Matches the existing Firebase/React Dashboard exactly."""
+    name = "legacy"
+
+    def build(self, counts_data, uptime):
+        return {
+            "camera_id": self.camera_id,
+            "site_id": self.site_id,
+            "timestamp": counts_data.get("timestamp"),
+            "counts": counts_data
+        }
+
+
+class Aiod05Codec(PayloadCodec):
+    """AIODCOUNTER05 SCHEMA: Matches Multitenant Site/Camera structure."""
+    name = "aiod05"
+
+    def build(self, counts_data, uptime):
+        return {
+            "tenant_id": self.tenant_id,
+            "site_id": self.site_id,
+            "camera_id": self.camera_id,
+            "serial": self.serial,
+            "timestamp": counts_data.get("timestamp"),
+            "data": {
+                "counts": counts_data,
+                "event_type": "periodic_report"
+            }
+        }
+
+    def batch_envelope(self, payloads):
+        # No top-level site_id/camera_id, so older backends reject instead of misparsing
+        return {"batch_version": 1, "format": self.name, "tenant_id": self.tenant_id,
+                "serial": self.serial, "reports": payloads}
+
+
+class UniversalCodec(PayloadCodec):
+    """UNIVERSAL/NESTED SCHEMA: Professional scalable production format."""
+    name = "universal"
+
+    def __init__(self, binding):
+        super().__init__(binding)
+        self.identity = {
+            "serial": self.serial,
+            "camera_id": self.camera_id,
+            "site_id": self.site_id
+        }
+
+    def build(self, counts_data, uptime):
+        return {
+            "identity": self.identity,
+            "environment": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "uptime": uptime
+            },
+            "data": {
+                "type": "object_counts",
+                "counts": counts_data
+            }
+        }
+
+    def batch_envelope(self, payloads):
+        return {"batch_version": 1, "format": self.name, "identity": self.identity, "reports": payloads}
+
+
+CODECS = {
+    "universal": UniversalCodec,
+    "legacy": LegacyCodec,
+    "aiod05": Aiod05Codec,
+}
+
+
+def create_codec(binding):
+    """Builds the codec for the binding's payload_format (DEFAULT TO UNIVERSAL for production)."""
+    format_type = binding.config.get("payload_format", "universal").lower()
+    return CODECS.get(format_type, UniversalCodec)(binding)
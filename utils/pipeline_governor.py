@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import deque
+from utils.logger import get_logger
+
+# Cheapest-to-lose first
+DEFAULT_ORDER = ("preview", "annotation", "inference_rate", "resolution")
+
+class PipelineGovernor:
+    """
+    Thermal- and power-aware degradation ladder for the pipeline.
+
+    Each telemetry sample is evaluated against step-down and step-up
+    thresholds (hysteresis band between them). Crossing the hot threshold,
+    or any firmware throttle/under-voltage flag, adds the next step in
+    `order`; staying below the cool threshold for `step_up_hold_s` removes
+    the last one again. The governor only decides: the orchestrator applies
+    `active_steps()`. Every decision is kept as an event for the status API.
+    """
+
+    def __init__(self, config=None, clock=time.time):
+        config = config or {}
+        self.logger = get_logger(self.__class__.__name__)
+        self.enabled = config.get("enabled", True)
+        self.order = tuple(config.get("order", DEFAULT_ORDER))
+        unknown = set(self.order) - set(DEFAULT_ORDER)
+        if unknown:
+            raise ValueError(f"Unknown governor step(s): {', '.join(sorted(unknown))}")
+        self.step_down_temp = config.get("step_down_temp", 78.0)
+        self.step_up_temp = config.get("step_up_temp", 70.0)
+        self.hailo_step_down_temp = config.get("hailo_step_down_temp", 90.0)
+        self.hailo_step_up_temp = config.get("hailo_step_up_temp", 80.0)
+        self.step_down_on_throttle = config.get("step_down_on_throttle", True)
+        self.step_down_hold_s = config.get("step_down_hold_s", 10.0)
+        self.step_up_hold_s = config.get("step_up_hold_s", 60.0)
+        self.inference_rate_factor = config.get("inference_rate_factor", 0.5)
+        if not 0 < self.inference_rate_factor <= 1:
+            raise ValueError(f"inference_rate_factor must be in (0, 1], got {self.inference_rate_factor}")
+        self.reduced_resolution = tuple(config.get("reduced_resolution", [960, 540]))
+        if len(self.reduced_resolution) != 2 or min(self.reduced_resolution) <= 0:
+            raise ValueError(f"reduced_resolution must be [width, height], got {list(self.reduced_resolution)}")
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.level = 0
+        self.last_change = None
+        self.cool_since = None
+        self.events = deque(maxlen=config.get("event_history", 50))
+
+    def active_steps(self):
+        return self.order[:self.level]
+
+    def _hot_reason(self, sample, flags):
+        cpu, hailo = sample.get("cpu_temp"), sample.get("hailo_temp")
+        if cpu is not None and cpu >= self.step_down_temp:
+            return f"cpu {cpu:.1f}C >= {self.step_down_temp}C"
+        if hailo is not None and hailo >= self.hailo_step_down_temp:
+            return f"hailo {hailo:.1f}C >= {self.hailo_step_down_temp}C"
+        if self.step_down_on_throttle and flags:
+            return f"firmware flags: {', '.join(flags)}"
+        return None
+
+    def _is_cool(self, sample, flags):
+        cpu, hailo = sample.get("cpu_temp"), sample.get("hailo_temp")
+        return ((cpu is None or cpu <= self.step_up_temp) and
+                (hailo is None or hailo <= self.hailo_step_up_temp) and
+                not flags)
+
+    def evaluate(self, sample, flags=()):
+        """
+        Evaluates one telemetry sample (`flags`: active throttle condition names).
+        Returns the decision event if the level changed, else None.
+        """
+        if not self.enabled or not sample:
+            return None
+        now = self.clock()
+        with self.lock:
+            since_change = now - self.last_change if self.last_change is not None else float("inf")
+            reason = self._hot_reason(sample, flags)
+            if reason:
+                self.cool_since = None
+                if self.level < len(self.order) and since_change >= self.step_down_hold_s:
+                    return self._change(+1, reason, sample, now)
+                return None
+
+            if not self._is_cool(sample, flags):
+                # Inside the hysteresis band: hold the current level
+                self.cool_since = None
+                return None
+            if self.cool_since is None:
+                self.cool_since = now
+            if (self.level > 0 and now - self.cool_since >= self.step_up_hold_s
+                    and since_change >= self.step_up_hold_s):
+                return self._change(-1, f"cool for {now - self.cool_since:.0f}s", sample, now)
+            return None
+
+    def _change(self, direction, reason, sample, now):
+        step = self.order[self.level] if direction > 0 else self.order[self.level - 1]
+        self.level += direction
+        self.last_change = now
+        if direction < 0:
+            self.cool_since = now
+        event = {
+            "ts": now,
+            "action": "step_down" if direction > 0 else "step_up",
+            "step": step,
+            "level": self.level,
+            "reason": reason,
+            "cpu_temp": sample.get("cpu_temp"),
+            "hailo_temp": sample.get("hailo_temp")
+        }
+        self.events.append(event)
+        if direction > 0:
+            self.logger.warning(f"Governor step down: {step} reduced (level {self.level}) - {reason}")
+        else:
+            self.logger.info(f"Governor step up: {step} restored (level {self.level}) - {reason}")
+        return event
+
+    def status(self, events=10):
+        with self.lock:
+            return {
+                "enabled": self.enabled,
+                "level": self.level,
+                "active_steps": list(self.active_steps()),
+                "events": list(self.events)[-events:]
+            }
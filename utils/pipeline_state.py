@@ -0,0 +1,66 @@
+import time
+from types import MappingProxyType
+
+class PipelineState:
+    """
+    Immutable, versioned snapshot of the detection pipeline.
+
+    The orchestrator threads build a new snapshot with `evolve()` and publish
+    it by swapping a single reference. Readers (API, CommandListener, ...)
+    just read that reference: they never take a pipeline lock, never copy
+    more than a pointer, and a snapshot never changes under them.
+    """
+    __slots__ = ("version", "created_at", "active", "started_at", "counts", "fps",
+                 "last_update", "detections", "last_report", "health", "lifecycle", "_dict")
+
+    FIELDS = ("active", "started_at", "counts", "fps", "last_update", "detections", "last_report", "health",
+              "lifecycle")
+
+    def __init__(self, version=0, created_at=None, active=False, started_at=None, counts=None, fps=0.0,
+                 last_update=None, detections=None, last_report="N/A", health=None, lifecycle=None):
+        values = {
+            "version": version,
+            "created_at": created_at if created_at is not None else time.time(),
+            "active": active,
+            "started_at": started_at,
+            "counts": MappingProxyType(dict(counts or {})),
+            "fps": fps,
+            "last_update": last_update,
+            "detections": MappingProxyType(dict(detections or {})),
+            "last_report": last_report,
+            "health": MappingProxyType(dict(health or {})),
+            "lifecycle": MappingProxyType(dict(lifecycle or {"state": "stopped"})),
+            "_dict": None
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PipelineState is immutable; publish a new one with evolve()")
+
+    def evolve(self, **changes):
+        """Returns a new snapshot with `changes` applied and the version bumped."""
+        unknown = set(changes) - set(self.FIELDS)
+        if unknown:
+            raise TypeError(f"Unknown PipelineState field(s): {', '.join(sorted(unknown))}")
+        values = {name: getattr(self, name) for name in self.FIELDS}
+        values.update(changes)
+        return PipelineState(version=self.version + 1, **values)
+
+    def to_dict(self):
+        """Plain-dict view for JSON serialisation, built once per snapshot."""
+        if self._dict is None:
+            object.__setattr__(self, "_dict", {
+                "version": self.version,
+                "created_at": self.created_at,
+                "active": self.active,
+                "started_at": self.started_at,
+                "counts": dict(self.counts),
+                "fps": self.fps,
+                "last_update": self.last_update,
+                "detections": dict(self.detections),
+                "last_report": self.last_report,
+                "health": dict(self.health),
+                "lifecycle": dict(self.lifecycle)
+            })
+        return self._dict
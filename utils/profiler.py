@@ -0,0 +1,301 @@
+import cProfile
+import io
+import itertools
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from utils.logger import get_logger
+
+MODES = ("sampling", "cprofile")
+
+class PipelineProfiler:
+    """
+    On-demand CPU and memory profiling of the running pipeline.
+
+    Nothing is installed until a session starts, so the idle cost is a single
+    attribute read per loop iteration (`checkpoint()`).
+
+    - "sampling": a background thread snapshots every thread's stack each
+      `interval` seconds (sys._current_frames) and aggregates collapsed stacks,
+      loadable in speedscope or flamegraph.pl.
+    - "cprofile": each pipeline thread attaches its own cProfile.Profile at its
+      next checkpoint and hands it back when the session ends; the result is
+      the merged pstats. `stop()` waits (up to `detach_timeout`) until every
+      thread has detached, so `export()` never reads a live profiler.
+      Python 3.12+ runs cProfile on sys.monitoring, which allows one active
+      profiler per process: only the first thread to attach is profiled there,
+      so prefer "sampling" on those versions.
+    - tracemalloc snapshots/diffs, with tracing switched off again on demand.
+    - per-thread CPU time from the pthread CPU clocks.
+    """
+
+    def __init__(self, max_duration=120.0, max_snapshots=8, detach_timeout=2.0):
+        self.logger = get_logger(self.__class__.__name__)
+        self.max_duration = max_duration
+        self.max_snapshots = max_snapshots
+        self.detach_timeout = detach_timeout
+        self.lock = threading.Lock()
+        # Threads with an enabled cProfile; release() removes them and notifies
+        self._attached = set()
+        self._detached = threading.Condition(self.lock)
+        self.session = None
+        self._ids = itertools.count(1)
+        self._local = threading.local()
+        self._timer = None
+        self._sampler = None
+        self._profiles = []
+        self._stacks = Counter()
+        self.snapshots = {}
+        self._snapshot_ids = itertools.count(1)
+        self._cpu_last = {}
+
+    # -- CPU profiling -----------------------------------------------------
+
+    def start(self, mode="sampling", duration=10.0, interval=0.005):
+        """Starts a bounded profiling session. Raises ValueError for bad arguments, RuntimeError if one is running."""
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode '{mode}'. Available: {', '.join(MODES)}")
+        duration = float(duration)
+        interval = float(interval)
+        if not 0 < duration <= self.max_duration:
+            raise ValueError(f"duration must be in (0, {self.max_duration}] seconds")
+        if not 0.001 <= interval <= 1.0:
+            raise ValueError("interval must be between 0.001 and 1.0 seconds")
+
+        with self.lock:
+            if self.session and self.session["state"] == "running":
+                raise RuntimeError("A profiling session is already running")
+            self._profiles = []
+            self._stacks = Counter()
+            self.session = {
+                "id": next(self._ids),
+                "mode": mode,
+                "state": "running",
+                "duration_s": duration,
+                "interval_s": interval if mode == "sampling" else None,
+                "started_at": time.time(),
+                "finished_at": None,
+                "samples": 0,
+                "threads": []
+            }
+            session = self.session
+        if mode == "sampling":
+            self._sampler = threading.Thread(target=self._sample_loop, args=(session, interval),
+                                             name="ProfilerSampler", daemon=True)
+            self._sampler.start()
+        self._timer = threading.Timer(duration, self.stop)
+        self._timer.daemon = True
+        self._timer.start()
+        self.logger.info(f"Profiling session {session['id']} started ({mode}, {duration}s)")
+        return dict(session)
+
+    def stop(self):
+        """Ends the running session early (or on its timer). Returns the session status."""
+        with self.lock:
+            session = self.session
+            if not session or session["state"] != "running":
+                return dict(session) if session else None
+            session["state"] = "finished"
+            session["finished_at"] = time.time()
+        if self._timer:
+            self._timer.cancel()
+        # A pipeline thread stopping the session detaches its own profile first
+        self.release()
+        with self.lock:
+            if not self._detached.wait_for(lambda: not self._live_attached(), self.detach_timeout):
+                self.logger.warning(f"{len(self._attached)} thread(s) did not detach their profiler "
+                                    f"within {self.detach_timeout}s; their data is left out")
+        if self._sampler and self._sampler is not threading.current_thread():
+            self._sampler.join(timeout=1.0)
+        self.logger.info(f"Profiling session {session['id']} finished")
+        return dict(session)
+
+    def status(self):
+        with self.lock:
+            return dict(self.session) if self.session else None
+
+    def checkpoint(self):
+        """Called once per loop iteration by pipeline threads to attach/detach cProfile."""
+        session = self.session
+        profile = getattr(self._local, "profile", None)
+        if profile is None:
+            if session is None or session["mode"] != "cprofile" or session["state"] != "running":
+                return
+            if getattr(self._local, "skipped_session", None) == session["id"]:
+                return
+            ident = threading.get_ident()
+            with self.lock:
+                # Registered under the lock so stop() cannot miss a thread that is attaching
+                if session is not self.session or session["state"] != "running":
+                    return
+                self._attached.add(ident)
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError as e:
+                # Python 3.12+: another thread's profiler is already active
+                self._local.skipped_session = session["id"]
+                with self.lock:
+                    self._attached.discard(ident)
+                    self._detached.notify_all()
+                self.logger.warning(f"cProfile not attached to {threading.current_thread().name}: {e}")
+                return
+            self._local.profile = profile
+            self._local.session_id = session["id"]
+        elif session is None or session["id"] != self._local.session_id or session["state"] != "running":
+            self.release()
+
+    def release(self):
+        """Detaches this thread's profile (if any) and hands it to its session; called when a loop exits."""
+        profile = getattr(self._local, "profile", None)
+        if profile is None:
+            return
+        profile.disable()
+        self._local.profile = None
+        with self.lock:
+            session = self.session
+            if session and session["id"] == self._local.session_id:
+                self._profiles.append(profile)
+                session["threads"].append(threading.current_thread().name)
+            self._attached.discard(threading.get_ident())
+            self._detached.notify_all()
+
+    def _live_attached(self):
+        """Attached threads that are still alive. Caller holds the lock."""
+        self._attached &= {t.ident for t in threading.enumerate()}
+        return self._attached
+
+    def _sample_loop(self, session, interval):
+        own = threading.get_ident()
+        names = {}
+        while session["state"] == "running":
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self._stacks[";".join(reversed(stack))] += 1
+            session["samples"] += 1
+            time.sleep(interval)
+        session["threads"] = sorted({key.split(";", 1)[0] for key in self._stacks})
+
+    def export(self, fmt=None):
+        """
+        Returns (bytes, mimetype, filename) for the last finished session.
+        Sampling sessions export collapsed stacks; cProfile sessions export
+        'text' (default) or binary 'pstats'. Raises RuntimeError if unavailable.
+        """
+        with self.lock:
+            session = self.session
+            if not session:
+                raise RuntimeError("No profiling session has been run")
+            if session["state"] == "running":
+                raise RuntimeError("Profiling session still running")
+            if session["mode"] == "cprofile" and self._live_attached():
+                raise RuntimeError("Pipeline threads are still detaching their profilers")
+            profiles = list(self._profiles)
+            stacks = dict(self._stacks)
+        name = f"profile-{session['id']}"
+
+        if session["mode"] == "sampling":
+            lines = [f"{stack} {count}" for stack, count in sorted(stacks.items(), key=lambda kv: -kv[1])]
+            return ("\n".join(lines) + "\n").encode("utf-8"), "text/plain", f"{name}.collapsed.txt"
+
+        if not profiles:
+            raise RuntimeError("No pipeline thread reported a profile (is the pipeline running?)")
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        if fmt == "pstats":
+            return marshal.dumps(stats.stats), "application/octet-stream", f"{name}.pstats"
+        out = io.StringIO()
+        stats.stream = out
+        stats.sort_stats("cumulative").print_stats(60)
+        return out.getvalue().encode("utf-8"), "text/plain", f"{name}.txt"
+
+    # -- Memory ------------------------------------------------------------
+
+    def memory_snapshot(self, frames=10, limit=20):
+        """Takes a tracemalloc snapshot (starting tracing if needed). Returns its id and top allocations."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            self.logger.info("tracemalloc started")
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        with self.lock:
+            snapshot_id = next(self._snapshot_ids)
+            self.snapshots[snapshot_id] = (time.time(), snapshot)
+            while len(self.snapshots) > self.max_snapshots:
+                self.snapshots.pop(min(self.snapshots))
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "id": snapshot_id,
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "top": [self._stat(s) for s in snapshot.statistics("lineno")[:limit]]
+        }
+
+    def memory_diff(self, from_id, to_id=None, limit=20):
+        """Top allocation growth between two snapshots (default: the latest). Raises KeyError for unknown ids."""
+        with self.lock:
+            if to_id is None and self.snapshots:
+                to_id = max(self.snapshots)
+            older = self.snapshots[from_id]
+            newer = self.snapshots[to_id]
+        diff = newer[1].compare_to(older[1], "lineno")
+        return {
+            "from": from_id,
+            "to": to_id,
+            "elapsed_s": round(newer[0] - older[0], 1),
+            "size_diff_bytes": sum(d.size_diff for d in diff),
+            "top": [dict(self._stat(d), size_diff=d.size_diff, count_diff=d.count_diff) for d in diff[:limit]]
+        }
+
+    def memory_stop(self):
+        """Stops tracemalloc and drops stored snapshots (tracing has a per-allocation cost)."""
+        with self.lock:
+            self.snapshots.clear()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            self.logger.info("tracemalloc stopped")
+
+    @staticmethod
+    def _stat(stat):
+        frame = stat.traceback[0]
+        return {"location": f"{frame.filename}:{frame.lineno}", "size": stat.size, "count": stat.count}
+
+    # -- Threads -----------------------------------------------------------
+
+    def thread_cpu(self):
+        """CPU seconds per live thread, plus utilisation since the previous call."""
+        now = time.monotonic()
+        threads = []
+        current = {}
+        for thread in threading.enumerate():
+            try:
+                cpu = time.clock_gettime(time.pthread_getcpuclockid(thread.ident))
+            except (OSError, AttributeError, TypeError):
+                continue
+            current[thread.ident] = (now, cpu)
+            entry = {"name": thread.name, "native_id": thread.native_id, "daemon": thread.daemon,
+                     "cpu_s": round(cpu, 3)}
+            last = self._cpu_last.get(thread.ident)
+            if last and now > last[0]:
+                entry["cpu_percent"] = round((cpu - last[1]) / (now - last[0]) * 100, 1)
+            threads.append(entry)
+        self._cpu_last = current
+        threads.sort(key=lambda t: -t["cpu_s"])
+        return {"process_cpu_s": round(time.process_time(), 3), "threads": threads}
@@ -0,0 +1,198 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from utils.logger import get_logger
+
+# Rows examined per eviction query, so a full outbox never scans the whole table
+EVICT_CHUNK = 64
+
+class ReportOutbox:
+    """
+    Durable store-and-forward queue for backend reports.
+
+    Reports are written to a WAL-mode SQLite database before any network I/O,
+    so an outage or a restart never loses them. Disk usage is bounded by the
+    total payload size; when the budget is exceeded the oldest reports are
+    evicted first.
+
+    Reports the backend will never accept are moved to a bounded dead-letter
+    table (newest `max_dead_letters` kept) so they stop blocking their camera.
+    """
+
+    def __init__(self, db_path="data/outbox.db", max_bytes=50 * 1024 * 1024, max_rows=100000, clock=time.time,
+                 max_dead_letters=1000):
+        self.logger = get_logger(self.__class__.__name__)
+        self.db_path = db_path
+        self.clock = clock
+        self.max_bytes = max_bytes
+        self.max_rows = max_rows
+        self.max_dead_letters = max_dead_letters
+        self.lock = threading.Lock()
+        self.evicted = 0
+        self.dead_lettered = 0
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " camera_id TEXT NOT NULL,"
+            " url TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_camera ON outbox (camera_id, id)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS dead_letter ("
+            " id INTEGER PRIMARY KEY,"
+            " camera_id TEXT NOT NULL,"
+            " url TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " attempts INTEGER NOT NULL,"
+            " reason TEXT,"
+            " failed_at REAL NOT NULL)"
+        )
+
+        # Running totals, so the budget check on every put needs no table scan
+        self._rows, self._bytes = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM outbox").fetchone()
+
+        pending = self.count()
+        if pending:
+            self.logger.info(f"Outbox opened with {pending} pending report(s) from a previous run")
+
+    def put(self, camera_id, url, payload):
+        """Persists a report. Returns the row id."""
+        body = json.dumps(payload)
+        with self.lock:
+            cur = self.conn.execute(
+                "INSERT INTO outbox (camera_id, url, payload, size, created_at) VALUES (?, ?, ?, ?, ?)",
+                (str(camera_id), url, body, len(body), self.clock())
+            )
+            self._rows += 1
+            self._bytes += len(body)
+            self._enforce_limits()
+            return cur.lastrowid
+
+    def _enforce_limits(self):
+        """
+        Evicts oldest rows until both the byte and row budgets are met,
+        reading at most EVICT_CHUNK rows per query. Caller holds the lock.
+        """
+        evicted = 0
+        while self._rows > self.max_rows or self._bytes > self.max_bytes:
+            chunk = self.conn.execute("SELECT id, size FROM outbox ORDER BY id LIMIT ?", (EVICT_CHUNK,)).fetchall()
+            if not chunk:
+                self._rows, self._bytes = 0, 0
+                break
+            for row_id, row_size in chunk:
+                if self._rows <= self.max_rows and self._bytes <= self.max_bytes:
+                    break
+                self._rows -= 1
+                self._bytes -= row_size
+                evicted += 1
+                last_id = row_id
+            self.conn.execute("DELETE FROM outbox WHERE id <= ?", (last_id,))
+        if not evicted:
+            return
+        self.evicted += evicted
+        self.logger.warning(f"Outbox full: evicted {evicted} oldest report(s)")
+
+    def peek(self, limit=50):
+        """Returns up to `limit` oldest reports as (id, camera_id, url, payload, created_at) tuples."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, camera_id, url, payload, created_at FROM outbox ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        return [(row_id, cam, url, json.loads(body), created) for row_id, cam, url, body, created in rows]
+
+    def ack(self, row_ids):
+        """Removes successfully delivered reports."""
+        if not row_ids:
+            return
+        with self.lock:
+            self._forget(row_ids)
+            self.conn.executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in row_ids])
+
+    def _forget(self, row_ids):
+        """Subtracts rows about to be deleted from the running totals. Caller holds the lock."""
+        for row_id in row_ids:
+            row = self.conn.execute("SELECT size FROM outbox WHERE id = ?", (row_id,)).fetchone()
+            if row:
+                self._rows -= 1
+                self._bytes -= row[0]
+
+    def mark_failed(self, row_id):
+        """Counts a failed delivery attempt. Returns the row's attempt count."""
+        with self.lock:
+            self.conn.execute("UPDATE outbox SET attempts = attempts + 1 WHERE id = ?", (row_id,))
+            row = self.conn.execute("SELECT attempts FROM outbox WHERE id = ?", (row_id,)).fetchone()
+        return row[0] if row else 0
+
+    def dead_letter(self, row_ids, reason):
+        """Moves undeliverable reports out of the queue into the dead-letter table."""
+        if not row_ids:
+            return
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                self._forget(row_ids)
+                for row_id in row_ids:
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO dead_letter"
+                        " (id, camera_id, url, payload, created_at, attempts, reason, failed_at)"
+                        " SELECT id, camera_id, url, payload, created_at, attempts, ?, ? FROM outbox WHERE id = ?",
+                        (reason, self.clock(), row_id)
+                    )
+                    self.conn.execute("DELETE FROM outbox WHERE id = ?", (row_id,))
+                # Keep only the newest dead letters
+                self.conn.execute(
+                    "DELETE FROM dead_letter WHERE id <= (SELECT id FROM dead_letter ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (self.max_dead_letters,)
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                self._rows, self._bytes = self.conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM outbox").fetchone()
+                raise
+            self.dead_lettered += len(row_ids)
+        self.logger.warning(f"Moved {len(row_ids)} undeliverable report(s) to dead letters: {reason}")
+
+    def dead_letters(self, limit=50):
+        """Returns up to `limit` newest dead letters as (id, camera_id, payload, attempts, reason) tuples."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, camera_id, payload, attempts, reason FROM dead_letter ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [(row_id, cam, json.loads(body), attempts, reason) for row_id, cam, body, attempts, reason in rows]
+
+    def dead_letter_count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM dead_letter").fetchone()[0]
+
+    def count(self):
+        with self.lock:
+            return self._rows
+
+    def size_bytes(self):
+        with self.lock:
+            return self._bytes
+
+    def close(self):
+        with self.lock:
+            try:
+                self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                self.conn.close()
+            except Exception as e:
+                self.logger.error(f"Failed to close outbox: {e}")
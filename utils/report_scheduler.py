@@ -0,0 +1,93 @@
+import time
+import zlib
+from utils.logger import get_logger
+
+class ReportScheduler:
+    """
+    Wall-clock aligned report scheduling with a per-device phase offset.
+
+    Interval boundaries sit on wall-clock multiples of `interval` (e.g. :00, :15,
+    :30, :45 for 15 s) so the backend can aggregate devices by interval. Each
+    device sends the report for an interval at `interval_end + phase`, where the
+    phase is derived from the serial number, so a site that powers up together
+    does not report in lock-step.
+
+    A report sent more than `late_tolerance` seconds after its due time is
+    flagged late and still carries the start of the interval it belongs to.
+
+    Every report also carries a `report_seq` that never repeats for this
+    device, so two reports with the same (whole-second) interval start, e.g.
+    after a reset mid-interval, stay distinct for the backend.
+    """
+
+    def __init__(self, interval, serial="", phase_spread=0.8, late_tolerance=2.0, align=True, clock=time.time):
+        self.logger = get_logger(self.__class__.__name__)
+        self.serial = serial or ""
+        self.phase_spread = phase_spread
+        self.late_tolerance = late_tolerance
+        self.align = align
+        self.clock = clock
+        self.late_reports = 0
+        self.skipped_intervals = 0
+        # Starts at the construction time in ms, so it keeps increasing across restarts
+        self.report_seq = int(clock() * 1000)
+        self.reset(interval)
+
+    @staticmethod
+    def phase_fraction(serial):
+        """Deterministic fraction in [0, 1) derived from the serial number."""
+        return (zlib.crc32(serial.encode("utf-8")) & 0xffffffff) / 2**32
+
+    def reset(self, interval=None):
+        """(Re)starts scheduling from now, e.g. when detection starts or the interval changes."""
+        if interval is not None:
+            self.interval = float(interval)
+        self.phase = self.phase_fraction(self.serial) * self.phase_spread * self.interval
+        now = self.clock()
+        if self.align:
+            # First report covers the interval currently in progress
+            self.next_start = (now // self.interval) * self.interval
+        else:
+            self.next_start = now
+        self.due_at = self.next_start + self.interval + self.phase
+
+    def poll(self, now=None):
+        """
+        Returns the schedule tag for the report due at `now`, or None if nothing is due.
+        Intervals missed entirely (e.g. during a stall) are counted and skipped.
+        """
+        if now is None:
+            now = self.clock()
+        if now < self.due_at:
+            return None
+
+        # Latest interval whose report is due; older ones are skipped
+        missed = int((now - self.due_at) // self.interval)
+        if missed:
+            self.skipped_intervals += missed
+            self.logger.warning(f"Report scheduler skipped {missed} interval(s)")
+        interval_start = self.next_start + missed * self.interval
+        due_at = self.due_at + missed * self.interval
+        lag = now - due_at
+        late = missed > 0 or lag > self.late_tolerance
+        if late:
+            self.late_reports += 1
+
+        self.next_start = interval_start + self.interval
+        self.due_at = due_at + self.interval
+        self.report_seq += 1
+        return {
+            "interval_start": self._iso(interval_start),
+            "interval_s": self.interval,
+            "late": late,
+            "report_seq": self.report_seq
+        }
+
+    def seconds_until_due(self, now=None):
+        if now is None:
+            now = self.clock()
+        return max(0.0, self.due_at - now)
+
+    @staticmethod
+    def _iso(ts):
+        return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts))
@@ -0,0 +1,192 @@
+import bisect
+import threading
+import time
+from utils.logger import get_logger
+
+# Upper bounds in seconds; spans frame-level work (sub-ms) up to backend sends (seconds)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Pipeline stages in processing order
+STAGES = ("capture_age", "preprocess", "infer", "postprocess", "tracking", "counting",
+          "annotate", "encode", "transport_send")
+
+class Histogram:
+    """Fixed-bucket histogram: one bisect and two additions per observation."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        """Returns (cumulative bucket counts incl. +Inf, sum, count)."""
+        with self.lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative = []
+        running = 0
+        for c in counts:
+            running += c
+            cumulative.append(running)
+        return cumulative, total, count
+
+    def quantile(self, q):
+        """Upper bucket bound containing quantile `q` (None without observations)."""
+        cumulative, _, count = self.snapshot()
+        if not count:
+            return None
+        rank = q * count
+        for bound, c in zip(self.buckets + (float("inf"),), cumulative):
+            if c >= rank:
+                return bound
+        return float("inf")
+
+class _StageTimer:
+    __slots__ = ("metrics", "stage", "started")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(self.stage, time.perf_counter() - self.started)
+        return False
+
+class StageMetrics:
+    """
+    Per-stage latency histograms, counters and gauges for the detection pipeline.
+
+    Stages record with `observe()` or `with metrics.time(stage):`. Counters are
+    keyed by name plus labels; gauges are callables sampled only when metrics
+    are rendered, so queue depths cost nothing between scrapes.
+    `render_prometheus()` produces the Prometheus text exposition format.
+    """
+
+    def __init__(self, prefix="traffic_ai", buckets=DEFAULT_BUCKETS, labels=None, enabled=True):
+        self.logger = get_logger(self.__class__.__name__)
+        self.prefix = prefix
+        self.buckets = buckets
+        self.labels = dict(labels or {})
+        self.enabled = enabled
+        self.histograms = {stage: Histogram(buckets) for stage in STAGES}
+        self.counters = {}  # {(name, labels tuple): value}
+        self.gauges = {}  # {name: (help, callable)}
+        self.lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        if not self.enabled:
+            return
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(stage, Histogram(self.buckets))
+        histogram.observe(seconds)
+
+    def time(self, stage):
+        """Context manager recording the duration of the block under `stage`."""
+        return _StageTimer(self, stage)
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled or not value:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def counter(self, name, **labels):
+        return self.counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def register_gauge(self, name, collect, help_text=""):
+        """Registers a callable returning the gauge value (or {label value: value} for a 'queue' label)."""
+        self.gauges[name] = (help_text, collect)
+
+    def set_labels(self, **labels):
+        """Constant labels added to every series (e.g. serial and firmware)."""
+        self.labels.update({k: v for k, v in labels.items() if v is not None})
+
+    def snapshot(self):
+        """JSON-friendly summary: count, mean and p50/p95/p99 bucket bounds per stage."""
+        stages = {}
+        for stage, histogram in list(self.histograms.items()):
+            _, total, count = histogram.snapshot()
+            if count:
+                stages[stage] = {
+                    "count": count,
+                    "mean_ms": round(total / count * 1000, 3),
+                    "p50_ms": self._ms(histogram.quantile(0.5)),
+                    "p95_ms": self._ms(histogram.quantile(0.95)),
+                    "p99_ms": self._ms(histogram.quantile(0.99))
+                }
+        with self.lock:
+            counters = {name + "".join(f"[{k}={v}]" for k, v in labels): value
+                        for (name, labels), value in self.counters.items()}
+        return {"stages": stages, "counters": counters}
+
+    def render_prometheus(self):
+        lines = []
+        name = f"{self.prefix}_stage_seconds"
+        lines.append(f"# HELP {name} Time spent per pipeline stage.")
+        lines.append(f"# TYPE {name} histogram")
+        for stage, histogram in list(self.histograms.items()):
+            cumulative, total, count = histogram.snapshot()
+            for bound, c in zip(histogram.buckets + (float("inf"),), cumulative):
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self._series(name + '_bucket', {'stage': stage, 'le': le})} {c}")
+            lines.append(f"{self._series(name + '_sum', {'stage': stage})} {total:.6f}")
+            lines.append(f"{self._series(name + '_count', {'stage': stage})} {count}")
+
+        with self.lock:
+            counters = sorted(self.counters.items())
+        seen = set()
+        for (counter, labels), value in counters:
+            full = f"{self.prefix}_{counter}"
+            if full not in seen:
+                seen.add(full)
+                lines.append(f"# TYPE {full} counter")
+            lines.append(f"{self._series(full, dict(labels))} {value}")
+
+        for gauge, (help_text, collect) in sorted(self.gauges.items()):
+            try:
+                value = collect()
+            except Exception as e:
+                self.logger.debug(f"Gauge {gauge} unavailable: {e}")
+                continue
+            full = f"{self.prefix}_{gauge}"
+            if help_text:
+                lines.append(f"# HELP {full} {help_text}")
+            lines.append(f"# TYPE {full} gauge")
+            if isinstance(value, dict):
+                for label, v in sorted(value.items()):
+                    lines.append(f"{self._series(full, {'queue': label})} {v}")
+            else:
+                lines.append(f"{self._series(full, {})} {value}")
+        return "\n".join(lines) + "\n"
+
+    def _series(self, name, labels):
+        merged = dict(self.labels, **labels)
+        if not merged:
+            return name
+        body = ",".join(f'{k}="{self._escape(v)}"' for k, v in merged.items())
+        return f"{name}{{{body}}}"
+
+    @staticmethod
+    def _escape(value):
+        return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+    @staticmethod
+    def _ms(seconds):
+        if seconds is None:
+            return None
+        return None if seconds == float("inf") else round(seconds * 1000, 3)
@@ -0,0 +1,146 @@
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from utils.logger import get_logger
+
+class StatusHub:
+    """
+    Versioned dashboard state shared by the polling endpoints and the event stream.
+
+    `collect` returns the current state as {section: value}. It is sampled at
+    most once per `min_interval`, however many dashboards are open; the version
+    only advances when a section actually changed, and the changed sections are
+    kept in a short history so a reconnecting client can resume from the last
+    version it saw instead of reloading everything.
+    """
+
+    def __init__(self, collect, min_interval=0.5, history=256, clock=time.time):
+        self.logger = get_logger(self.__class__.__name__)
+        self.collect = collect
+        self.min_interval = min_interval
+        self.clock = clock
+        # Distinguishes versions (and ETags) across restarts
+        self.epoch = uuid.uuid4().hex[:8]
+        self.cond = threading.Condition()
+        self.refresh_lock = threading.Lock()
+        self.sections = {}
+        self.version = 0
+        self.history = deque(maxlen=history)  # (version, {section: value})
+        self.last_collect = 0.0
+        self.rendered = {}  # {name: (version, value)}
+        self.subscribers = 0
+
+    def refresh(self, force=False):
+        """Samples the state if it is older than min_interval. Returns the current version."""
+        if not force and self.clock() - self.last_collect < self.min_interval:
+            return self.version
+        # Only one thread samples; the others use the result
+        if not self.refresh_lock.acquire(blocking=False):
+            return self.version
+        try:
+            self.last_collect = self.clock()
+            try:
+                sections = self.collect()
+            except Exception as e:
+                self.logger.error(f"Status collection failed: {e}")
+                return self.version
+            with self.cond:
+                changed = {k: v for k, v in sections.items() if self.sections.get(k) != v}
+                if changed:
+                    self.version += 1
+                    self.sections = dict(self.sections, **changed)
+                    self.history.append((self.version, changed))
+                    self.cond.notify_all()
+                return self.version
+        finally:
+            self.refresh_lock.release()
+
+    def etag(self, version=None):
+        return f"{self.epoch}-{self.version if version is None else version}"
+
+    def render(self, name, build):
+        """
+        Returns (version, value) where value is build(sections), cached per version
+        so repeated polls of unchanged state are served without rebuilding.
+        """
+        self.refresh()
+        with self.cond:
+            version, sections = self.version, self.sections
+            cached = self.rendered.get(name)
+            if cached and cached[0] == version:
+                return cached
+        value = build(sections)
+        with self.cond:
+            self.rendered[name] = (version, value)
+        return version, value
+
+    def changes_since(self, version):
+        """
+        Returns (current_version, changes) where changes are the merged sections
+        changed after `version`, or None if the history no longer covers it.
+        """
+        with self.cond:
+            current = self.version
+            if version == current:
+                return current, {}
+            if version is None or version > current or not self.history or self.history[0][0] > version + 1:
+                return current, None
+            merged = {}
+            for v, changed in self.history:
+                if v > version:
+                    merged.update(changed)
+            return current, merged
+
+    def parse_version(self, token):
+        """Parses an '<epoch>-<version>' event id. Versions from another process are ignored."""
+        if not token:
+            return None
+        epoch, _, version = token.rpartition("-")
+        if epoch != self.epoch or not version.isdigit():
+            return None
+        return int(version)
+
+    def events(self, since=None, heartbeat=15.0):
+        """
+        Generator of (event, id, data) tuples for one subscriber: a full 'snapshot'
+        (or a 'delta' when resuming from `since`), then a 'delta' per change and a
+        'heartbeat' after `heartbeat` seconds of silence.
+        """
+        self.refresh()
+        with self.cond:
+            self.subscribers += 1
+        try:
+            version = since
+            last_event = None
+            while True:
+                current, changes = self.changes_since(version)
+                if changes is None:
+                    with self.cond:
+                        current, sections = self.version, self.sections
+                    yield "snapshot", self.etag(current), {"version": current, "sections": sections}
+                    version, last_event = current, self.clock()
+                elif changes:
+                    yield "delta", self.etag(current), {"version": current, "changes": changes}
+                    version, last_event = current, self.clock()
+                elif last_event is None or self.clock() - last_event >= heartbeat:
+                    # Also confirms a resume that had nothing to catch up on
+                    yield "heartbeat", None, {"version": version, "ts": round(self.clock(), 3)}
+                    last_event = self.clock()
+
+                # Subscribers drive sampling; refresh() keeps it to one collect per interval
+                with self.cond:
+                    self.cond.wait_for(lambda: self.version != version, self.min_interval)
+                self.refresh()
+        finally:
+            with self.cond:
+                self.subscribers -= 1
+
+    @staticmethod
+    def format_sse(event, event_id, data):
+        lines = [f"event: {event}"]
+        if event_id:
+            lines.append(f"id: {event_id}")
+        lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+        return "\n".join(lines) + "\n\n"
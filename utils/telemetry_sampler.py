@@ -0,0 +1,130 @@
+import threading
+import time
+from collections import deque
+from utils.logger import get_logger
+
+# Numeric sample fields summarised per report
+NUMERIC_FIELDS = ("cpu_temp", "cpu_freq_mhz", "hailo_temp", "hailo_load")
+
+class TelemetrySampler:
+    """
+    Background hardware telemetry sampling.
+
+    A daemon thread samples the HardwareMonitor every `interval` seconds
+    (sysfs reads, plus one `hailortcli` call every `hailo_every` samples) into
+    a ring buffer. Callers never block on hardware: `latest()` is the cached
+    last sample and `report_summary()` the min/max/avg since the previous
+    report.
+    """
+
+    def __init__(self, monitor, interval=5.0, history=720, hailo_every=1, clock=time.time):
+        self.logger = get_logger(self.__class__.__name__)
+        self.monitor = monitor
+        self.interval = interval
+        self.hailo_every = max(1, int(hailo_every))
+        self.clock = clock
+        self.samples = deque(maxlen=history)
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.sample_count = 0
+        self.last_report_at = None
+        self.listeners = []
+        self._hailo = (None, None)
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name="Telemetry", daemon=True)
+        self.thread.start()
+        self.logger.info(f"Telemetry sampler started ({self.interval}s interval)")
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=3.0)
+        self.thread = None
+
+    def add_listener(self, callback):
+        """Calls `callback(sample)` on the sampler thread after every sample."""
+        self.listeners.append(callback)
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            started = time.monotonic()
+            try:
+                self.sample_once()
+            except Exception as e:
+                self.logger.error(f"Telemetry sample failed: {e}")
+            self.stop_event.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def sample_once(self):
+        """Takes one sample now (the sampler thread calls this every interval)."""
+        if self.sample_count % self.hailo_every == 0:
+            self._hailo = self.monitor.get_hailo_identify()
+        throttled = self.monitor.get_throttled()
+        sample = {
+            "ts": self.clock(),
+            "cpu_temp": self.monitor.get_cpu_temp(),
+            "cpu_freq_mhz": self.monitor.get_cpu_freq_mhz(),
+            "throttled": throttled,
+            "hailo_temp": self._hailo[0],
+            "hailo_load": self._hailo[1]
+        }
+        with self.lock:
+            self.samples.append(sample)
+            self.sample_count += 1
+        for callback in self.listeners:
+            try:
+                callback(sample)
+            except Exception as e:
+                self.logger.error(f"Telemetry listener failed: {e}")
+        return sample
+
+    def latest(self):
+        """The most recent sample (cached), or None before the first one."""
+        with self.lock:
+            return self.samples[-1] if self.samples else None
+
+    def series(self, seconds=None):
+        """Samples of the last `seconds` (all buffered samples by default)."""
+        with self.lock:
+            samples = list(self.samples)
+        if seconds is None:
+            return samples
+        cutoff = self.clock() - seconds
+        return [s for s in samples if s["ts"] >= cutoff]
+
+    def summarise(self, samples):
+        """Latest values plus min/max/avg per numeric field and any throttle condition seen."""
+        if not samples:
+            return {}
+        latest = samples[-1]
+        summary = {field: latest[field] for field in NUMERIC_FIELDS}
+        mask = 0
+        for s in samples:
+            mask |= s["throttled"] or 0
+        known = any(s["throttled"] is not None for s in samples)
+        summary["throttled"] = self.monitor.throttle_flags(mask) if known else None
+        stats = {}
+        for field in NUMERIC_FIELDS:
+            values = [s[field] for s in samples if s[field] is not None]
+            if values:
+                stats[field] = {"min": min(values), "max": max(values),
+                                "avg": round(sum(values) / len(values), 2)}
+        summary["stats"] = stats
+        summary["samples"] = len(samples)
+        return summary
+
+    def report_summary(self):
+        """Summary of the samples since the previous call (instant: never touches hardware)."""
+        now = self.clock()
+        since = self.last_report_at
+        self.last_report_at = now
+        with self.lock:
+            samples = [s for s in self.samples if since is None or s["ts"] > since]
+            if not samples and self.samples:
+                # Report interval shorter than the sample interval: repeat the latest reading
+                samples = [self.samples[-1]]
+        return self.summarise(samples)
@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+from collections import deque
+from utils.logger import get_logger
+
+class _Span:
+    __slots__ = ("recorder", "name", "trace_id", "args", "started")
+
+    def __init__(self, recorder, name, trace_id, args):
+        self.recorder = recorder
+        self.name = name
+        self.trace_id = trace_id
+        self.args = args
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.recorder.record(self.name, self.trace_id, self.started, time.perf_counter(), **(self.args or {}))
+        return False
+
+class _NullSpan:
+    """Shared span for unsampled frames: no timing, no allocation."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class TraceRecorder:
+    """
+    Sampled per-frame span recorder with Chrome trace-event export.
+
+    The camera's frame sequence number is the trace ID. Whether a frame is
+    traced is a pure function of that ID (every Nth frame), so every stage
+    agrees on it without passing a flag along. Spans go into a fixed-size
+    ring buffer; `export_chrome()` turns the last N seconds into JSON that
+    chrome://tracing or Perfetto can open. Spans without a trace ID (e.g.
+    API requests) are always recorded so GIL contention shows up next to
+    the frame spans, but into their own smaller ring (`untraced_capacity`):
+    a client polling the API cannot push the sampled frame traces out.
+    """
+
+    def __init__(self, capacity=8192, sample_rate=0.1, enabled=True, untraced_capacity=1024):
+        self.logger = get_logger(self.__class__.__name__)
+        self.spans = deque(maxlen=capacity)
+        self.untraced_spans = deque(maxlen=untraced_capacity)
+        self.enabled = enabled
+        self.thread_names = {}
+        self.set_sample_rate(sample_rate)
+
+    def configure(self, config):
+        self.enabled = config.get("enabled", self.enabled)
+        capacity = config.get("capacity")
+        if capacity and capacity != self.spans.maxlen:
+            self.spans = deque(self.spans, maxlen=capacity)
+        untraced_capacity = config.get("untraced_capacity")
+        if untraced_capacity and untraced_capacity != self.untraced_spans.maxlen:
+            self.untraced_spans = deque(self.untraced_spans, maxlen=untraced_capacity)
+        self.set_sample_rate(config.get("sample_rate", self.sample_rate))
+
+    def set_sample_rate(self, rate):
+        self.sample_rate = max(0.0, min(1.0, float(rate)))
+        self.every = int(round(1.0 / self.sample_rate)) if self.sample_rate > 0 else 0
+
+    def sampled(self, trace_id):
+        if not self.enabled:
+            return False
+        if trace_id is None:
+            return True
+        return self.every > 0 and trace_id % self.every == 0
+
+    def span(self, name, trace_id=None, **args):
+        """Context manager timing the block as span `name` of frame `trace_id`."""
+        if not self.sampled(trace_id):
+            return _NULL_SPAN
+        return _Span(self, name, trace_id, args)
+
+    def record(self, name, trace_id, started, ended, **args):
+        """Records a finished span (perf_counter timestamps)."""
+        if not self.sampled(trace_id):
+            return
+        thread = threading.current_thread()
+        self.thread_names[thread.ident] = thread.name
+        # deque.append is atomic; the oldest span falls off when full
+        ring = self.spans if trace_id is not None else self.untraced_spans
+        ring.append((started, ended - started, name, trace_id, thread.ident, args))
+
+    def export_chrome(self, seconds=10.0):
+        """Returns the spans of the last `seconds` as a Chrome trace-event document."""
+        cutoff = time.perf_counter() - seconds
+        spans = sorted((s for s in list(self.spans) + list(self.untraced_spans) if s[0] + s[1] >= cutoff),
+                       key=lambda s: s[0])
+        pid = os.getpid()
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+                   "args": {"name": "traffic-ai pipeline"}}]
+        for tid in {s[4] for s in spans}:
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                           "args": {"name": self.thread_names.get(tid, str(tid))}})
+        for started, duration, name, trace_id, tid, args in spans:
+            event_args = dict(args)
+            if trace_id is not None:
+                event_args["trace_id"] = trace_id
+            events.append({
+                "name": name,
+                "cat": "frame" if trace_id is not None else "api",
+                "ph": "X",
+                "ts": round(started * 1e6, 1),
+                "dur": round(duration * 1e6, 1),
+                "pid": pid,
+                "tid": tid,
+                "args": event_args
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms",
+                "otherData": {"sample_rate": self.sample_rate, "buffered_spans": len(self.spans) + len(self.untraced_spans)}}